@@ -16,10 +16,12 @@ from pathlib import Path
 from version import __version__, __app_name__, __description__
 
 # Import utilities
-from utils.downloader import VideoInfoExtractor, VideoDownloader, PlaylistExtractor
+from utils.downloader import VideoDownloader, PlaylistExtractor
 from utils.format_handler import FormatProcessor
 from utils.file_utils import FileManager
 from utils.update_checker import UpdateChecker
+from utils.library import MediaLibrary
+from utils.player_cache import PlayerCache
 from config.settings import SettingsManager
 
 # Import UI components
@@ -27,6 +29,8 @@ from ui_components import (
     inject_custom_css,
     render_header,
     render_url_input,
+    load_engine,
+    get_extractor,
     render_video_info_card,
     render_quick_download,
     render_custom_formats,
@@ -94,6 +98,9 @@ def main():
     # Check for updates (only once per session)
     check_for_updates()
     
+    # Solve the current YouTube player in the background (only once per process)
+    PlayerCache.warm_up()
+    
     # Display update notification if available
     if st.session_state.get('update_available', False) and st.session_state.get('update_info'):
         from version import __version__
@@ -108,6 +115,16 @@ def main():
     download_path = settings.get('download_location')
     FileManager.ensure_directory(download_path)
     
+    # Pick up files moved or deleted outside the app (background, once per process)
+    if settings.get('add_to_library'):
+        MediaLibrary.reconcile_async(download_path)
+    
+    # Expire old history, finished jobs and orphaned .part/.ytdl files (background, once per process)
+    load_engine().start_retention(
+        settings.get('keep_history_days', 30),
+        library=MediaLibrary.shared() if settings.get('add_to_library') else None
+    )
+    
     # Header
     render_header()
     
@@ -118,16 +135,23 @@ def main():
         
         if url:
             # Validate URL
-            extractor = VideoInfoExtractor()
+            extractor = get_extractor()
             is_valid, error_msg = extractor.validate_url(url)
             
             if not is_valid:
                 st.error(f"❌ {error_msg}")
                 return
             
-            # Extract video info
-            with st.spinner("🔍 Fetching video information..."):
-                video_info = extractor.extract_info(url)
+            # Extract video info in the background
+            pending = extractor.extract_info_async(url)
+            entry = st.session_state.get('selected_video')
+            
+            if pending.done() or not entry or entry.get('url') != url:
+                with st.spinner("🔍 Fetching video information..."):
+                    video_info = pending.result()
+            else:
+                # Draw the card from the search result now, formats follow
+                video_info = extractor.preview_info(entry)
             
             if not video_info:
                 st.error("❌ Failed to fetch video information. Please check the URL and try again.")
@@ -150,16 +174,28 @@ def main():
             ])
             
             with tab1:
-                render_quick_download(video_info, settings)
+                if video_info.get('partial'):
+                    st.info("⏳ Loading available formats...")
+                else:
+                    render_quick_download(video_info, settings)
             
             with tab2:
-                render_custom_formats(video_info, settings)
+                if video_info.get('partial'):
+                    st.info("⏳ Loading available formats...")
+                else:
+                    render_custom_formats(video_info, settings)
             
             with tab3:
                 render_advanced_settings(settings)
             
             with tab4:
                 render_batch_download()
+            
+            if video_info.get('partial'):
+                # The page is already on screen - wait for the formats, then redraw with them
+                if pending.result() is None:
+                    st.session_state.selected_video = None
+                st.rerun()
     
     # Footer
     render_footer()
@@ -0,0 +1,181 @@
+"""
+YoutubeDL Pool Benchmark Script
+Times the per-call setup of a metadata or download call with a fresh
+YoutubeDL per call (as the app used to do) and with the pool, then checks
+that per-call options do not leak between calls and that instances of
+exited threads are closed. Nothing is fetched from the network.
+
+Usage: python benchmark_ydl_pool.py [--calls N]
+"""
+
+import argparse
+import sys
+import threading
+import time
+
+import yt_dlp
+
+# A download call as VideoDownloader builds it
+OPTS = {
+    'quiet': True,
+    'no_warnings': True,
+    'skip_download': True,
+    'format': '137+bestaudio',
+    'outtmpl': '/tmp/%(title)s.%(ext)s',
+    'progress_hooks': [lambda d: None],
+    'postprocessors': [{'key': 'FFmpegMetadata', 'add_metadata': True}],
+}
+INFO = {'id': 'x', 'title': 't', 'ext': 'mp4', 'extractor': 'youtube'}
+
+
+def setup_call(ydl):
+    """What every call does before its first request: extractor, filename, request director"""
+    ydl.get_info_extractor('Youtube')
+    ydl.prepare_filename(INFO)
+    ydl._request_director
+
+
+def time_calls(calls: int, acquire) -> float:
+    """Milliseconds per call"""
+    started = time.perf_counter()
+    for _ in range(calls):
+        with acquire(OPTS) as ydl:
+            setup_call(ydl)
+    return (time.perf_counter() - started) * 1000 / calls
+
+
+def bench_setup_time(calls: int):
+    """The pool should cut per-call setup by an order of magnitude"""
+    from utils.ydl_pool import YDLPool
+    
+    print("=" * 60)
+    print(f"Testing Per-Call Setup: {calls} Calls, Fresh Instances vs Pool")
+    print("=" * 60)
+    
+    # Import the extractor modules once, outside both timings
+    yt_dlp.YoutubeDL({'quiet': True}).get_info_extractor('Youtube')
+    
+    fresh = time_calls(calls, yt_dlp.YoutubeDL)
+    pool = YDLPool()
+    pooled = time_calls(calls, pool.acquire)
+    pool.clear()
+    
+    print(f"Fresh YoutubeDL per call: {fresh:.1f} ms/call")
+    print(f"Pooled YoutubeDL:         {pooled:.1f} ms/call ({fresh / pooled:.0f}x faster)")
+    print(f"Pool stats: {pool.stats()}")
+    
+    assert pooled * 10 <= fresh, f"Pool is only {fresh / pooled:.1f}x faster than fresh instances"
+    print("✅ Pool cuts per-call setup by more than 10x")
+    return True
+
+
+def check_options_do_not_leak():
+    """Hooks and postprocessors of one call must be gone in the next; errors recycle"""
+    from utils.ydl_pool import YDLPool
+    
+    print("\n" + "=" * 60)
+    print("Testing Per-Call Options")
+    print("=" * 60)
+    
+    pool = YDLPool()
+    with pool.acquire(OPTS) as ydl:
+        applied = (len(ydl._progress_hooks), len(ydl._pps['post_process']))
+    with pool.acquire({'quiet': True, 'no_warnings': True}) as ydl:
+        left = (len(ydl._progress_hooks), len(ydl._pps['post_process']), ydl.params.get('format'))
+    print(f"During the call: {applied[0]} progress hooks, {applied[1]} postprocessors")
+    print(f"Next call: {left[0]} progress hooks, {left[1]} postprocessors, format {left[2]!r}")
+    assert applied[0] >= 1 and applied[1] == 1, "Per-call hooks or postprocessors were not applied"
+    assert left == (0, 0, None), "Per-call options leaked into the next call"
+    
+    try:
+        with pool.acquire(OPTS):
+            raise RuntimeError("extraction failed")
+    except RuntimeError:
+        pass
+    stats = pool.stats()
+    pool.clear()
+    print(f"After a failing call: {stats}")
+    assert stats['recycled'] == 1, "The instance of a failing call was not recycled"
+    print("✅ Per-call options restored; failing instances recycled")
+    return True
+
+
+def check_exited_threads_reaped(threads: int = 5):
+    """Instances of threads that have exited should be closed, not kept forever"""
+    from utils.ydl_pool import YDLPool
+    
+    print("\n" + "=" * 60)
+    print(f"Testing Instances of {threads} Exited Threads")
+    print("=" * 60)
+    
+    pool = YDLPool()
+    closed = []
+    
+    def call():
+        with pool.acquire(OPTS) as ydl:
+            setup_call(ydl)
+            close = ydl.close
+            ydl.close = lambda: (closed.append(ydl), close())
+    
+    # One thread at a time, like successive Streamlit reruns
+    for _ in range(threads):
+        thread = threading.Thread(target=call)
+        thread.start()
+        thread.join()
+    stats = pool.stats()
+    pool.clear()
+    
+    print(f"Pool stats: {stats}, instances closed: {len(closed)}")
+    assert stats['created'] == threads, f"{stats['created']} instances created for {threads} threads"
+    assert stats['reaped'] == len(closed) == threads, "Instances of exited threads were left open"
+    print("✅ Every exited thread's instance was closed")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--calls', type=int, default=200, help='Calls per timing (default: 200)')
+    args = parser.parse_args()
+    
+    print("\n" + "=" * 60)
+    print("CONVERSO DOWNLOADER - YOUTUBEDL POOL BENCHMARK")
+    print("=" * 60 + "\n")
+    
+    tests = [
+        ("Per-Call Setup", lambda: bench_setup_time(args.calls)),
+        ("Per-Call Options", check_options_do_not_leak),
+        ("Exited Threads", check_exited_threads_reaped),
+    ]
+    
+    results = []
+    for name, test_func in tests:
+        try:
+            result = test_func()
+            results.append((name, result))
+        except AssertionError as e:
+            print(f"❌ {e}")
+            results.append((name, False))
+        except Exception as e:
+            print(f"\n❌ {name} test failed with exception: {e}")
+            results.append((name, False))
+    
+    # Summary
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    
+    passed = sum(1 for _, result in results if result)
+    total = len(results)
+    
+    for name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{status} - {name}")
+    
+    print("\n" + "=" * 60)
+    print(f"Results: {passed}/{total} tests passed")
+    print("=" * 60)
+    
+    return 0 if passed == total else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
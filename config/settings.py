@@ -67,6 +67,10 @@ class SettingsManager:
             'embed_thumbnail': True,
             'embed_metadata': True,
             'embed_chapters': False,
+            'split_chapters': False,
+            'trace_jobs': False,
+            'profile_jobs': '',
+            'prefetch_results': 3,
             'theme': 'dark',
             'notifications_enabled': True,
             'keep_history_days': 30,
@@ -82,4 +86,11 @@ class SettingsManager:
             'extract_audio_copy': False,
             'normalize_audio': False,
             'add_to_library': False,
+            'download_archive': '',
+            'scratch_dir': '',
+            'digest_algorithm': 'sha256',
+            'digest_read_back': False,
+            'adaptive_concurrency': False,
+            'max_concurrent_downloads': 8,
+            'subscription_interval_minutes': 60,
         }
@@ -0,0 +1,614 @@
+"""
+Converso Downloader - Headless Command Line Interface
+Scriptable entry point that reuses the download engine without Streamlit
+
+Usage:
+    python -m converso info URL
+    python -m converso search "query" -n 5
+    python -m converso download URL [-q best|high|medium|low] [--audio mp3]
+    python -m converso batch urls.txt        (use - to read lines from stdin)
+    python -m converso batch urls.txt --plan (predicted size/ETA, shortest first)
+    python -m converso import urls.csv       (txt, CSV or JSONL; deduplicated)
+    python -m converso playlist URL [--download]
+    python -m converso subscribe add|list|sync|watch [URL] [--download]
+    python -m converso library search "query" [--uploader NAME] [--min-height 1080]
+    python -m converso verify [FILE ...]     (re-hash library files, report bit rot)
+    python -m converso gc [--dry-run]        (remove orphaned intermediates, expire history)
+    python -m converso serve [--host 127.0.0.1] [--port 8765]
+
+Results are written to stdout as JSON (info, search) or JSON Lines
+(download, batch, playlist) so they can be piped into other tools.
+
+Created by Converso Empire
+https://github.com/Converso-Empire
+© 2025 Converso Empire. All rights reserved.
+"""
+
+import argparse
+import json
+import os
+import secrets
+import sys
+import time
+from concurrent.futures import CancelledError
+from typing import Dict, Iterable, Optional
+
+from version import __version__, __app_name__
+from config.settings import SettingsManager
+from utils.downloader import VideoInfoExtractor, VideoDownloader, PlaylistExtractor
+from utils.format_handler import FormatProcessor, json_default
+from utils.validators import URLValidator
+from utils.youtube_search import YouTubeSearcher
+
+
+# Machine-readable output stream; everything else (yt-dlp, warnings) goes to stderr
+_OUTPUT = sys.stdout
+
+
+def emit(record: Dict, stream=None):
+    """Write one JSON record on its own line and flush immediately"""
+    stream = stream or _OUTPUT
+    stream.write(json.dumps(record, default=json_default, ensure_ascii=False) + '\n')
+    stream.flush()
+
+
+def build_download_options(settings: SettingsManager, args: argparse.Namespace) -> Dict:
+    """Translate settings and command line flags into VideoDownloader options"""
+    options = {
+        'embed_thumbnail': settings.get('embed_thumbnail'),
+        'embed_metadata': settings.get('embed_metadata'),
+        'embed_chapters': settings.get('embed_chapters'),
+        'split_chapters': settings.get('split_chapters'),
+        'add_to_library': settings.get('add_to_library'),
+        'scratch_dir': getattr(args, 'scratch_dir', None) or settings.get('scratch_dir') or None,
+        'digest_algorithm': settings.get('digest_algorithm') or None,
+        'digest_read_back': settings.get('digest_read_back', False),
+        'download_subtitles': settings.get('download_subtitles'),
+        'subtitle_languages': settings.get('subtitle_languages', ['en']),
+        'subtitle_format': settings.get('subtitle_format', 'srt'),
+        'trace': getattr(args, 'trace', False) or settings.get('trace_jobs', False),
+        'profile': getattr(args, 'profile', None) or settings.get('profile_jobs') or None,
+    }
+    
+    if getattr(args, 'audio', None):
+        options.update({
+            'extract_audio': True,
+            'audio_format': args.audio,
+            'audio_quality': '320' if args.audio == 'mp3' else '192',
+            'embed_chapters': False,
+            'split_chapters': False,
+        })
+    else:
+        options['merge_output_format'] = settings.get('output_format', 'mp4')
+    
+    if getattr(args, 'chapter', None):
+        options['section_chapter'] = args.chapter
+    elif getattr(args, 'start', None) is not None or getattr(args, 'end', None) is not None:
+        options['section_start'] = URLValidator.parse_timestamp(args.start) if args.start else 0
+        options['section_end'] = URLValidator.parse_timestamp(args.end) if args.end else None
+        options['frame_accurate'] = args.frame_accurate
+    
+    return options
+
+
+def resolve_format(url: str, args: argparse.Namespace, extractor: VideoInfoExtractor) -> Optional[str]:
+    """Pick the format spec the same way the Quick Download tab does"""
+    if getattr(args, 'audio', None):
+        return 'bestaudio'
+    
+    if getattr(args, 'format', None):
+        return args.format
+    
+    info = extractor.extract_info(url)
+    if not info:
+        return None
+    
+    format_id = FormatProcessor.get_best_format_id(info['formats'], args.quality)
+    return f"{format_id}+bestaudio" if format_id else None
+
+
+def download_one(url: str, args: argparse.Namespace, settings: SettingsManager,
+                 extractor: VideoInfoExtractor, overrides: Optional[Dict] = None,
+                 format_spec: Optional[str] = None) -> Dict:
+    """Download a single URL, streaming progress records when requested"""
+    
+    def progress_callback(info: Dict):
+        if args.progress:
+            emit({'event': 'progress', 'url': url, **info})
+    
+    output_dir = args.output or settings.get('download_location')
+    downloader = VideoDownloader(output_dir, progress_callback)
+    
+    format_spec = format_spec or resolve_format(url, args, extractor)
+    if not format_spec:
+        return {'success': False, 'error': 'No suitable format found'}
+    
+    options = build_download_options(settings, args)
+    options.update(overrides or {})
+    return downloader.download(url, format_spec, options)
+
+
+def iter_lines(source: str) -> Iterable[str]:
+    """Yield non-empty, non-comment lines from a file or stdin as they arrive"""
+    handle = sys.stdin if source == '-' else open(source, 'r', encoding='utf-8')
+    try:
+        for line in handle:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+def cmd_info(args: argparse.Namespace, settings: SettingsManager) -> int:
+    """Print processed video metadata"""
+    profile = 'full' if args.formats else args.extract_profile
+    info = VideoInfoExtractor().extract_info(args.url, profile=profile)
+    if not info:
+        emit({'success': False, 'url': args.url, 'error': 'Failed to fetch video information'})
+        return 1
+    
+    if not args.formats:
+        info = {**info, 'formats': len(info.get('formats', []))}
+    
+    emit(info)
+    return 0
+
+
+def cmd_search(args: argparse.Namespace, settings: SettingsManager) -> int:
+    """Print search results"""
+    results = YouTubeSearcher().search(args.query, max_results=args.max_results)
+    emit({'query': args.query, 'results': results})
+    return 0 if results else 1
+
+
+def cmd_download(args: argparse.Namespace, settings: SettingsManager) -> int:
+    """Download one URL"""
+    # A t= parameter on the URL starts a clip just like in the web UI
+    if args.start is None and not args.chapter:
+        if (start := URLValidator.extract_timestamp(args.url)) is not None:
+            args.start = str(start)
+    
+    result = download_one(args.url, args, settings, VideoInfoExtractor())
+    emit({'event': 'result', 'url': args.url, **result})
+    return 0 if result.get('success') else 1
+
+
+def cmd_batch(args: argparse.Namespace, settings: SettingsManager) -> int:
+    """Download every line of a file (or stdin) as it is read, or as planned with --plan"""
+    extractor = VideoInfoExtractor()
+    failures = 0
+    
+    items = (URLValidator.parse_batch_line(line) for line in iter_lines(args.source))
+    if args.plan or args.dry_run:
+        plan = plan_batch(list(items), args, settings, extractor)
+        if args.dry_run:
+            return 0
+        items = plan['items']
+        failures = len(plan['deferred']) + len(plan['refused'])
+    
+    for item in items:
+        overrides = {}
+        if item['start'] is not None or item['end'] is not None:
+            overrides = {
+                'section_start': item['start'] or 0,
+                'section_end': item['end'],
+                'frame_accurate': args.frame_accurate,
+            }
+        
+        format_spec = None if args.format else item.get('format_spec')
+        result = download_one(item['url'], args, settings, extractor, overrides, format_spec)
+        emit({'event': 'result', 'url': item['url'], **result})
+        failures += 0 if result.get('success') else 1
+    
+    return 1 if failures else 0
+
+
+def plan_batch(items: list, args: argparse.Namespace, settings: SettingsManager,
+               extractor: VideoInfoExtractor) -> Dict:
+    """Size and order a batch (shortest first, within the free space) and emit the plan"""
+    from utils.planner import BatchPlanner
+    
+    infos = dict(extractor.extract_many([item['url'] for item in items], profile='audio'))
+    # batch downloads one item at a time
+    planner = BatchPlanner(args.output or settings.get('download_location'), args.quality,
+                           audio_only=bool(args.audio), workers=1)
+    plan = planner.plan(items, [infos.get(item['url']) for item in items])
+    emit({'event': 'plan', **plan})
+    
+    for entry in plan['deferred'] + plan['refused']:
+        reason = {
+            'space': 'Deferred: does not fit in the free space after the rest of the batch',
+            'too_large': 'Refused: larger than the free space',
+            'unavailable': 'Refused: could not be loaded',
+        }[entry['reason']]
+        emit({'event': 'result', 'url': entry['url'], 'success': False, 'error': reason})
+    
+    return plan
+
+
+def cmd_import(args: argparse.Namespace, settings: SettingsManager) -> int:
+    """Stream a txt/CSV/JSONL URL list into the job queue and wait for the downloads"""
+    from utils.bulk_import import BulkImporter
+    from utils.jobs import JobManager
+    
+    workers = args.workers or settings.get('concurrent_downloads', 3)
+    job_manager = JobManager(args.output or settings.get('download_location'), max_workers=workers)
+    failures = 0
+    cancelled = 0
+    
+    def on_event(message: Dict):
+        nonlocal failures
+        if message['event'] == 'status' and 'result' in message:
+            job = job_manager.get(message['job_id'])
+            emit({'event': 'result', 'url': job.url if job else None, **message['result']})
+            failures += 0 if message['result'].get('success') else 1
+        elif message['event'] == 'progress' and args.progress:
+            emit(message)
+    
+    job_manager.add_listener(on_event)
+    importer = BulkImporter(BulkImporter.load_archive(args.archive or settings.get('download_archive')))
+    options = build_download_options(settings, args)
+    options['quality'] = args.quality
+    format_spec = 'bestaudio' if args.audio else args.format
+    
+    try:
+        stats = importer.feed(
+            args.source, job_manager, format_spec, options, fmt=args.input_format,
+            max_pending=workers * 2,
+            progress_callback=lambda stats: emit({'event': 'import', **stats})
+        )
+        for job in job_manager.list_jobs():
+            if job.future:
+                try:
+                    job.future.result()
+                except CancelledError:
+                    # Cancelled before it started, so no result event was sent
+                    cancelled += 1
+                    emit({'event': 'result', 'url': job.url, 'success': False, 'error': 'Download cancelled'})
+    except (OSError, ValueError) as e:
+        emit({'event': 'import', 'success': False, 'error': str(e)})
+        return 1
+    finally:
+        job_manager.shutdown()
+    
+    emit({'event': 'import_done', **stats, 'cancelled': cancelled})
+    return 1 if failures or cancelled else 0
+
+
+def cmd_subscribe(args: argparse.Namespace, settings: SettingsManager) -> int:
+    """Manage subscriptions and download their new uploads"""
+    from utils.subscriptions import SubscriptionManager
+    
+    manager = SubscriptionManager(args.store)
+    
+    if args.action == 'add':
+        if not args.target:
+            emit({'event': 'subscription', 'success': False, 'error': 'A channel or playlist URL is required'})
+            return 2
+        interval = (args.interval or settings.get('subscription_interval_minutes', 60)) * 60
+        result = manager.add(args.target, interval=interval, backfill=args.backfill)
+        emit({'event': 'subscription', **result})
+        return 0 if result['success'] else 1
+    
+    if args.action == 'remove':
+        removed = manager.remove(args.target or '')
+        emit({'event': 'subscription', 'success': removed, 'key': args.target})
+        return 0 if removed else 1
+    
+    if args.action == 'list':
+        for subscription in manager.list_subscriptions():
+            emit({'event': 'subscription', **subscription})
+        return 0
+    
+    extractor = VideoInfoExtractor()
+    failures = 0
+    
+    def sync(keys: list):
+        nonlocal failures
+        for key in keys:
+            result = manager.sync(key)
+            emit({'event': 'sync', **result})
+            if not result['success']:
+                failures += 1
+                continue
+            if args.download:
+                for url in result['new']:
+                    download = download_one(url, args, settings, extractor)
+                    emit({'event': 'result', 'url': url, **download})
+                    failures += 0 if download.get('success') else 1
+    
+    if args.action == 'sync':
+        sync([args.target] if args.target else [sub['key'] for sub in manager.list_subscriptions()])
+        return 1 if failures else 0
+    
+    # watch: poll due subscriptions until interrupted
+    try:
+        while True:
+            sync(manager.due())
+            time.sleep(SubscriptionManager.CHECK_INTERVAL)
+    except KeyboardInterrupt:
+        return 0
+
+
+def cmd_library(args: argparse.Namespace, settings: SettingsManager) -> int:
+    """Search or reconcile the local media library"""
+    from utils.library import MediaLibrary
+    
+    library = MediaLibrary(args.db) if args.db else MediaLibrary.shared()
+    
+    if args.action == 'reconcile':
+        emit({'event': 'reconcile', **library.reconcile(args.path or settings.get('download_location'))})
+        return 0
+    
+    if args.action == 'stats':
+        emit({'event': 'library', **library.stats()})
+        return 0
+    
+    if args.action == 'duplicates':
+        for group in library.duplicates():
+            emit({'event': 'duplicate', **group})
+        return 0
+    
+    items = library.search(
+        args.query, uploader=args.uploader, min_height=args.min_height,
+        date_from=args.since, date_to=args.until, order=args.order, limit=args.limit
+    )
+    for item in items:
+        emit({'event': 'item', **item})
+    return 0
+
+
+def cmd_verify(args: argparse.Namespace, settings: SettingsManager) -> int:
+    """Re-hash files and compare them with the digests recorded at download time"""
+    from utils.integrity import IntegrityChecker
+    from utils.library import MediaLibrary
+    
+    library = MediaLibrary(args.db) if args.db else MediaLibrary.shared()
+    
+    if args.files:
+        known = {item['filepath']: item['digest'] for item in library.with_digests()}
+        items = [(path, args.expect or known.get(os.path.abspath(path))) for path in args.files]
+    else:
+        items = [(item['filepath'], item['digest']) for item in library.with_digests(args.path)]
+    
+    summary = {'checked': 0, 'ok': 0, 'mismatch': 0, 'unrecorded': 0, 'errors': 0}
+    for result in IntegrityChecker.verify_many(items, args.workers):
+        summary['checked'] += 1
+        if result.get('error'):
+            summary['errors'] += 1
+        elif result['ok'] is None:
+            summary['unrecorded'] += 1
+            if args.record:
+                library.set_digest(result['path'], result['digest'])
+        else:
+            summary['ok' if result['ok'] else 'mismatch'] += 1
+        emit({'event': 'verify', **result})
+    
+    emit({'event': 'verify_summary', **summary})
+    return 1 if summary['mismatch'] or summary['errors'] else 0
+
+
+def cmd_gc(args: argparse.Namespace, settings: SettingsManager) -> int:
+    """Expire old history and remove orphaned intermediate files once"""
+    from utils.retention import RetentionManager
+    
+    library = None
+    if settings.get('add_to_library'):
+        from utils.library import MediaLibrary
+        library = MediaLibrary.shared()
+    
+    gc = RetentionManager(
+        args.path,
+        settings.get('keep_history_days', 30) if args.days is None else args.days,
+        library=library,
+        grace_seconds=int(args.grace * 3600) if args.grace is not None else RetentionManager.GRACE_SECONDS
+    )
+    emit({'event': 'gc', 'dry_run': args.dry_run, **gc.collect(dry_run=args.dry_run)})
+    return 0
+
+
+def cmd_playlist(args: argparse.Namespace, settings: SettingsManager) -> int:
+    """List (and optionally download) the videos of a playlist"""
+    urls, playlist_info = PlaylistExtractor.extract_playlist_urls(args.url)
+    if not urls:
+        emit({'event': 'playlist', 'success': False, 'url': args.url, 'error': 'No videos found'})
+        return 1
+    
+    emit({'event': 'playlist', 'success': True, 'url': args.url, **playlist_info})
+    
+    if not args.download:
+        for url in urls:
+            emit({'event': 'entry', 'url': url})
+        return 0
+    
+    extractor = VideoInfoExtractor()
+    failures = 0
+    for url in urls:
+        result = download_one(url, args, settings, extractor)
+        emit({'event': 'result', 'url': url, **result})
+        failures += 0 if result.get('success') else 1
+    
+    return 1 if failures else 0
+
+
+def cmd_serve(args: argparse.Namespace, settings: SettingsManager) -> int:
+    """Run the local HTTP job API until interrupted"""
+    import asyncio
+    from utils.api_server import JobAPIServer
+    from utils.engine import get_engine
+    from utils.player_cache import PlayerCache
+    
+    adaptive = args.adaptive or settings.get('adaptive_concurrency')
+    engine = get_engine(
+        args.output or settings.get('download_location'),
+        max_workers=args.workers or settings.get('concurrent_downloads', 3),
+        prefetch_results=settings.get('prefetch_results', 3),
+        max_adaptive_workers=settings.get('max_concurrent_downloads', 8) if adaptive else 0
+    )
+    token = args.token or os.environ.get('CONVERSO_API_TOKEN')
+    if not token and args.host not in JobAPIServer.LOCAL_HOSTS:
+        # Reachable from other machines: never without a token
+        token = secrets.token_urlsafe(24)
+    server = JobAPIServer(engine.jobs, args.host, args.port, token)
+    PlayerCache.warm_up()
+    engine.start_retention(settings.get('keep_history_days', 30))
+    emit({'event': 'serving', 'host': args.host, 'port': args.port, 'token': token})
+    
+    try:
+        asyncio.run(server.serve_forever())
+    finally:
+        engine.shutdown()
+    return 0
+
+
+def add_download_arguments(parser: argparse.ArgumentParser):
+    """Flags shared by every command that downloads"""
+    parser.add_argument('-q', '--quality', default=None, choices=['best', 'high', 'medium', 'low'],
+                        help='Video quality (default: quality_preference setting)')
+    parser.add_argument('-f', '--format', help='Explicit yt-dlp format spec, e.g. 137+140')
+    parser.add_argument('--audio', choices=['mp3', 'm4a', 'opus'], help='Extract audio only in this format')
+    parser.add_argument('-o', '--output', help='Output directory (default: download_location setting)')
+    parser.add_argument('--scratch-dir',
+                        help='Download into this (fast, local) directory and move finished files to the output')
+    parser.add_argument('--frame-accurate', action='store_true',
+                        help='Re-encode clip boundaries for frame-exact cuts')
+    parser.add_argument('--progress', action='store_true', help='Emit progress records as JSON Lines')
+    parser.add_argument('--trace', action='store_true',
+                        help='Write a Chrome trace of each job phase to ~/.converso/traces')
+    parser.add_argument('--profile', choices=['cprofile', 'sample'],
+                        help='Profile each job (cProfile .prof or sampled .folded stacks)')
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser"""
+    parser = argparse.ArgumentParser(
+        prog='converso',
+        description=f"{__app_name__} v{__version__} - headless command line interface"
+    )
+    parser.add_argument('--version', action='version', version=f"{__app_name__} v{__version__}")
+    parser.add_argument('--settings', help='Path to settings.json (default: ~/.converso/settings.json)')
+    
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    info = subparsers.add_parser('info', help='Show video metadata')
+    info.add_argument('url')
+    info.add_argument('--formats', action='store_true', help='Include the full formats list')
+    info.add_argument('--extract-profile', default='card', choices=list(VideoInfoExtractor.PROFILES),
+                      help='Extraction profile: card (metadata only), audio or full (default: card)')
+    info.set_defaults(handler=cmd_info)
+    
+    search = subparsers.add_parser('search', help='Search YouTube')
+    search.add_argument('query')
+    search.add_argument('-n', '--max-results', type=int, default=8)
+    search.set_defaults(handler=cmd_search)
+    
+    download = subparsers.add_parser('download', help='Download a video')
+    download.add_argument('url')
+    download.add_argument('--start', help='Clip start, e.g. 1:30')
+    download.add_argument('--end', help='Clip end, e.g. 2:45')
+    download.add_argument('--chapter', help='Download only the chapter with this title')
+    add_download_arguments(download)
+    download.set_defaults(handler=cmd_download)
+    
+    batch = subparsers.add_parser('batch', help='Download URLs listed in a file, one per line')
+    batch.add_argument('source', help="File with 'URL [start-end]' lines, or - for stdin")
+    batch.add_argument('--plan', action='store_true',
+                       help='Read the whole list first, predict size and time, and download shortest first '
+                            'within the free space')
+    batch.add_argument('--dry-run', action='store_true', help='Only print the plan')
+    add_download_arguments(batch)
+    batch.set_defaults(handler=cmd_batch)
+    
+    bulk = subparsers.add_parser('import', help='Queue a large txt/CSV/JSONL URL list, deduplicated, as it is read')
+    bulk.add_argument('source', help='URL list file, or - for stdin')
+    bulk.add_argument('--input-format', choices=['txt', 'csv', 'jsonl'],
+                      help='File format (default: from the file extension)')
+    bulk.add_argument('--archive', help='yt-dlp download archive; listed videos are skipped')
+    bulk.add_argument('--workers', type=int, help='Parallel downloads (default: concurrent_downloads setting)')
+    add_download_arguments(bulk)
+    bulk.set_defaults(handler=cmd_import)
+    
+    subscribe = subparsers.add_parser('subscribe', help='Follow channels/playlists and fetch only new uploads')
+    subscribe.add_argument('action', choices=['add', 'remove', 'list', 'sync', 'watch'],
+                           help='watch keeps running and syncs each subscription on its interval')
+    subscribe.add_argument('target', nargs='?', help='URL for add; subscription key for remove/sync')
+    subscribe.add_argument('--interval', type=int,
+                           help='Minutes between syncs (default: subscription_interval_minutes setting)')
+    subscribe.add_argument('--backfill', type=int, default=0,
+                           help='Existing videos the first sync returns (default: 0, only new uploads)')
+    subscribe.add_argument('--download', action='store_true', help='Download new uploads after each sync')
+    subscribe.add_argument('--store', help='Subscription file (default: ~/.converso/subscriptions.json)')
+    add_download_arguments(subscribe)
+    subscribe.set_defaults(handler=cmd_subscribe)
+    
+    library = subparsers.add_parser('library', help='Search the local media library')
+    library.add_argument('action', choices=['search', 'reconcile', 'stats', 'duplicates'])
+    library.add_argument('query', nargs='?', help='Words to match in title, uploader, tags and description')
+    library.add_argument('--uploader', help='Only items from this uploader')
+    library.add_argument('--min-height', type=int, help='Only items at least this tall, e.g. 1080')
+    library.add_argument('--since', help='Uploaded on or after YYYY-MM-DD')
+    library.add_argument('--until', help='Uploaded on or before YYYY-MM-DD')
+    library.add_argument('--order', default='relevance', choices=['relevance', 'newest', 'added', 'title'])
+    library.add_argument('-n', '--limit', type=int, default=50)
+    library.add_argument('--path', help='Folder to reconcile (default: download_location setting)')
+    library.add_argument('--db', help='Library database (default: ~/.converso/library.db)')
+    library.set_defaults(handler=cmd_library)
+    
+    gc = subparsers.add_parser('gc', help='Remove orphaned .part/.ytdl files and expire old history')
+    gc.add_argument('--path', help='Only clean downloads in this folder (default: every folder Converso downloaded to)')
+    gc.add_argument('--days', type=int, help='Retention window (default: keep_history_days setting)')
+    gc.add_argument('--grace', type=float,
+                    help='Hours an intermediate file must be untouched before it counts as orphaned (default: 6)')
+    gc.add_argument('--dry-run', action='store_true', help='Only report what would be reclaimed')
+    gc.set_defaults(handler=cmd_gc)
+    
+    verify = subparsers.add_parser('verify', help='Check files against the digests recorded at download time')
+    verify.add_argument('files', nargs='*', help='Files to check (default: every library item with a digest)')
+    verify.add_argument('--expect', help='Digest to compare the given files with, e.g. sha256:...')
+    verify.add_argument('--path', help='Only library items under this folder')
+    verify.add_argument('--record', action='store_true', help='Store digests for library files that have none')
+    verify.add_argument('-j', '--workers', type=int, default=4, help='Files hashed in parallel')
+    verify.add_argument('--db', help='Library database (default: ~/.converso/library.db)')
+    verify.set_defaults(handler=cmd_verify)
+    
+    playlist = subparsers.add_parser('playlist', help='List or download a playlist')
+    playlist.add_argument('url')
+    playlist.add_argument('--download', action='store_true', help='Download every video')
+    add_download_arguments(playlist)
+    playlist.set_defaults(handler=cmd_playlist)
+    
+    serve = subparsers.add_parser('serve', help='Run the local HTTP job API')
+    serve.add_argument('--host', default='127.0.0.1', help='Interface to bind (default: 127.0.0.1)')
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--token', help='Require "Authorization: Bearer TOKEN" (default: $CONVERSO_API_TOKEN; '
+                                       'generated when --host is not a loopback address)')
+    serve.add_argument('--workers', type=int, help='Parallel downloads (default: concurrent_downloads setting)')
+    serve.add_argument('--adaptive', action='store_true',
+                       help='Adapt parallel downloads to throughput and throttling, up to max_concurrent_downloads')
+    serve.add_argument('-o', '--output', help='Output directory (default: download_location setting)')
+    serve.set_defaults(handler=cmd_serve)
+    
+    return parser
+
+
+def main(argv: Optional[list] = None) -> int:
+    """Command line entry point"""
+    args = build_parser().parse_args(argv)
+    settings = SettingsManager(args.settings)
+    
+    # Keep stdout clean for JSON: route library prints and yt-dlp output to stderr
+    sys.stdout = sys.stderr
+    
+    if getattr(args, 'quality', 'unset') is None:
+        args.quality = settings.get('quality_preference', 'best')
+    
+    try:
+        return args.handler(args, settings)
+    except KeyboardInterrupt:
+        return 130
+
+
+if __name__ == '__main__':
+    sys.exit(main())
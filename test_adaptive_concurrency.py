@@ -0,0 +1,278 @@
+"""
+Adaptive Concurrency Test Script
+Drives the AIMD download limit against a throttling host: first the policy
+alone on a simulated clock, then real downloads from a local server that
+caps bandwidth and answers 429 above a connection limit
+
+Usage: python test_adaptive_concurrency.py [--jobs N] [--policy-only]
+"""
+
+import argparse
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Host model shared by the simulation and the local server
+PER_CONNECTION = 400_000   # bytes/s one connection can get
+TOTAL = 2_000_000          # bytes/s for all connections together
+MAX_CONNECTIONS = 7        # more concurrent requests are answered with 429
+FILE_SIZE = 3_000_000
+
+
+class ThrottlingServer:
+    """Local HTTP server serving FILE_SIZE files under the host model above"""
+    
+    def __init__(self, max_connections: int = MAX_CONNECTIONS):
+        self.max_connections = max_connections
+        self.active = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._tokens = 0.0
+        self._refilled = time.monotonic()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+    
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+    
+    def start(self):
+        self._thread.start()
+    
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+    
+    def _take(self, n: int):
+        """Wait for n bytes of the shared bandwidth"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(TOTAL, self._tokens + (now - self._refilled) * TOTAL)
+                self._refilled = now
+                if self._tokens >= n:
+                    self._tokens -= n
+                    return
+            time.sleep(0.005)
+    
+    def _handler(self):
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.0'
+            
+            def log_message(self, *args):
+                pass
+            
+            def _headers(self):
+                self.send_response(200)
+                self.send_header('Content-Type', 'video/mp4')
+                self.send_header('Content-Length', str(FILE_SIZE))
+                self.end_headers()
+            
+            def do_HEAD(self):
+                self._headers()
+            
+            def do_GET(self):
+                with server._lock:
+                    if server.active >= server.max_connections:
+                        server.rejected += 1
+                        self.send_response(429)
+                        self.end_headers()
+                        return
+                    server.active += 1
+                try:
+                    self._headers()
+                    sent = 0
+                    while sent < FILE_SIZE:
+                        n = min(16384, FILE_SIZE - sent)
+                        server._take(n)
+                        self.wfile.write(b'\0' * n)
+                        sent += n
+                        time.sleep(n / PER_CONNECTION)
+                except OSError:
+                    pass
+                finally:
+                    with server._lock:
+                        server.active -= 1
+        
+        return Handler
+
+
+def simulate(max_connections: int, intervals: int = 60):
+    """Run the policy against the host model on a fake clock; returns (controller, limits)"""
+    from utils.concurrency import ConcurrencyController
+    
+    now = [0.0]
+    controller = ConcurrencyController(1, 10, initial=2, interval=1.0, clock=lambda: now[0])
+    running = []
+    limits = []
+    
+    for _ in range(intervals):
+        # A long queue: every free slot is taken at once
+        while controller.acquire(timeout=0):
+            running.append(f"job-{len(running)}")
+        
+        throttled = max(0, len(running) - max_connections)
+        served = running[:len(running) - throttled]
+        rate = min(len(served) * PER_CONNECTION, TOTAL)
+        
+        now[0] += controller.interval
+        for job_id in served:
+            controller.record_progress(job_id, int(rate / len(served)), rate / len(served))
+        for job_id in running[len(served):]:
+            controller.record_error('http_429')
+            controller.release(job_id)
+        running = served
+        controller.maybe_adjust()
+        
+        # Limit lowered below the running count: a job finishes before the next one starts
+        while len(running) > controller.limit:
+            controller.release(running.pop())
+        limits.append(controller.limit)
+    
+    return controller, limits
+
+
+def check_policy_bandwidth_bound():
+    """Without 429s the limit should stop growing once aggregate throughput stops"""
+    print("=" * 60)
+    print("Testing Policy: Bandwidth-Bound Host")
+    print("=" * 60)
+    
+    controller, limits = simulate(max_connections=100)
+    saturating = TOTAL // PER_CONNECTION
+    settled = limits[len(limits) // 2:]
+    print(f"Limits: {' '.join(map(str, limits))}")
+    print(f"Reasons: {dict(Counter(d['reason'] for d in controller.decisions))}")
+    
+    if max(settled) > saturating + 1:
+        print(f"❌ Limit kept growing past {saturating} connections that already saturate the host")
+        return False
+    if min(settled) < saturating - 1:
+        print(f"❌ Limit settled at {min(settled)}, below the {saturating} connections the host can serve")
+        return False
+    print(f"✅ Settled around {saturating} connections")
+    return True
+
+
+def check_policy_throttling_host():
+    """A host answering 429 above MAX_CONNECTIONS should push the limit below it"""
+    print("\n" + "=" * 60)
+    print("Testing Policy: Throttling Host")
+    print("=" * 60)
+    
+    controller, limits = simulate(max_connections=3)
+    reasons = Counter(d['reason'] for d in controller.decisions)
+    settled = limits[len(limits) // 2:]
+    print(f"Limits: {' '.join(map(str, limits))}")
+    print(f"Reasons: {dict(reasons)}")
+    
+    if not reasons['throttled']:
+        print("❌ Throttling never lowered the limit")
+        return False
+    over = sum(1 for limit in settled if limit > 3)
+    if over > len(settled) // 4:
+        print(f"❌ Limit above the host's 3 connections in {over} of the last {len(settled)} intervals")
+        return False
+    print("✅ Backed off and stayed at or below the host's connection limit")
+    return True
+
+
+def run_downloads(server: ThrottlingServer, jobs: int):
+    """Download jobs files through the JobManager; returns (finished, failed, seconds, controller)"""
+    from utils.concurrency import ConcurrencyController
+    from utils.jobs import JobManager
+    
+    controller = ConcurrencyController(1, 10, initial=2, interval=2.0)
+    with tempfile.TemporaryDirectory(prefix='converso_concurrency_') as output:
+        manager = JobManager(output, controller=controller)
+        started = time.time()
+        submitted = [manager.submit(f"{server.url}/f{i}.mp4", 'best') for i in range(jobs)]
+        while any(job.is_active for job in submitted):
+            time.sleep(0.5)
+        elapsed = time.time() - started
+        manager.shutdown()
+    
+    finished = sum(1 for job in submitted if job.status == 'finished')
+    failed = sum(1 for job in submitted if job.status == 'failed')
+    return finished, failed, elapsed, controller
+
+
+def check_downloads_throttling_server(jobs: int):
+    """Real downloads from a server that 429s above MAX_CONNECTIONS"""
+    print("\n" + "=" * 60)
+    print(f"Testing Downloads: {jobs} Jobs, 429 Above {MAX_CONNECTIONS} Connections")
+    print("=" * 60)
+    
+    server = ThrottlingServer(MAX_CONNECTIONS)
+    server.start()
+    try:
+        finished, failed, elapsed, controller = run_downloads(server, jobs)
+    finally:
+        server.stop()
+    
+    ideal = jobs * FILE_SIZE / TOTAL
+    print(f"Finished: {finished}, failed: {failed}, rejected requests: {server.rejected}")
+    print(f"Elapsed: {elapsed:.1f}s (bandwidth bound: {ideal:.1f}s)")
+    print(f"Limits: {' '.join(str(d['limit']) for d in controller.decisions)}")
+    
+    if failed > jobs // 10:
+        print(f"❌ {failed} of {jobs} downloads failed")
+        return False
+    if elapsed > ideal * 2:
+        print("❌ Took more than twice the bandwidth-bound time")
+        return False
+    print("✅ Throttling kept the failure rate under 10% near full bandwidth")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=50, help='Downloads in the live test (default: 50)')
+    parser.add_argument('--policy-only', action='store_true', help='Skip the live download test')
+    args = parser.parse_args()
+    
+    print("\n" + "=" * 60)
+    print("CONVERSO DOWNLOADER - ADAPTIVE CONCURRENCY TEST")
+    print("=" * 60 + "\n")
+    
+    tests = [
+        ("Policy: Bandwidth-Bound Host", check_policy_bandwidth_bound),
+        ("Policy: Throttling Host", check_policy_throttling_host),
+    ]
+    if not args.policy_only:
+        tests.append(("Downloads: Throttling Server", lambda: check_downloads_throttling_server(args.jobs)))
+    
+    results = []
+    for name, test_func in tests:
+        try:
+            result = test_func()
+            results.append((name, result))
+        except Exception as e:
+            print(f"\n❌ {name} test failed with exception: {e}")
+            results.append((name, False))
+    
+    # Summary
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    
+    passed = sum(1 for _, result in results if result)
+    total = len(results)
+    
+    for name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{status} - {name}")
+    
+    print("\n" + "=" * 60)
+    print(f"Results: {passed}/{total} tests passed")
+    print("=" * 60)
+    
+    return 0 if passed == total else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
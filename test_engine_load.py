@@ -0,0 +1,284 @@
+"""
+Engine Load Test Script
+Simulates many browser sessions (search, open a video card, download) twice:
+once with per-session objects as the app used to build them, once on the
+shared engine, and compares extractions, threads and memory. yt-dlp's
+network calls are replaced by a fixed-latency fake, so this runs offline.
+
+Usage: python test_engine_load.py [--sessions N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from unittest import mock
+
+import yt_dlp
+
+VIDEO_IDS = [f"dQw4w9WgXc{c}" for c in 'ABCDEFGHIJ']
+QUERIES = ['lofi', 'jazz', 'news']
+EXTRACT_SECONDS = 0.05
+DOWNLOAD_SECONDS = 0.2
+
+
+class FakeYouTube:
+    """Stands in for YoutubeDL.extract_info and counts the calls that would hit the network"""
+    
+    def __init__(self):
+        self.extractions = 0
+        self.transfers = 0
+        self._lock = threading.Lock()
+    
+    def extract_info(self, ydl, url, download=True, process=True, **kwargs):
+        if url.startswith('ytsearch'):
+            entries = [{'id': vid, 'title': vid, 'url': f"https://www.youtube.com/watch?v={vid}"} for vid in VIDEO_IDS[:8]]
+            return {'_type': 'playlist', 'entries': iter(entries)}
+        
+        time.sleep(EXTRACT_SECONDS)
+        vid = url.split('v=')[-1][-11:] if 'v=' in url else url[-11:]
+        if not download:
+            with self._lock:
+                self.extractions += 1
+            return {
+                'id': vid, 'title': vid, 'duration': 10, 'webpage_url': url,
+                'formats': [{'format_id': '18', 'ext': 'mp4', 'height': 360, 'vcodec': 'avc1', 'acodec': 'mp4a'}],
+            }
+        
+        with self._lock:
+            self.transfers += 1
+        time.sleep(DOWNLOAD_SECONDS)
+        folder = os.path.dirname(ydl.params['outtmpl']['default'])
+        with open(os.path.join(folder, f"{vid}.mp4"), 'wb') as f:
+            f.write(b'\0')
+        return {'id': vid, 'title': vid, 'ext': 'mp4'}
+
+
+def simulate(sessions: int, output: str, engine=None) -> dict:
+    """Run the sessions concurrently; without an engine each builds its own objects"""
+    from utils.downloader import VideoInfoExtractor
+    from utils.jobs import JobManager
+    from utils.prefetch import MetadataPrefetcher
+    from utils.youtube_search import YouTubeSearcher
+    
+    fake = FakeYouTube()
+    owned = []
+    peak_threads = [threading.active_count()]
+    stop = threading.Event()
+    
+    def watch_threads():
+        while not stop.is_set():
+            peak_threads[0] = max(peak_threads[0], threading.active_count())
+            time.sleep(0.01)
+    
+    def session(i: int):
+        rnd = random.Random(i)
+        if engine:
+            view = engine.session()
+            extractor, searcher = view.extractor, view.searcher
+        else:
+            extractor, searcher = VideoInfoExtractor(), YouTubeSearcher()
+            prefetcher = MetadataPrefetcher(extractor)
+            jobs = JobManager(output, 3, extractor)
+            owned.append((prefetcher, jobs))
+        
+        results = list(searcher.iter_search(rnd.choice(QUERIES)))
+        url = f"https://youtu.be/{rnd.choice(VIDEO_IDS[:4])}"
+        if engine:
+            view.prefetch(results)
+            view.extractor.extract_info(url)
+            view.wait(view.submit(url, '18', {}))
+        else:
+            prefetcher.prefetch(results)
+            extractor.extract_info(url)
+            job = jobs.submit(url, '18', {})
+            while job.is_active:
+                time.sleep(0.05)
+    
+    def fake_extract_info(ydl, url, *args, **kwargs):
+        return fake.extract_info(ydl, url, *args, **kwargs)
+    
+    with mock.patch.object(yt_dlp.YoutubeDL, 'extract_info', fake_extract_info):
+        watcher = threading.Thread(target=watch_threads, daemon=True)
+        watcher.start()
+        baseline_threads = threading.active_count()
+        tracemalloc.start()
+        started = time.perf_counter()
+        
+        threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        elapsed = time.perf_counter() - started
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        stop.set()
+    
+    for prefetcher, jobs in owned:
+        prefetcher.shutdown()
+        jobs.shutdown()
+    
+    return {
+        'seconds': elapsed,
+        'extractions': fake.extractions,
+        'transfers': fake.transfers,
+        # Minus the session threads themselves, which stand in for Streamlit's script threads
+        'extra_threads': max(0, peak_threads[0] - baseline_threads - sessions),
+        'peak_memory_mb': peak_memory / 1e6,
+    }
+
+
+def print_result(mode: str, result: dict):
+    print(f"{mode}: {result['seconds']:.1f}s, {result['extractions']} extractions, "
+          f"{result['transfers']} transfers, {result['extra_threads']} extra threads, "
+          f"{result['peak_memory_mb']:.1f} MB peak traced memory")
+
+
+def check_shared_engine(sessions: int):
+    """The shared engine should do less work than per-session objects and stay bounded"""
+    from utils.engine import ConversoEngine
+    
+    print("=" * 60)
+    print(f"Testing {sessions} Sessions: Per-Session Objects vs Shared Engine")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory(prefix='converso_load_') as output:
+        per_session = simulate(sessions, output)
+        print_result("Per-session", per_session)
+        
+        engine = ConversoEngine(output, max_workers=3)
+        try:
+            shared = simulate(sessions, output, engine)
+            print_result("Shared engine", shared)
+        finally:
+            engine.shutdown()
+    
+    ok = True
+    if shared['extractions'] >= per_session['extractions']:
+        print("❌ The shared engine did not reduce extractions")
+        ok = False
+    bound = engine.prefetcher.MAX_WORKERS + engine.max_workers + 10
+    if shared['extra_threads'] > bound:
+        print(f"❌ {shared['extra_threads']} extra threads; the engine's pools allow about {bound}")
+        ok = False
+    if ok:
+        print("✅ Work and threads scale with jobs in flight, not with sessions")
+    return ok
+
+
+def check_idle_sessions_expire(sessions: int):
+    """Views of sessions that stopped polling should be closed with their prefetch pages"""
+    from utils.engine import ConversoEngine
+    
+    print("\n" + "=" * 60)
+    print("Testing Idle Session Expiry")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory(prefix='converso_load_') as output:
+        engine = ConversoEngine(output, max_workers=3)
+        try:
+            results = [{'url': f"https://www.youtube.com/watch?v={vid}"} for vid in VIDEO_IDS]
+            with mock.patch.object(engine.prefetcher, '_run'):
+                for _ in range(sessions):
+                    engine.session().prefetch(results)
+            active = engine.session()
+            before = (engine.stats()['sessions'], len(engine.prefetcher._pages))
+            
+            expired = engine.expire_sessions(time.time() + engine.SESSION_TTL + 1)
+            engine.session(active.owner)
+            after = (engine.stats()['sessions'], len(engine.prefetcher._pages))
+        finally:
+            engine.shutdown()
+    
+    print(f"Before expiry: {before[0]} sessions, {before[1]} prefetch pages")
+    print(f"After expiry: {after[0]} sessions, {after[1]} prefetch pages ({expired} expired)")
+    if after != (1, 0):
+        print("❌ Idle sessions were not released")
+        return False
+    print("✅ Idle sessions released; a returning session gets its view back")
+    return True
+
+
+def check_jobs_gauge():
+    """The converso_jobs gauge should count the jobs of every JobManager"""
+    from utils.jobs import JobManager
+    from utils.metrics import JOBS
+    
+    print("\n" + "=" * 60)
+    print("Testing Jobs Gauge Across Managers")
+    print("=" * 60)
+    
+    def gauge_total():
+        return sum(value for _, _, value in JOBS.samples())
+    
+    before = gauge_total()
+    with tempfile.TemporaryDirectory(prefix='converso_load_') as output:
+        managers = [JobManager(output, 1), JobManager(output, 1)]
+        try:
+            with mock.patch.object(JobManager, '_run'):
+                for i, manager in enumerate(managers):
+                    for _ in range(i + 2):
+                        manager.submit('https://youtu.be/dQw4w9WgXcA', '18')
+            counted = gauge_total() - before
+        finally:
+            for manager in managers:
+                manager.shutdown()
+    
+    print(f"Gauge counts {counted} of 5 submitted jobs")
+    if counted != 5:
+        print("❌ Gauge does not cover every manager")
+        return False
+    print("✅ Gauge sums over all managers")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=200, help='Simulated sessions (default: 200)')
+    args = parser.parse_args()
+    
+    print("\n" + "=" * 60)
+    print("CONVERSO DOWNLOADER - ENGINE LOAD TEST")
+    print("=" * 60 + "\n")
+    
+    tests = [
+        ("Shared Engine", lambda: check_shared_engine(args.sessions)),
+        ("Idle Session Expiry", lambda: check_idle_sessions_expire(args.sessions)),
+        ("Jobs Gauge", check_jobs_gauge),
+    ]
+    
+    results = []
+    for name, test_func in tests:
+        try:
+            result = test_func()
+            results.append((name, result))
+        except Exception as e:
+            print(f"\n❌ {name} test failed with exception: {e}")
+            results.append((name, False))
+    
+    # Summary
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    
+    passed = sum(1 for _, result in results if result)
+    total = len(results)
+    
+    for name, result in results:
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{status} - {name}")
+    
+    print("\n" + "=" * 60)
+    print(f"Results: {passed}/{total} tests passed")
+    print("=" * 60)
+    
+    return 0 if passed == total else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
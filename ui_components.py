@@ -7,7 +7,7 @@ https://github.com/Converso-Empire
 """
 
 import streamlit as st
-from typing import Dict, List
+from typing import Dict, List, Optional
 from pathlib import Path
 import time
 
@@ -21,8 +21,13 @@ except ImportError:
 
 from utils.format_handler import FormatProcessor
 from utils.file_utils import FileManager
-from utils.downloader import VideoDownloader, PlaylistExtractor
-from utils.youtube_search import YouTubeSearcher
+from utils.bulk_import import BulkImporter
+from utils.downloader import VideoInfoExtractor, PlaylistExtractor
+from utils.engine import ConversoEngine, EngineSession, get_engine
+from utils.jobs import JobManager
+from utils.planner import BatchPlanner
+from utils.prefetch import MetadataPrefetcher
+from utils.validators import URLValidator
 from config.settings import SettingsManager
 
 
@@ -224,6 +229,57 @@ def render_header():
         """, unsafe_allow_html=True)
 
 
+@st.cache_resource(show_spinner=False)
+def load_engine() -> ConversoEngine:
+    """
+    Process-wide engine shared by every browser session: one metadata and
+    search cache, one prefetch pool and one download queue for all tabs
+    """
+    settings = SettingsManager()
+    return get_engine(
+        settings.get('download_location'),
+        max_workers=settings.get('concurrent_downloads', 3),
+        prefetch_results=settings.get('prefetch_results', MetadataPrefetcher.TOP_K),
+        max_adaptive_workers=settings.get('max_concurrent_downloads', 8) if settings.get('adaptive_concurrency') else 0
+    )
+
+
+def get_session() -> EngineSession:
+    """
+    This session's view of the engine (its own jobs and prefetches)
+    Looked up on every call, which keeps the view from expiring while the
+    tab is in use and brings it back under the same owner if it had
+    """
+    session = load_engine().session(st.session_state.get('engine_owner'))
+    st.session_state.engine_owner = session.owner
+    return session
+
+
+def get_extractor() -> VideoInfoExtractor:
+    """Shared extractor, so metadata cached by one session serves all of them"""
+    return load_engine().extractor
+
+
+def get_prefetcher() -> MetadataPrefetcher:
+    """Shared prefetcher that warms the extractor cache for top search results"""
+    return load_engine().prefetcher
+
+
+def get_job_manager() -> JobManager:
+    """Shared job queue; downloads keep running across reruns and closed tabs"""
+    return load_engine().jobs
+
+
+def run_download(url: str, format_spec: str, options: Dict, progress_callback=None) -> Dict:
+    """
+    Run a download in the engine's interactive lane and follow its progress
+    from this script run; it does not wait behind queued batch or import jobs
+    """
+    session = get_session()
+    job = session.submit(url, format_spec, options, interactive=True)
+    return session.wait(job, progress_callback)
+
+
 def render_url_input() -> str:
     """Render URL/Search input section with real-time YouTube search"""
     st.markdown("<br>", unsafe_allow_html=True)
@@ -267,6 +323,7 @@ def render_url_input() -> str:
                 if st.button("🔍 New Search", width='stretch', key="new_search_top"):
                     # Clear selection to start new search
                     st.session_state.selected_video_url = None
+                    st.session_state.selected_video = None
                     st.session_state.current_input = ''
                     st.session_state.hide_search = False
                     st.rerun()
@@ -274,11 +331,8 @@ def render_url_input() -> str:
             # Skip rest of the function - no search UI needed
             return st.session_state.get('selected_video_url', '')
         
-        # Initialize searcher
-        if 'youtube_searcher' not in st.session_state:
-            st.session_state.youtube_searcher = YouTubeSearcher()
-        
-        searcher = st.session_state.youtube_searcher
+        # Shared searcher - identical queries from other sessions hit its cache
+        searcher = load_engine().searcher
         
         # Check if we should show search results or hide them
         show_search_results = True
@@ -295,6 +349,7 @@ def render_url_input() -> str:
                 if st.button("🔍 New Search", width='stretch'):
                     # Clear selection to start new search
                     st.session_state.selected_video_url = None
+                    st.session_state.selected_video = None
                     st.session_state.current_input = ''
                     st.session_state.hide_search = False
                     st.rerun()
@@ -307,79 +362,44 @@ def render_url_input() -> str:
             if parsed['type'] == 'url':
                 st.success("✅ YouTube URL detected")
                 selected_url = user_input
-                
+            
             elif parsed['type'] == 'video_id':
                 st.success(f"✅ Video ID detected: {parsed['value']}")
                 selected_url = parsed['url']
-                
+            
             elif parsed['type'] == 'search_query':
                 st.info(f"🔍 Searching YouTube for: '{parsed['value']}'")
                 
-                # Perform search with progress
-                with st.spinner("Searching..."):
-                    search_results = searcher.search(parsed['value'], max_results=8)
+                # Rows are drawn as yt-dlp parses them instead of after the whole page
+                header = st.empty()
+                status = st.empty()
+                status.markdown("<p style='color: #94a3b8; font-size: 0.85rem; margin-bottom: 1rem;'>Searching...</p>", unsafe_allow_html=True)
                 
-                if search_results:
-                    st.markdown("### 📺 Search Results")
-                    st.markdown(f"<p style='color: #94a3b8; font-size: 0.85rem; margin-bottom: 1rem;'>Found {len(search_results)} videos - Click ✓ Select to choose</p>", unsafe_allow_html=True)
-                    
-                    # Display search results with enhanced styling
-                    for idx, video in enumerate(search_results):
-                        # Each result in a clean container
-                        col_thumb, col_info, col_btn = st.columns([1, 4, 1])
-                        
-                        with col_thumb:
-                            thumbnail_url = video.get('thumbnail', '')
-                            if thumbnail_url and thumbnail_url.strip():
-                                try:
-                                    st.image(thumbnail_url, width='stretch')
-                                except Exception:
-                                    # Fallback placeholder
-                                    st.markdown("""
-                                        <div style="width: 100%; aspect-ratio: 16/9; background: #1e293b; 
-                                        display: flex; align-items: center; justify-content: center; 
-                                        border-radius: 6px; border: 1px solid #334155;">
-                                            <span style="font-size: 2rem;">🎬</span>
-                                        </div>
-                                    """, unsafe_allow_html=True)
-                            else:
-                                # No thumbnail available
-                                st.markdown("""
-                                    <div style="width: 100%; aspect-ratio: 16/9; background: #1e293b; 
-                                    display: flex; align-items: center; justify-content: center; 
-                                    border-radius: 6px; border: 1px solid #334155;">
-                                        <span style="font-size: 2rem;">🎬</span>
-                                    </div>
-                                """, unsafe_allow_html=True)
-                        
-                        with col_info:
-                            st.markdown(f"**{video['title']}**")
-                            duration = int(video.get('duration', 0)) if video.get('duration') else 0
-                            duration_str = f"{duration // 60}:{duration % 60:02d}" if duration else 'N/A'
-                            st.markdown(f"<small style='color: #94a3b8;'>{video.get('uploader', 'Unknown')} • {duration_str} • {video.get('view_count', 0):,} views</small>", unsafe_allow_html=True)
-                        
-                        with col_btn:
-                            # Use unique key with video ID to ensure correct selection
-                            video_id = video.get('id', f'unknown_{idx}')
-                            button_key = f"select_btn_{video_id}"
-                            
-                            if st.button("✓ Select", key=button_key, width='stretch', type="primary"):
-                                # Store the EXACT video that was clicked
-                                st.session_state.selected_video_url = video['url']
-                                st.session_state.current_input = video['url']
-                                st.session_state.hide_search = True  # Flag to hide search results
-                                # Force rerun to refresh and hide search results
-                                st.rerun()
-                        
+                prefetcher = get_prefetcher()
+                search_results = []
+                for video in searcher.iter_search(parsed['value'], max_results=8):
+                    if not search_results:
+                        header.markdown("### 📺 Search Results")
+                    else:
                         # Divider between results
-                        if idx < len(search_results) - 1:
-                            st.markdown("<div style='height: 1px; background: linear-gradient(90deg, transparent, #334155, transparent); margin: 1rem 0;'></div>", unsafe_allow_html=True)
+                        st.markdown("<div style='height: 1px; background: linear-gradient(90deg, transparent, #334155, transparent); margin: 1rem 0;'></div>", unsafe_allow_html=True)
+                    
+                    _render_search_result(video, len(search_results))
+                    search_results.append(video)
                     
+                    # Users nearly always pick one of the first rows - warm those as soon as they are known
+                    if len(search_results) == prefetcher.top_k:
+                        prefetcher.prefetch(search_results, get_session().owner)
+                
+                if search_results:
+                    prefetcher.prefetch(search_results, get_session().owner)
+                    status.markdown(f"<p style='color: #94a3b8; font-size: 0.85rem; margin-bottom: 1rem;'>Found {len(search_results)} videos - Click ✓ Select to choose</p>", unsafe_allow_html=True)
                     selected_url = None  # Don't auto-fetch for search results
                 else:
+                    status.empty()
                     st.warning("No results found. Try a different search term.")
                     selected_url = None
-                    
+            
             elif parsed['type'] == 'invalid_url':
                 st.error("❌ Only YouTube URLs are supported")
                 selected_url = None
@@ -415,6 +435,56 @@ def render_url_input() -> str:
         return selected_url if selected_url else ''
 
 
+def _render_search_result(video: Dict, idx: int):
+    """Draw one search result row with its select button"""
+    # Each result in a clean container
+    col_thumb, col_info, col_btn = st.columns([1, 4, 1])
+    
+    with col_thumb:
+        thumbnail_url = video.get('thumbnail', '')
+        if thumbnail_url and thumbnail_url.strip():
+            try:
+                st.image(thumbnail_url, width='stretch')
+            except Exception:
+                # Fallback placeholder
+                st.markdown("""
+                    <div style="width: 100%; aspect-ratio: 16/9; background: #1e293b; 
+                    display: flex; align-items: center; justify-content: center; 
+                    border-radius: 6px; border: 1px solid #334155;">
+                        <span style="font-size: 2rem;">🎬</span>
+                    </div>
+                """, unsafe_allow_html=True)
+        else:
+            # No thumbnail available
+            st.markdown("""
+                <div style="width: 100%; aspect-ratio: 16/9; background: #1e293b; 
+                display: flex; align-items: center; justify-content: center; 
+                border-radius: 6px; border: 1px solid #334155;">
+                    <span style="font-size: 2rem;">🎬</span>
+                </div>
+            """, unsafe_allow_html=True)
+    
+    with col_info:
+        st.markdown(f"**{video['title']}**")
+        duration = int(video.get('duration', 0)) if video.get('duration') else 0
+        duration_str = f"{duration // 60}:{duration % 60:02d}" if duration else 'N/A'
+        st.markdown(f"<small style='color: #94a3b8;'>{video.get('uploader', 'Unknown')} • {duration_str} • {video.get('view_count', 0):,} views</small>", unsafe_allow_html=True)
+    
+    with col_btn:
+        # Use unique key with video ID to ensure correct selection
+        video_id = video.get('id', f'unknown_{idx}')
+        button_key = f"select_btn_{video_id}"
+        
+        if st.button("✓ Select", key=button_key, width='stretch', type="primary"):
+            # Store the EXACT video that was clicked
+            st.session_state.selected_video_url = video['url']
+            st.session_state.selected_video = video  # Lets the card render before extraction finishes
+            st.session_state.current_input = video['url']
+            st.session_state.hide_search = True  # Flag to hide search results
+            # Force rerun to refresh and hide search results
+            st.rerun()
+
+
 def render_video_info_card(video_info: Dict):
     """Render video information card"""
     col1, col2 = st.columns([1, 2])
@@ -462,7 +532,10 @@ def render_video_info_card(video_info: Dict):
         with stats_cols[0]:
             st.metric("Duration", video_info['duration_formatted'])
         with stats_cols[1]:
-            st.metric("Formats", f"{len(video_info['formats'])} available")
+            if video_info.get('partial'):
+                st.metric("Formats", "Loading...")
+            else:
+                st.metric("Formats", f"{len(video_info['formats'])} available")
         with stats_cols[2]:
             if video_info.get('like_count'):
                 st.metric("Likes", f"{video_info['like_count']:,}")
@@ -474,6 +547,12 @@ def render_video_info_card(video_info: Dict):
                     desc += "..."
                 st.markdown(desc)
         
+        if video_info.get('chapters'):
+            with st.expander(f"📑 Chapters ({len(video_info['chapters'])})"):
+                for chapter in video_info['chapters']:
+                    start_label = FileManager.format_duration(chapter['start_time']) if chapter['start_time'] else '0:00'
+                    st.markdown(f"`{start_label}` {chapter['title']}")
+        
         if video_info.get('tags'):
             with st.expander(f"🏷️ Tags ({len(video_info['tags'])})"):
                 tags = ' • '.join(video_info['tags'][:15])
@@ -487,6 +566,8 @@ def render_quick_download(video_info: Dict, settings: SettingsManager):
     # Info box about auto-merge
     st.info("💡 **Auto-Merge Technology**: Best quality videos are automatically combined with best audio for maximum quality (1080p+, 1440p, 4K). Requires FFmpeg.")
     
+    section = render_clip_options(video_info)
+    
     st.markdown("<br>", unsafe_allow_html=True)
     
     col1, col2 = st.columns(2)
@@ -516,7 +597,7 @@ def render_quick_download(video_info: Dict, settings: SettingsManager):
         )
         
         if st.button("⬇️ Download Video", key="download_video_quick", width='stretch'):
-            download_video(video_info, quality, settings)
+            download_video(video_info, quality, settings, section)
     
     with col2:
         st.markdown("""
@@ -542,13 +623,101 @@ def render_quick_download(video_info: Dict, settings: SettingsManager):
         )
         
         if st.button("⬇️ Download Audio", key="download_audio_quick", width='stretch'):
-            download_audio(video_info, audio_format, settings)
+            download_audio(video_info, audio_format, settings, section)
+
+
+def render_clip_options(video_info: Dict) -> Dict:
+    """
+    Render optional clip (time range) inputs
+    Defaults the start from a 't=' parameter in the pasted URL
+    Returns section options for VideoDownloader.download (empty for full video)
+    """
+    source_url = st.session_state.get('selected_video_url') or st.session_state.get('current_input', '')
+    url_start = URLValidator.extract_timestamp(source_url) if source_url else None
+    
+    with st.expander("✂️ Clip (download only part of the video)", expanded=url_start is not None):
+        st.checkbox(
+            "Download a clip instead of the full video",
+            value=url_start is not None,
+            key="clip_enabled"
+        )
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.text_input(
+                "Start",
+                value=FileManager.format_duration(url_start) if url_start else "0:00",
+                help="e.g. 1:30, 1:02:03 or 1h2m3s",
+                key="clip_start"
+            )
+        with col2:
+            st.text_input(
+                "End",
+                value="",
+                placeholder=video_info.get('duration_formatted', ''),
+                help="Leave empty to download until the end",
+                key="clip_end"
+            )
+        with col3:
+            st.checkbox(
+                "Frame accurate",
+                value=False,
+                help="Re-encodes only the partial GOPs at the cut points (requires FFmpeg). Otherwise cuts snap to keyframes.",
+                key="clip_frame_accurate"
+            )
+        
+        if video_info.get('chapters'):
+            st.selectbox(
+                "Or pick a chapter",
+                options=[''] + [chapter['title'] for chapter in video_info['chapters']],
+                format_func=lambda x: x or '— Use the time range above —',
+                key="clip_chapter"
+            )
+    
+    section = get_clip_section()
+    if st.session_state.get('clip_enabled') and not section:
+        st.warning("⚠️ Invalid clip timestamp - the full video will be downloaded")
+    
+    return section
+
+
+def get_clip_section() -> Dict:
+    """Read the clip options rendered by render_clip_options from session state"""
+    if not st.session_state.get('clip_enabled'):
+        return {}
+    
+    if chapter := st.session_state.get('clip_chapter'):
+        return {'section_chapter': chapter}
+    
+    start_text = st.session_state.get('clip_start', '')
+    end_text = st.session_state.get('clip_end', '').strip()
+    
+    start = URLValidator.parse_timestamp(start_text)
+    end = URLValidator.parse_timestamp(end_text) if end_text else None
+    
+    if start is None or (end_text and end is None) or (end is not None and end <= start):
+        return {}
+    
+    return {
+        'section_start': start,
+        'section_end': end,
+        'frame_accurate': st.session_state.get('clip_frame_accurate', False),
+    }
 
 
 def render_custom_formats(video_info: Dict, settings: SettingsManager):
     """Render custom format selection"""
     st.markdown("### Available Formats")
     
+    # Clip range is chosen in the Quick Download tab and applies here too
+    section = get_clip_section()
+    if section.get('section_chapter'):
+        st.info(f"✂️ Clip active: chapter '{section['section_chapter']}'")
+    elif section:
+        start_label = FileManager.format_duration(section['section_start']) if section['section_start'] else '0:00'
+        end_label = FileManager.format_duration(section['section_end']) if section['section_end'] else 'end'
+        st.info(f"✂️ Clip active: {start_label} → {end_label}")
+    
     processor = FormatProcessor()
     categorized = processor.categorize_formats(video_info['formats'])
     
@@ -579,7 +748,7 @@ def render_custom_formats(video_info: Dict, settings: SettingsManager):
             
             with col4:
                 if st.button("⬇️", key=f"dl_prog_{fmt['format_id']}", help="Download - Ready to play"):
-                    download_format(video_info, fmt['format_id'], settings, merge_audio=False)
+                    download_format(video_info, fmt['format_id'], settings, merge_audio=False, section=section)
             
             st.markdown("<hr style='margin: 0.5rem 0; opacity: 0.2;'>", unsafe_allow_html=True)
         
@@ -610,7 +779,7 @@ def render_custom_formats(video_info: Dict, settings: SettingsManager):
             
             with col4:
                 if st.button("⬇️", key=f"dl_audio_{fmt['format_id']}", help="Download audio only"):
-                    download_format(video_info, fmt['format_id'], settings, merge_audio=False)
+                    download_format(video_info, fmt['format_id'], settings, merge_audio=False, section=section)
             
             st.markdown("<hr style='margin: 0.5rem 0; opacity: 0.2;'>", unsafe_allow_html=True)
     else:
@@ -645,7 +814,7 @@ def render_custom_formats(video_info: Dict, settings: SettingsManager):
             
             with col4:
                 if st.button("⬇️", key=f"dl_video_{fmt['format_id']}", help="Download & auto-merge with best audio"):
-                    download_format(video_info, fmt['format_id'], settings, merge_audio=True)
+                    download_format(video_info, fmt['format_id'], settings, merge_audio=True, section=section)
             
             st.markdown("<hr style='margin: 0.5rem 0; opacity: 0.2;'>", unsafe_allow_html=True)
     else:
@@ -671,6 +840,12 @@ def render_advanced_settings(settings: SettingsManager):
                 value=settings.get('filename_template', '{title}'),
                 help="Template for downloaded filenames"
             )
+            
+            scratch_dir = st.text_input(
+                "Scratch Directory",
+                value=settings.get('scratch_dir', ''),
+                help="Fast local disk for in-progress files; finished files are moved to the save location"
+            )
         
         with col2:
             concurrent_downloads = st.slider(
@@ -686,6 +861,13 @@ def render_advanced_settings(settings: SettingsManager):
                 max_value=10,
                 value=settings.get('retry_attempts', 3)
             )
+            
+            adaptive_concurrency = st.checkbox(
+                "Adaptive Concurrency",
+                value=settings.get('adaptive_concurrency', False),
+                help="Run more downloads at once while it raises throughput, fewer when the server throttles "
+                     "(up to max_concurrent_downloads; applies after a restart)"
+            )
     
     with st.expander("🔧 Post-Processing"):
         col1, col2 = st.columns(2)
@@ -700,12 +882,30 @@ def render_advanced_settings(settings: SettingsManager):
                 "Embed Metadata",
                 value=settings.get('embed_metadata', True)
             )
+            
+            embed_chapters = st.checkbox(
+                "Embed Chapters",
+                value=settings.get('embed_chapters', False),
+                help="Write the video's chapters as container chapter markers"
+            )
         
         with col2:
             auto_convert = st.checkbox(
                 "Auto Convert to MP4",
                 value=settings.get('auto_convert', False)
             )
+            
+            split_chapters = st.checkbox(
+                "Split by Chapters",
+                value=settings.get('split_chapters', False),
+                help="Also save one file per chapter (fast stream copy, no re-encode)"
+            )
+            
+            add_to_library = st.checkbox(
+                "Add to Library",
+                value=settings.get('add_to_library', False),
+                help="Index downloads in a local searchable library (converso library search)"
+            )
     
     st.markdown("<br>", unsafe_allow_html=True)
     
@@ -715,11 +915,16 @@ def render_advanced_settings(settings: SettingsManager):
         if st.button("💾 Save Settings", width='stretch'):
             settings.set('download_location', save_location)
             settings.set('filename_template', filename_template)
+            settings.set('scratch_dir', scratch_dir.strip())
             settings.set('concurrent_downloads', concurrent_downloads)
             settings.set('retry_attempts', retry_attempts)
+            settings.set('adaptive_concurrency', adaptive_concurrency)
             settings.set('embed_thumbnail', embed_thumbnail)
             settings.set('embed_metadata', embed_metadata)
+            settings.set('embed_chapters', embed_chapters)
+            settings.set('split_chapters', split_chapters)
             settings.set('auto_convert', auto_convert)
+            settings.set('add_to_library', add_to_library)
             
             settings.save_settings()
             st.success("✅ Settings saved successfully!")
@@ -736,19 +941,170 @@ def render_batch_download():
     st.markdown("### Batch Download")
     
     st.markdown("**Paste multiple URLs (one per line)**")
+    st.markdown("<p style='color: #94a3b8; font-size: 0.85rem; margin-top: -10px;'>Add a range after a URL to download a clip, e.g. <code>URL 1:00-2:30</code>. A <code>t=</code> parameter in the URL sets the start.</p>", unsafe_allow_html=True)
     urls_text = st.text_area(
         "URLs",
         height=200,
-        placeholder="https://youtube.com/watch?v=...\nhttps://vimeo.com/...\n",
+        placeholder="https://youtube.com/watch?v=...\nhttps://youtu.be/...?t=90 -2:00\n",
         label_visibility='collapsed'
     )
     
     if st.button("📋 Process Batch", key="process_batch"):
         if urls_text.strip():
-            urls = [line.strip() for line in urls_text.split('\n') if line.strip()]
-            st.info(f"Found {len(urls)} URLs. Batch processing coming soon!")
+            items = [URLValidator.parse_batch_line(line) for line in urls_text.split('\n') if line.strip()]
+            st.session_state.batch_plan = plan_batch(items)
         else:
             st.warning("Please enter at least one URL")
+    
+    if st.session_state.get('batch_plan'):
+        render_batch_plan(st.session_state.batch_plan)
+    
+    render_bulk_import()
+
+
+def plan_batch(items: List[Dict]) -> Dict:
+    """Size, order and budget a batch; lines seen in an earlier plan keep aging"""
+    settings = SettingsManager()
+    session = get_session()
+    first_seen = st.session_state.setdefault('batch_first_seen', {})
+    now = time.time()
+    for item in items:
+        item['queued_at'] = first_seen.setdefault(batch_line_key(item), now)
+    
+    # The audio profile has every adaptive format with its size, without fetching manifests
+    infos = {}
+    progress_bar = st.progress(0)
+    status_text = st.empty()
+    for url, info in session.extractor.extract_many([item['url'] for item in items], profile='audio'):
+        infos[url] = info
+        progress_bar.progress(len(infos) / len(items))
+        status_text.text(f"Sizing {len(infos)}/{len(items)} videos...")
+    progress_bar.empty()
+    status_text.empty()
+    
+    planner = BatchPlanner(
+        settings.get('download_location'),
+        quality=settings.get('quality_preference', 'best'),
+        workers=session.engine.stats()['concurrency_limit'],
+        job_speed=BatchPlanner.job_speed_from(session.engine.jobs.list_jobs()),
+    )
+    return planner.plan(items, [infos.get(item['url']) for item in items], now)
+
+
+def batch_line_key(item: Dict) -> str:
+    """Identity of a batch line (URL and clip range) across plans"""
+    return f"{item['url']} {item['start']} {item['end']}"
+
+
+def render_batch_plan(plan: Dict):
+    """Show the predicted size and ETA of a planned batch and start it on request"""
+    col1, col2, col3 = st.columns(3)
+    unknown = f" (+{plan['unknown_size']} unknown)" if plan['unknown_size'] else ""
+    col1.metric("Predicted Size", FileManager.format_size(plan['total_bytes']) + unknown)
+    col2.metric("Estimated Time", FileManager.format_duration(plan['eta_seconds']))
+    col3.metric("Free Space", FileManager.format_size(plan['free_bytes']))
+    
+    with st.expander(f"📋 Plan ({len(plan['items'])} videos, shortest first)", expanded=True):
+        for i, entry in enumerate(plan['items'], 1):
+            clip = " • clip" if entry['start'] is not None or entry['end'] is not None else ""
+            st.markdown(
+                f"{i}. **{entry['title']}** <small style='color: #94a3b8;'>{FileManager.format_size(entry['bytes'])}"
+                f" • done in ~{FileManager.format_duration(entry['finish_seconds'])}{clip}</small>",
+                unsafe_allow_html=True
+            )
+    
+    if plan['deferred']:
+        st.warning(
+            f"⏸️ {len(plan['deferred'])} videos deferred - they do not fit in the free space after this batch: "
+            + ", ".join(entry['title'] or entry['url'] for entry in plan['deferred'])
+        )
+    for entry in plan['refused']:
+        reason = "larger than the free space" if entry['reason'] == 'too_large' else "could not be loaded"
+        st.markdown(f"❌ `{entry['url']}` - {reason}")
+    
+    if plan['items'] and st.button("▶️ Start Batch", key="start_batch"):
+        settings = SettingsManager()
+        options = {
+            'output_path': settings.get('download_location'),
+            'embed_thumbnail': settings.get('embed_thumbnail'),
+            'embed_metadata': settings.get('embed_metadata'),
+            'embed_chapters': settings.get('embed_chapters'),
+            'add_to_library': settings.get('add_to_library'),
+            'scratch_dir': settings.get('scratch_dir') or None,
+            'digest_algorithm': settings.get('digest_algorithm') or None,
+            'digest_read_back': settings.get('digest_read_back', False),
+            'merge_output_format': settings.get('output_format', 'mp4'),
+        }
+        session = get_session()
+        first_seen = st.session_state.get('batch_first_seen', {})
+        for entry in plan['items']:
+            section = {}
+            if entry['start'] is not None or entry['end'] is not None:
+                section = {'section_start': entry['start'] or 0, 'section_end': entry['end']}
+            session.submit(entry['url'], entry['format_spec'], {**options, **section})
+            first_seen.pop(batch_line_key(entry), None)
+        
+        st.session_state.batch_plan = None
+        st.success(f"✅ Queued {len(plan['items'])} downloads, shortest first. Downloads run in the background.")
+
+
+def render_bulk_import():
+    """Import large URL lists from a file and queue them as background jobs"""
+    st.markdown("**Import from file**")
+    st.markdown("<p style='color: #94a3b8; font-size: 0.85rem; margin-top: -10px;'>Text (one URL per line), CSV with a <code>url</code> column, or JSON Lines. Duplicates and already archived videos are skipped.</p>", unsafe_allow_html=True)
+    uploaded = st.file_uploader(
+        "URL list",
+        type=['txt', 'csv', 'tsv', 'jsonl', 'ndjson', 'json'],
+        label_visibility='collapsed'
+    )
+    
+    if uploaded and st.button("📥 Import & Queue", key="bulk_import"):
+        settings = SettingsManager()
+        importer = BulkImporter(BulkImporter.load_archive(settings.get('download_archive')))
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+        
+        def progress_callback(stats: Dict):
+            if stats['total_bytes']:
+                progress_bar.progress(min(stats['bytes_read'] / stats['total_bytes'], 1.0))
+            status_text.text(
+                f"Read {stats['rows']:,} rows • queued {stats['queued']:,} • "
+                f"{stats['duplicate']:,} duplicate • {stats['invalid']:,} invalid • {stats['archived']:,} archived"
+            )
+        
+        options = {
+            'output_path': settings.get('download_location'),
+            'quality': settings.get('quality_preference', 'best'),
+            'embed_thumbnail': settings.get('embed_thumbnail'),
+            'embed_metadata': settings.get('embed_metadata'),
+            'embed_chapters': settings.get('embed_chapters'),
+            'add_to_library': settings.get('add_to_library'),
+            'scratch_dir': settings.get('scratch_dir') or None,
+            'digest_algorithm': settings.get('digest_algorithm') or None,
+            'digest_read_back': settings.get('digest_read_back', False),
+            'merge_output_format': settings.get('output_format', 'mp4'),
+        }
+        
+        try:
+            stats = importer.feed(uploaded, get_job_manager(), options=options, owner=get_session().owner,
+                                  progress_callback=progress_callback)
+        except ValueError as e:
+            st.error(f"❌ Import failed: {e}")
+            return
+        
+        progress_bar.progress(1.0)
+        st.success(f"✅ Queued {stats['queued']:,} of {stats['rows']:,} rows. Downloads run in the background.")
+    
+    if 'engine_owner' in st.session_state:
+        jobs = get_session().jobs()
+        if jobs:
+            counts = {}
+            for job in jobs:
+                counts[job.status] = counts.get(job.status, 0) + 1
+            summary = " • ".join(f"{status}: {count:,}" for status, count in sorted(counts.items()))
+            st.caption(f"Background jobs - {summary}")
+            if st.button("🔄 Refresh", key="refresh_jobs"):
+                st.rerun()
 
 
 def render_footer():
@@ -773,7 +1129,7 @@ def render_footer():
 
 # Download helper functions
 
-def download_video(video_info: Dict, quality: str, settings: SettingsManager):
+def download_video(video_info: Dict, quality: str, settings: SettingsManager, section: Optional[Dict] = None):
     """Download video with specified quality - automatically merges with best audio"""
     processor = FormatProcessor()
     format_id = processor.get_best_format_id(video_info['formats'], quality)
@@ -798,18 +1154,25 @@ def download_video(video_info: Dict, quality: str, settings: SettingsManager):
         elif info['status'] == 'finished':
             status_text.text("Merging video and audio... (requires FFmpeg)")
     
-    downloader = VideoDownloader(download_path, progress_callback)
-    
     with st.spinner("Starting download..."):
         # Automatically merge with best audio for highest quality
-        result = downloader.download(
+        result = run_download(
             video_info['webpage_url'],
             format_id + '+bestaudio',
             {
+                'output_path': download_path,
                 'embed_thumbnail': settings.get('embed_thumbnail'),
                 'embed_metadata': settings.get('embed_metadata'),
+                'embed_chapters': settings.get('embed_chapters'),
+                'split_chapters': settings.get('split_chapters'),
+                'add_to_library': settings.get('add_to_library'),
+                'scratch_dir': settings.get('scratch_dir') or None,
+                'digest_algorithm': settings.get('digest_algorithm') or None,
+                'digest_read_back': settings.get('digest_read_back', False),
                 'merge_output_format': 'mp4',
-            }
+                **(section or {}),
+            },
+            progress_callback
         )
     
     progress_bar.progress(100)
@@ -817,11 +1180,13 @@ def download_video(video_info: Dict, quality: str, settings: SettingsManager):
     if result['success']:
         st.success(f"✅ Downloaded: {result['title']}")
         st.info(f"📁 Saved to: {result['filepath']}")
+        if result.get('chapter_files'):
+            st.info(f"📑 Split into {len(result['chapter_files'])} chapter files")
     else:
         st.error(f"❌ Download failed: {result.get('error', 'Unknown error')}")
 
 
-def download_audio(video_info: Dict, audio_format: str, settings: SettingsManager):
+def download_audio(video_info: Dict, audio_format: str, settings: SettingsManager, section: Optional[Dict] = None):
     """Download audio only"""
     download_path = settings.get('download_location')
     
@@ -834,27 +1199,35 @@ def download_audio(video_info: Dict, audio_format: str, settings: SettingsManage
             progress_bar.progress(min(int(percent), 100) / 100)
             status_text.text(f"Downloading: {percent:.1f}%")
     
-    downloader = VideoDownloader(download_path, progress_callback)
-    
     with st.spinner("Extracting audio..."):
-        result = downloader.download(
+        result = run_download(
             video_info['webpage_url'],
             'bestaudio',
             {
+                'output_path': download_path,
                 'extract_audio': True,
                 'audio_format': audio_format,
                 'audio_quality': '320' if audio_format == 'mp3' else '192',
-            }
+                'add_to_library': settings.get('add_to_library'),
+                'scratch_dir': settings.get('scratch_dir') or None,
+                'digest_algorithm': settings.get('digest_algorithm') or None,
+                'digest_read_back': settings.get('digest_read_back', False),
+                **(section or {}),
+            },
+            progress_callback
         )
     
     if result['success']:
         st.success(f"✅ Downloaded audio: {result['title']}")
         st.info(f"📁 Saved to: {result['filepath']}")
+        if result.get('chapter_files'):
+            st.info(f"📑 Split into {len(result['chapter_files'])} chapter files")
     else:
         st.error(f"❌ Download failed: {result.get('error', 'Unknown error')}")
 
 
-def download_format(video_info: Dict, format_id: str, settings: SettingsManager, merge_audio: bool = False):
+def download_format(video_info: Dict, format_id: str, settings: SettingsManager, merge_audio: bool = False,
+                    section: Optional[Dict] = None):
     """Download specific format with optional audio merging"""
     download_path = settings.get('download_location')
     
@@ -871,8 +1244,6 @@ def download_format(video_info: Dict, format_id: str, settings: SettingsManager,
             if merge_audio:
                 status_text.text("Merging video and audio... (requires FFmpeg)")
     
-    downloader = VideoDownloader(download_path, progress_callback)
-    
     # If merging audio, add bestaudio to format for highest quality
     if merge_audio:
         format_id = format_id + '+bestaudio'
@@ -881,14 +1252,23 @@ def download_format(video_info: Dict, format_id: str, settings: SettingsManager,
         status_message = "Downloading..."
     
     with st.spinner(status_message):
-        result = downloader.download(
+        result = run_download(
             video_info['webpage_url'],
             format_id,
             {
+                'output_path': download_path,
                 'embed_thumbnail': settings.get('embed_thumbnail'),
                 'embed_metadata': settings.get('embed_metadata'),
+                'embed_chapters': settings.get('embed_chapters'),
+                'split_chapters': settings.get('split_chapters'),
+                'add_to_library': settings.get('add_to_library'),
+                'scratch_dir': settings.get('scratch_dir') or None,
+                'digest_algorithm': settings.get('digest_algorithm') or None,
+                'digest_read_back': settings.get('digest_read_back', False),
                 'merge_output_format': 'mp4' if merge_audio else None,
-            }
+                **(section or {}),
+            },
+            progress_callback
         )
     
     progress_bar.progress(100)
@@ -899,5 +1279,7 @@ def download_format(video_info: Dict, format_id: str, settings: SettingsManager,
         else:
             st.success(f"✅ Downloaded: {result['title']}")
         st.info(f"📁 Saved to: {result['filepath']}")
+        if result.get('chapter_files'):
+            st.info(f"📑 Split into {len(result['chapter_files'])} chapter files")
     else:
         st.error(f"❌ Download failed: {result.get('error', 'Unknown error')}")
@@ -0,0 +1,310 @@
+"""Local HTTP job API with Server-Sent Events progress for Converso Downloader"""
+
+import asyncio
+import hmac
+import json
+from typing import Dict, Optional, Set
+from urllib.parse import urlparse, parse_qs
+
+from .format_handler import json_default
+from .governor import GOVERNOR
+from .jobs import JobManager
+from .metrics import REGISTRY
+
+
+class JobAPIServer:
+    """
+    Minimal asyncio HTTP/1.1 server in front of a JobManager
+    
+    Endpoints:
+        POST   /jobs               submit {"url", "format", "options", "owner"}
+        GET    /jobs[?owner=]      list jobs
+        GET    /jobs/{id}          job details
+        DELETE /jobs/{id}          cancel a job
+        GET    /info?url=          video metadata (served from the extractor cache)
+        GET    /events[?job=]      Server-Sent Events stream of job events
+        GET    /concurrency        adaptive concurrency limit and recent decisions
+        GET    /governor           request governor tokens, waiters and cooldowns per host
+        GET    /metrics            Prometheus text exposition
+    
+    Every client is a coroutine on one event loop; download threads hand events
+    over with call_soon_threadsafe, so subscribers never need their own thread.
+    
+    Requests from web pages are refused: a foreign Origin gets 403, POST
+    bodies must be sent as application/json (which browsers cannot do
+    cross-site without a preflight this server never answers), and job
+    options are limited to JOB_OPTIONS - never output or trace paths.
+    Without a token the Host header must name a loopback address, which
+    stops DNS rebinding; with one, every request needs
+    'Authorization: Bearer <token>' instead.
+    """
+    
+    # Events buffered per subscriber before progress updates start being dropped
+    SUBSCRIBER_QUEUE_SIZE = 256
+    KEEPALIVE_SECONDS = 15
+    MAX_BODY_BYTES = 1024 * 1024
+    
+    # Options a client may set on a job; paths stay the server's choice
+    JOB_OPTIONS = (
+        'quality', 'embed_thumbnail', 'embed_metadata', 'embed_chapters', 'split_chapters',
+        'add_to_library', 'download_subtitles', 'subtitle_languages', 'subtitle_format',
+        'extract_audio', 'audio_format', 'audio_quality', 'merge_output_format',
+        'section_start', 'section_end', 'section_chapter', 'frame_accurate', 'digest_algorithm',
+    )
+    LOCAL_HOSTS = ('127.0.0.1', 'localhost', '::1')
+    
+    def __init__(self, job_manager: JobManager, host: str = '127.0.0.1', port: int = 8765,
+                 token: Optional[str] = None):
+        self.job_manager = job_manager
+        self.host = host
+        self.port = port
+        self.token = token
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.server: Optional[asyncio.AbstractServer] = None
+        self._subscribers: Set[tuple] = set()
+    
+    async def start(self):
+        """Bind the socket and start accepting connections"""
+        self.loop = asyncio.get_running_loop()
+        self.job_manager.add_listener(self._on_job_event)
+        self.server = await asyncio.start_server(self._handle_client, self.host, self.port)
+    
+    async def serve_forever(self):
+        """Start (if needed) and serve until cancelled"""
+        if not self.server:
+            await self.start()
+        
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        finally:
+            self.job_manager.remove_listener(self._on_job_event)
+    
+    def _on_job_event(self, event: Dict):
+        """Called from download threads - hop onto the event loop"""
+        if self.loop and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._broadcast, event)
+    
+    def _broadcast(self, event: Dict):
+        """Fan an event out to every matching subscriber queue"""
+        for queue, job_filter in list(self._subscribers):
+            if job_filter and event.get('job_id') != job_filter:
+                continue
+            
+            if queue.full():
+                if event.get('event') == 'progress':
+                    # Slow consumer - skip intermediate progress, never status changes
+                    continue
+                queue.get_nowait()
+            queue.put_nowait(event)
+    
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Parse one request and dispatch it"""
+        try:
+            request_line = await reader.readline()
+            if not request_line:
+                return
+            
+            method, target, _ = request_line.decode('latin-1').split(' ', 2)
+            
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            
+            if not self._trusted(headers):
+                await self._send_json(writer, 403, {'error': 'Missing token or cross-origin request'})
+                return
+            
+            length = int(headers.get('content-length', 0) or 0)
+            if length > self.MAX_BODY_BYTES:
+                await self._send_json(writer, 413, {'error': 'Request body too large'})
+                return
+            body = await reader.readexactly(length) if length else b''
+            
+            parsed = urlparse(target)
+            query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+            await self._dispatch(method.upper(), parsed.path.rstrip('/') or '/', query, body, writer,
+                                 headers.get('content-type', ''))
+        
+        except (ValueError, asyncio.IncompleteReadError):
+            await self._send_json(writer, 400, {'error': 'Malformed request'})
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+        except Exception as e:
+            print(f"API request error: {e}")
+            try:
+                await self._send_json(writer, 500, {'error': 'Internal error'})
+            except Exception:
+                pass
+        finally:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except Exception:
+                pass
+    
+    def _trusted(self, headers: Dict) -> bool:
+        """Token (or loopback Host) matches, and any Origin is this server itself"""
+        host = headers.get('host', '')
+        if self.token:
+            if not hmac.compare_digest(headers.get('authorization', ''), f'Bearer {self.token}'):
+                return False
+        elif urlparse(f'//{host}').hostname not in self.LOCAL_HOSTS:
+            return False
+        
+        origin = headers.get('origin')
+        return origin is None or urlparse(origin).netloc == host
+    
+    async def _dispatch(self, method: str, path: str, query: Dict, body: bytes,
+                        writer: asyncio.StreamWriter, content_type: str = ''):
+        """Route a request to its handler"""
+        parts = path.strip('/').split('/')
+        
+        if path == '/jobs' and method == 'GET':
+            jobs = self.job_manager.list_jobs(query.get('owner'))
+            await self._send_json(writer, 200, {'jobs': [job.to_dict() for job in jobs]})
+        
+        elif path == '/jobs' and method == 'POST':
+            if content_type.split(';', 1)[0].strip().lower() != 'application/json':
+                await self._send_json(writer, 415, {'error': 'Content-Type must be application/json'})
+                return
+            try:
+                payload = json.loads(body or b'{}')
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                await self._send_json(writer, 400, {'error': 'Body must be JSON'})
+                return
+            
+            error = self._validate_job(payload)
+            if error:
+                await self._send_json(writer, 400, {'error': error})
+                return
+            
+            job = self.job_manager.submit(
+                payload['url'],
+                payload.get('format'),
+                payload.get('options') or {},
+                payload.get('owner')
+            )
+            await self._send_json(writer, 201, job.to_dict())
+        
+        elif len(parts) == 2 and parts[0] == 'jobs' and method in ('GET', 'DELETE'):
+            job = self.job_manager.get(parts[1])
+            if not job:
+                await self._send_json(writer, 404, {'error': 'Job not found'})
+            elif method == 'DELETE':
+                cancelled = self.job_manager.cancel(job.id)
+                await self._send_json(writer, 200 if cancelled else 409, job.to_dict())
+            else:
+                await self._send_json(writer, 200, job.to_dict())
+        
+        elif path == '/info' and method == 'GET':
+            if not query.get('url'):
+                await self._send_json(writer, 400, {'error': "'url' is required"})
+                return
+            
+            # Extraction blocks on the network, so run it off the loop
+            info = await self.loop.run_in_executor(
+                None, self.job_manager.extractor.extract_info, query['url']
+            )
+            if info:
+                await self._send_json(writer, 200, info)
+            else:
+                await self._send_json(writer, 502, {'error': 'Failed to fetch video information'})
+        
+        elif path == '/events' and method == 'GET':
+            await self._stream_events(writer, query.get('job'))
+        
+        elif path == '/concurrency' and method == 'GET':
+            if not self.job_manager.controller:
+                await self._send_json(writer, 404, {'error': 'Adaptive concurrency is off'})
+            else:
+                await self._send_json(writer, 200, self.job_manager.controller.snapshot())
+        
+        elif path == '/governor' and method == 'GET':
+            await self._send_json(writer, 200, GOVERNOR.stats())
+        
+        elif path == '/metrics' and method == 'GET':
+            body = REGISTRY.render().encode('utf-8')
+            writer.write(
+                f"HTTP/1.1 200 OK\r\n"
+                f"Content-Type: {REGISTRY.CONTENT_TYPE}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: close\r\n\r\n".encode('latin-1') + body
+            )
+            await writer.drain()
+        
+        else:
+            await self._send_json(writer, 404, {'error': 'Not found'})
+    
+    async def _stream_events(self, writer: asyncio.StreamWriter, job_filter: Optional[str]):
+        """Hold the connection open and write job events as Server-Sent Events"""
+        writer.write(
+            b'HTTP/1.1 200 OK\r\n'
+            b'Content-Type: text/event-stream\r\n'
+            b'Cache-Control: no-cache\r\n'
+            b'Connection: keep-alive\r\n\r\n'
+        )
+        
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.SUBSCRIBER_QUEUE_SIZE)
+        subscriber = (queue, job_filter)
+        self._subscribers.add(subscriber)
+        
+        try:
+            # Replay current state so late subscribers start in sync
+            for job in self.job_manager.list_jobs():
+                if not job_filter or job.id == job_filter:
+                    self._write_event(writer, {'event': 'snapshot', 'job_id': job.id, **job.to_dict()})
+            await writer.drain()
+            
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=self.KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    writer.write(b': keepalive\n\n')
+                else:
+                    self._write_event(writer, event)
+                await writer.drain()
+        finally:
+            self._subscribers.discard(subscriber)
+    
+    @staticmethod
+    def _write_event(writer: asyncio.StreamWriter, event: Dict):
+        """Encode one SSE message"""
+        data = json.dumps(event, default=json_default)
+        writer.write(f"event: {event.get('event', 'message')}\ndata: {data}\n\n".encode('utf-8'))
+    
+    @classmethod
+    def _validate_job(cls, payload) -> Optional[str]:
+        """Error message for a malformed job submission, None when it is fine"""
+        if not isinstance(payload, dict):
+            return 'Body must be a JSON object'
+        if not payload.get('url') or not isinstance(payload['url'], str):
+            return "'url' is required"
+        for key in ('format', 'owner'):
+            if payload.get(key) is not None and not isinstance(payload[key], str):
+                return f"'{key}' must be a string"
+        options = payload.get('options') or {}
+        if not isinstance(options, dict):
+            return "'options' must be an object"
+        if rejected := sorted(set(options) - set(cls.JOB_OPTIONS)):
+            return f"Unsupported options: {', '.join(rejected)}"
+        return None
+    
+    @staticmethod
+    async def _send_json(writer: asyncio.StreamWriter, status: int, payload: Dict):
+        """Write a complete JSON response"""
+        reasons = {200: 'OK', 201: 'Created', 400: 'Bad Request', 403: 'Forbidden', 404: 'Not Found',
+                   409: 'Conflict', 413: 'Payload Too Large', 415: 'Unsupported Media Type',
+                   500: 'Internal Server Error', 502: 'Bad Gateway'}
+        body = json.dumps(payload, default=json_default).encode('utf-8')
+        writer.write(
+            f"HTTP/1.1 {status} {reasons.get(status, 'OK')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n".encode('latin-1') + body
+        )
+        await writer.drain()
@@ -0,0 +1,262 @@
+"""Streaming bulk import of URL lists for Converso Downloader"""
+
+import csv
+import io
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, IO, Iterator, Optional, Set, Union
+
+from .url_canon import URLCanonicalizer
+from .validators import URLValidator
+
+
+class BulkImporter:
+    """
+    Read txt, CSV and JSONL URL lists as a stream and feed them to a JobManager
+    
+    Rows are parsed one at a time, canonicalized and deduplicated on the fly,
+    so memory stays bounded by the number of unique videos (one short key
+    each), not the file size, and downloads start while the file is still
+    being read. Rejected rows are counted as invalid, duplicate or archived.
+    """
+    
+    FORMATS = ('txt', 'csv', 'jsonl')
+    
+    # Column / key names tried in order for the URL, start and end of a row
+    URL_FIELDS = ('url', 'webpage_url', 'link', 'video_url', 'id', 'video_id')
+    START_FIELDS = ('start', 'section_start', 't')
+    END_FIELDS = ('end', 'section_end')
+    
+    PROGRESS_EVERY = 500
+    POLL_INTERVAL = 0.2
+    
+    def __init__(self, archive: Optional[Set[str]] = None):
+        self.archive = archive or set()
+        self._seen: Set[str] = set()
+        self.stats = self._empty_stats()
+    
+    @staticmethod
+    def _empty_stats() -> Dict:
+        return {'rows': 0, 'queued': 0, 'invalid': 0, 'duplicate': 0, 'archived': 0,
+                'bytes_read': 0, 'total_bytes': 0}
+    
+    @staticmethod
+    def load_archive(path: Optional[str]) -> Set[str]:
+        """
+        Read a yt-dlp download archive ('youtube VIDEO_ID' per line)
+        Returns canonical keys matching CanonicalURL.key
+        """
+        keys = set()
+        if not path or not os.path.exists(path):
+            return keys
+        
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) == 2 and parts[0] == 'youtube':
+                        keys.add(f"youtube:{parts[1]}")
+        except OSError as e:
+            print(f"Error reading download archive: {e}")
+        return keys
+    
+    @staticmethod
+    def detect_format(name: str) -> str:
+        """Guess the file format from its name; plain text is the fallback"""
+        ext = os.path.splitext(name or '')[1].lower().lstrip('.')
+        if ext in ('jsonl', 'ndjson', 'json'):
+            return 'jsonl'
+        if ext in ('csv', 'tsv'):
+            return 'csv'
+        return 'txt'
+    
+    def iter_import(self, source: Union[str, IO], fmt: Optional[str] = None,
+                    progress_callback: Optional[Callable[[Dict], None]] = None) -> Iterator[Dict]:
+        """
+        Yield accepted items ({'url', 'key', 'start', 'end'}) as they are read
+        source is a path, '-' for stdin, or an open file (text or binary, e.g.
+        a Streamlit upload). progress_callback gets the running stats.
+        """
+        handle, raw, close = self._open(source)
+        fmt = fmt or self.detect_format(getattr(source, 'name', source if isinstance(source, str) else ''))
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Unsupported import format: {fmt}")
+        
+        try:
+            for item in getattr(self, f'_rows_{fmt}')(handle):
+                self.stats['rows'] += 1
+                if accepted := self._accept(item):
+                    self.stats['queued'] += 1
+                    yield accepted
+                
+                if progress_callback and self.stats['rows'] % self.PROGRESS_EVERY == 0:
+                    self._update_position(raw)
+                    progress_callback(dict(self.stats))
+        finally:
+            self._update_position(raw)
+            if close:
+                handle.close()
+            elif raw is source:
+                # Leave the caller's binary file open
+                handle.detach()
+        
+        if progress_callback:
+            progress_callback(dict(self.stats))
+    
+    def feed(self, source: Union[str, IO], job_manager, format_spec: Optional[str] = None,
+             options: Optional[Dict] = None, owner: Optional[str] = None, fmt: Optional[str] = None,
+             max_pending: int = 0, progress_callback: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """
+        Submit every accepted item to job_manager while the file is read
+        With max_pending > 0 reading pauses while that many imported jobs are
+        still queued or running, which keeps the job queue itself bounded.
+        Returns the final stats.
+        """
+        options = dict(options or {})
+        active = []
+        
+        for item in self.iter_import(source, fmt, progress_callback):
+            while max_pending and len(active) >= max_pending:
+                active = [job for job in active if job.is_active]
+                if len(active) >= max_pending:
+                    time.sleep(self.POLL_INTERVAL)
+            
+            job_options = dict(options)
+            if item['start'] is not None or item['end'] is not None:
+                job_options.update({'section_start': item['start'] or 0, 'section_end': item['end']})
+            
+            active.append(job_manager.submit(item['url'], format_spec, job_options, owner))
+        
+        return dict(self.stats)
+    
+    def _accept(self, item: Dict) -> Optional[Dict]:
+        """Canonicalize one row and apply the reject rules"""
+        result = URLCanonicalizer.canonicalize(item.get('url') or '')
+        if result.kind != 'video':
+            self.stats['invalid'] += 1
+            return None
+        
+        key = result.key
+        if key in self._seen:
+            self.stats['duplicate'] += 1
+            return None
+        self._seen.add(key)
+        
+        if key in self.archive:
+            self.stats['archived'] += 1
+            return None
+        
+        start = item.get('start')
+        if start is None:
+            start = result.timestamp
+        return {'url': result.canonical_url, 'key': key, 'start': start, 'end': item.get('end')}
+    
+    def _open(self, source: Union[str, IO]):
+        """Return (text handle, underlying binary handle for progress, whether to close)"""
+        if isinstance(source, str):
+            if source == '-':
+                return sys.stdin, None, False
+            self.stats['total_bytes'] = os.path.getsize(source)
+            raw = open(source, 'rb')
+            return io.TextIOWrapper(raw, encoding='utf-8-sig', errors='replace', newline=''), raw, True
+        
+        if isinstance(source, io.TextIOBase):
+            return source, None, False
+        
+        # Binary file objects (uploads); size is known for seekable ones
+        if hasattr(source, 'getbuffer'):
+            self.stats['total_bytes'] = source.getbuffer().nbytes
+        elif getattr(source, 'size', None):
+            self.stats['total_bytes'] = source.size
+        wrapper = io.TextIOWrapper(source, encoding='utf-8-sig', errors='replace', newline='')
+        return wrapper, source, False
+    
+    def _update_position(self, raw: Optional[IO]):
+        if raw is None:
+            return
+        try:
+            self.stats['bytes_read'] = raw.tell()
+        except (OSError, ValueError):
+            pass
+    
+    @staticmethod
+    def _rows_txt(handle: IO) -> Iterator[Dict]:
+        """'URL [start-end]' per line; blank lines and # comments are skipped"""
+        for line in handle:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            
+            # Same syntax as URLValidator.parse_batch_line; a t= start comes from the canonicalizer
+            parts = line.split(None, 1)
+            start, end = URLValidator.parse_time_range(parts[1]) if len(parts) > 1 else (None, None)
+            yield {'url': parts[0], 'start': start, 'end': end}
+    
+    @staticmethod
+    def _rows_csv(handle: IO) -> Iterator[Dict]:
+        """CSV with a header naming the URL column, or URLs in the first column"""
+        sample = handle.readline()
+        if not sample:
+            return
+        
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+        header = next(csv.reader([sample], dialect))
+        fields = [name.strip().lower() for name in header]
+        url_column = next((fields.index(name) for name in BulkImporter.URL_FIELDS if name in fields), None)
+        start_column = next((fields.index(name) for name in BulkImporter.START_FIELDS if name in fields), None)
+        end_column = next((fields.index(name) for name in BulkImporter.END_FIELDS if name in fields), None)
+        
+        def cell(row: list, column: Optional[int]) -> str:
+            return row[column].strip() if column is not None and column < len(row) else ''
+        
+        reader = csv.reader(handle, dialect)
+        if url_column is None:
+            # No header - the first line is data too
+            url_column = 0
+            reader = _chain_first(header, reader)
+        
+        for row in reader:
+            if not row or not cell(row, url_column):
+                continue
+            yield {
+                'url': cell(row, url_column),
+                'start': URLValidator.parse_timestamp(cell(row, start_column) or None),
+                'end': URLValidator.parse_timestamp(cell(row, end_column) or None),
+            }
+    
+    @staticmethod
+    def _rows_jsonl(handle: IO) -> Iterator[Dict]:
+        """One JSON string or object per line (e.g. `converso playlist` output)"""
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield {'url': ''}
+                continue
+            
+            if isinstance(record, str):
+                yield {'url': record, 'start': None, 'end': None}
+            elif isinstance(record, dict):
+                url = next((record[name] for name in BulkImporter.URL_FIELDS if record.get(name)), '')
+                start = next((record[name] for name in BulkImporter.START_FIELDS if record.get(name) is not None), None)
+                end = next((record[name] for name in BulkImporter.END_FIELDS if record.get(name) is not None), None)
+                yield {
+                    'url': str(url),
+                    'start': URLValidator.parse_timestamp(start),
+                    'end': URLValidator.parse_timestamp(end),
+                }
+            else:
+                yield {'url': ''}
+
+
+def _chain_first(first: list, rest: Iterator[list]) -> Iterator[list]:
+    yield first
+    yield from rest
@@ -0,0 +1,204 @@
+"""Adaptive download concurrency for Converso Downloader"""
+
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+from .metrics import CONCURRENCY_DECISIONS, CONCURRENCY_LIMIT
+
+
+class ConcurrencyController:
+    """
+    AIMD limit on the number of downloads running at once
+    
+    Every interval the controller looks at what happened since its last
+    decision - bytes received by all jobs, per-job speeds from the progress
+    hook and throttling signals (HTTP 403/429, retries for them) - and:
+    
+    - halves the limit on throttling, then holds it for a cooldown; this
+      happens as soon as the signal arrives (at most once per interval),
+      since queued jobs would otherwise start into the same 429s
+    - also backs off when per-job speed collapses while the aggregate does
+      not grow (per-connection throttling: more connections only add retries)
+    - adds one slot while the current slots are all in use and the last
+      added slot raised aggregate throughput by at least MIN_GAIN
+    - takes the slot back when it did not, and waits a cooldown before
+      probing again; the gain is judged one interval after the slot was
+      added, once the new download is past extraction and ramp-up
+    
+    Limits stay within [min_limit, max_limit]. Running downloads are never
+    stopped; a lower limit only delays the next start. Decisions are kept in
+    a short history (decisions) and exported as metrics. clock is injectable
+    so the policy can be driven step by step.
+    """
+    
+    INTERVAL = 5.0
+    BACKOFF = 0.5
+    MIN_GAIN = 0.05
+    SPEED_COLLAPSE = 0.3
+    COOLDOWN_INTERVALS = 3
+    THROTTLE_CLASSES = ('http_403', 'http_429')
+    HISTORY = 100
+    
+    def __init__(self, min_limit: int = 1, max_limit: int = 8, initial: Optional[int] = None,
+                 interval: float = INTERVAL, clock: Callable[[], float] = time.monotonic):
+        if min_limit < 1 or max_limit < min_limit:
+            raise ValueError("Concurrency bounds must satisfy 1 <= min_limit <= max_limit")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = min(max(initial or min_limit, min_limit), max_limit)
+        self.interval = interval
+        self.clock = clock
+        self.decisions: deque = deque(maxlen=self.HISTORY)
+        
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._window_start = clock()
+        self._bytes = 0
+        self._throttled = 0
+        self._saturated = False
+        self._speeds: Dict[str, float] = {}
+        self._reference_speed: Optional[float] = None
+        self._last_throughput: Optional[float] = None
+        # Throughput before the last added slot, while its effect is measured
+        self._probe_base: Optional[float] = None
+        self._probe_settled = False
+        self._cooldown_until = 0.0
+        self._last_backoff: Optional[float] = None
+        
+        CONCURRENCY_LIMIT.set(self.limit)
+    
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Wait for a free slot; False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._in_flight >= self.limit:
+                self._saturated = True
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining if remaining is not None else 1.0)
+            self._in_flight += 1
+            if self._in_flight >= self.limit:
+                self._saturated = True
+            return True
+    
+    def release(self, job_id: Optional[str] = None):
+        """Give a slot back when a download ends"""
+        with self._cond:
+            self._in_flight = max(0, self._in_flight - 1)
+            if job_id is not None:
+                self._speeds.pop(job_id, None)
+            self._cond.notify()
+        self.maybe_adjust()
+    
+    def record_progress(self, job_id: str, delta_bytes: int, speed: Optional[float]):
+        """Bytes received by a job since its last report, and its current speed"""
+        with self._cond:
+            self._bytes += max(0, delta_bytes)
+            if speed:
+                self._speeds[job_id] = speed
+        self.maybe_adjust()
+    
+    def record_error(self, error_class: str):
+        """A failed request or retry, classified by metrics.classify_error"""
+        if error_class not in self.THROTTLE_CLASSES:
+            return
+        with self._cond:
+            self._throttled += 1
+            urgent = self._last_backoff is None or self.clock() - self._last_backoff >= self.interval
+        if urgent:
+            self.adjust()
+        else:
+            self.maybe_adjust()
+    
+    def maybe_adjust(self) -> Optional[Dict]:
+        """Decide if an interval has passed since the last decision"""
+        if self.clock() - self._window_start < self.interval:
+            return None
+        return self.adjust()
+    
+    def adjust(self) -> Dict:
+        """Make one decision from the signals gathered since the previous one"""
+        with self._cond:
+            now = self.clock()
+            elapsed = max(now - self._window_start, 1e-6)
+            throughput = self._bytes / elapsed
+            speed = statistics.median(self._speeds.values()) if self._speeds else None
+            previous = self.limit
+            new_limit, reason = self._decide(now, throughput, speed)
+            
+            self.limit = new_limit
+            decision = {
+                'time': now,
+                'reason': reason,
+                'previous': previous,
+                'limit': new_limit,
+                'throughput': round(throughput),
+                'median_job_speed': round(speed) if speed else None,
+                'throttle_signals': self._throttled,
+                'in_flight': self._in_flight,
+            }
+            self.decisions.append(decision)
+            
+            if reason not in ('throttled', 'speed_collapse') and speed:
+                self._reference_speed = speed
+            self._last_throughput = throughput
+            self._window_start = now
+            self._bytes = 0
+            self._throttled = 0
+            self._saturated = self._in_flight >= self.limit
+            if new_limit > previous:
+                self._cond.notify(new_limit - previous)
+        
+        CONCURRENCY_LIMIT.set(new_limit)
+        CONCURRENCY_DECISIONS.inc(1, (reason,))
+        return decision
+    
+    def _decide(self, now: float, throughput: float, speed: Optional[float]):
+        """(new limit, reason); called with the lock held"""
+        if self._throttled:
+            self._probe_base = None
+            self._last_backoff = now
+            self._cooldown_until = now + self.COOLDOWN_INTERVALS * self.interval
+            return max(self.min_limit, int(self.limit * self.BACKOFF)), 'throttled'
+        
+        if (speed and self._reference_speed and speed < self.SPEED_COLLAPSE * self._reference_speed
+                and self._last_throughput is not None and throughput <= self._last_throughput):
+            self._probe_base = None
+            self._cooldown_until = now + self.COOLDOWN_INTERVALS * self.interval
+            return max(self.min_limit, int(self.limit * self.BACKOFF)), 'speed_collapse'
+        
+        if self._probe_base is not None:
+            if not self._probe_settled:
+                self._probe_settled = True
+                return self.limit, 'settling'
+            base, self._probe_base = self._probe_base, None
+            if throughput < base * (1 + self.MIN_GAIN):
+                # The last slot bought nothing - give it back and stop probing for a while
+                self._cooldown_until = now + self.COOLDOWN_INTERVALS * self.interval
+                return max(self.min_limit, self.limit - 1), 'no_gain'
+        
+        if not self._saturated:
+            return self.limit, 'idle'
+        if self.limit >= self.max_limit:
+            return self.limit, 'at_max'
+        if now < self._cooldown_until:
+            return self.limit, 'cooldown'
+        
+        self._probe_base = throughput
+        self._probe_settled = False
+        return self.limit + 1, 'probe'
+    
+    def snapshot(self) -> Dict:
+        """Current state and recent decisions, for /concurrency and the CLI"""
+        with self._cond:
+            return {
+                'limit': self.limit,
+                'min_limit': self.min_limit,
+                'max_limit': self.max_limit,
+                'in_flight': self._in_flight,
+                'decisions': list(self.decisions),
+            }
@@ -1,17 +1,58 @@
 """Video downloader using yt-dlp for Converso Pro Downloader"""
 
-import yt_dlp
+from yt_dlp.postprocessor.common import PostProcessor
+from yt_dlp.utils import PostProcessingError, download_range_func
 import os
-from typing import Dict, Optional, Callable
+import re
+import shutil
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait
+from typing import Dict, Iterator, List, Optional, Callable
 from pathlib import Path
 import time
 
+from .metrics import (
+    CACHE_REQUESTS, COALESCED_DOWNLOADS, DOWNLOADED_BYTES, ERRORS, JOB_SPEED, PHASE_SECONDS, RETRIES,
+    classify_error
+)
+from .file_utils import FileManager
+from .format_handler import FormatRecord
+from .governor import GOVERNOR
+from .integrity import IntegrityChecker
+from .manifest import OUTPUTS
+from .planner import BatchPlanner
+from .singleflight import Flight, SingleFlight
+from .tracing import Tracer, JobProfiler
+from .url_canon import URLCanonicalizer
+from .ydl_pool import YDL_POOL
+
 
 class VideoInfoExtractor:
     """Handles video information extraction"""
     
+    # Extraction profiles, cheapest first, mapped to yt-dlp extractor arguments:
+    #   card  - metadata only: web client from the watch page, no JS player, no manifests
+    #   audio - every client, but no DASH/HLS manifests (adaptive audio is in the player response)
+    #   full  - everything
+    PROFILES = {
+        'card': {'youtube': {'player_client': ['web'], 'player_skip': ['configs', 'js'],
+                             'skip': ['dash', 'hls', 'translated_subs']}},
+        'audio': {'youtube': {'skip': ['dash', 'hls', 'translated_subs']}},
+        'full': {},
+    }
+    PROFILE_RANK = {'card': 0, 'audio': 1, 'full': 2}
+    
+    # Background extraction shared by every extractor instance
+    _executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='converso_extract')
+    
+    # Compact entries are small, but the cache is still bounded
+    CACHE_MAX_ENTRIES = 256
+    
     def __init__(self):
         self.cache = {}
+        self._pending: Dict[tuple, Future] = {}
+        self._lock = threading.Lock()
         self.ydl_opts = {
             'quiet': True,
             'no_warnings': True,
@@ -26,18 +67,34 @@ class VideoInfoExtractor:
         from .validators import URLValidator
         return URLValidator.is_valid_url(url)
     
-    def extract_info(self, url: str, use_cache: bool = True) -> Optional[Dict]:
+    def extract_info(self, url: str, use_cache: bool = True, tracer: Optional[Tracer] = None,
+                     profile: str = 'full') -> Optional[Dict]:
         """
         Extract comprehensive video information
         Returns dict with video metadata and formats
+        profile limits the work done (see PROFILES); a cached entry from a
+        richer profile is reused, a poorer one is upgraded
         """
         # Check cache
-        if use_cache and url in self.cache:
-            return self.cache[url]
+        if use_cache and (cached := self.cached_info(url, profile)):
+            CACHE_REQUESTS.inc(1, ('metadata', 'hit'))
+            if tracer:
+                tracer.instant('extract_info (cache hit)', url=url)
+            return cached
+        
+        CACHE_REQUESTS.inc(1, ('metadata', 'miss'))
+        
+        ydl_opts = self.ydl_opts
+        if extractor_args := self.PROFILES[profile]:
+            ydl_opts = {**self.ydl_opts, 'extractor_args': extractor_args}
         
         try:
-            with yt_dlp.YoutubeDL(self.ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=False)
+            with YDL_POOL.acquire(ydl_opts) as ydl, PHASE_SECONDS.time(('extract',)):
+                if tracer:
+                    with tracer.span('extract_info', url=url):
+                        info = ydl.extract_info(url, download=False)
+                else:
+                    info = ydl.extract_info(url, download=False)
                 
                 if not info:
                     return None
@@ -54,25 +111,161 @@ class VideoInfoExtractor:
                     'upload_date': self._format_date(info.get('upload_date')),
                     'description': info.get('description', ''),
                     'thumbnail': self.get_best_thumbnail(info.get('thumbnails', [])),
-                    'formats': info.get('formats', []),
-                    'subtitles': info.get('subtitles', {}),
-                    'automatic_captions': info.get('automatic_captions', {}),
+                    'formats': FormatRecord.from_formats(info.get('formats')),
+                    'chapters': self._get_chapters(info.get('chapters')),
+                    'subtitles': self._get_subtitle_languages(info.get('subtitles')),
+                    'automatic_captions': self._get_subtitle_languages(info.get('automatic_captions')),
                     'categories': info.get('categories', []),
                     'tags': info.get('tags', []),
                     'resolution': self._get_max_resolution(info.get('formats', [])),
-                    'estimated_size': self._estimate_total_size(info.get('formats', [])),
+                    'estimated_size': self._estimate_total_size(info.get('formats', []), info.get('duration')),
                     'webpage_url': info.get('webpage_url', url),
+                    'profile': profile,
                 }
                 
-                # Cache the result
-                self.cache[url] = processed_info
+                # Cache the result, never replacing a richer entry
+                self._store(url, processed_info)
                 
                 return processed_info
-                
+        
         except Exception as e:
+            ERRORS.inc(1, ('extract', classify_error(e)))
             print(f"Error extracting info: {e}")
             return None
     
+    def extract_info_async(self, url: str, use_cache: bool = True, profile: str = 'full') -> Future:
+        """
+        Extract video information in the background
+        Concurrent requests for the same URL and profile share one extraction;
+        joining a background extraction (e.g. a prefetch) promotes it to the
+        interactive request lane
+        """
+        if use_cache and (cached := self.cached_info(url, profile)):
+            CACHE_REQUESTS.inc(1, ('metadata', 'hit'))
+            future = Future()
+            future.set_result(cached)
+            return future
+        
+        key = (self._key(url), profile)
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                future = self._executor.submit(self.extract_info, url, use_cache, None, profile)
+                self._pending[key] = future
+                future.add_done_callback(lambda done: self._release(key, done))
+            else:
+                GOVERNOR.promote(getattr(future, 'lane', None))
+        return future
+    
+    def extract_info_shared(self, url: str, profile: str = 'full') -> Optional[Dict]:
+        """
+        Extract in the calling thread (e.g. a prefetch worker) while publishing
+        the in-flight extraction, so extract_info_async callers join it
+        """
+        key = (self._key(url), profile)
+        with self._lock:
+            if cached := self.cached_info(url, profile):
+                return cached
+            pending = self._pending.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._pending[key] = Future()
+                pending.set_running_or_notify_cancel()
+                pending.lane = GOVERNOR.current()
+        
+        if not owner:
+            return pending.result()
+        
+        try:
+            info = self.extract_info(url, profile=profile)
+            pending.set_result(info)
+            return info
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            self._release(key, pending)
+    
+    def extract_many(self, urls: list, profile: str = 'card', max_workers: int = 4) -> Iterator[tuple]:
+        """
+        Extract many URLs concurrently, yielding (url, info) as each completes
+        Defaults to the card profile for cheap batch previews; requests go
+        through the background lane
+        """
+        def extract(url: str) -> Optional[Dict]:
+            with GOVERNOR.background():
+                return self.extract_info(url, True, None, profile)
+        
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='converso_preview') as executor:
+            futures = {executor.submit(extract, url): url for url in urls}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+    
+    def _store(self, url: str, processed_info: Dict):
+        """Cache compact info unless a richer entry exists"""
+        key = self._key(url)
+        with self._lock:
+            if self.cached_info(url, processed_info['profile']) is None:
+                self.cache.pop(key, None)
+                if len(self.cache) >= self.CACHE_MAX_ENTRIES:
+                    # Dicts keep insertion order - drop the oldest entry
+                    self.cache.pop(next(iter(self.cache)))
+                self.cache[key] = processed_info
+    
+    def cached_info(self, url: str, profile: str) -> Optional[Dict]:
+        """Cached info for url if it came from this profile or a richer one"""
+        cached = self.cache.get(self._key(url))
+        if cached and self.PROFILE_RANK[cached.get('profile', 'full')] >= self.PROFILE_RANK[profile]:
+            return cached
+        return None
+    
+    @staticmethod
+    def _key(url: str) -> str:
+        """
+        Cache key for url - every spelling of one video (youtu.be, shorts,
+        m., extra parameters, timestamps) shares an entry. URLs that also carry
+        a playlist are kept as is, since yt-dlp extracts the playlist for them.
+        """
+        result = URLCanonicalizer.canonicalize(url)
+        if result.kind == 'video' and not result.playlist_id:
+            return result.key
+        return url
+    
+    def _release(self, key: tuple, future: Future):
+        """Forget an in-flight extraction once it is done"""
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+    
+    def preview_info(self, entry: Dict) -> Dict:
+        """
+        Build a partial video info dict from a search result entry
+        Enough to draw the video card while the full extraction runs
+        """
+        duration = int(entry.get('duration') or 0)
+        return {
+            'id': entry.get('id', ''),
+            'title': entry.get('title', 'Unknown Title'),
+            'uploader': entry.get('uploader', 'Unknown'),
+            'duration': duration,
+            'duration_formatted': self._format_duration(duration),
+            'view_count': entry.get('view_count') or 0,
+            'like_count': None,
+            'upload_date': 'Loading...',
+            'description': '',
+            'thumbnail': entry.get('thumbnail', ''),
+            'formats': [],
+            'chapters': [],
+            'subtitles': {},
+            'automatic_captions': {},
+            'categories': [],
+            'tags': [],
+            'resolution': 'Loading...',
+            'estimated_size': 'Loading...',
+            'webpage_url': entry.get('url', ''),
+            'partial': True,
+        }
+    
     def get_best_thumbnail(self, thumbnails: list) -> str:
         """Select highest quality thumbnail"""
         if not thumbnails:
@@ -123,6 +316,25 @@ class VideoInfoExtractor:
         except Exception:
             return date_str
     
+    def _get_chapters(self, chapters: Optional[list]) -> list:
+        """Keep only the chapter fields needed for embedding and splitting"""
+        return [
+            {
+                'title': ch.get('title') or f'Chapter {i + 1}',
+                'start_time': ch.get('start_time') or 0,
+                'end_time': ch.get('end_time'),
+            }
+            for i, ch in enumerate(chapters or [])
+            if ch
+        ]
+    
+    def _get_subtitle_languages(self, subtitles: Optional[Dict]) -> Dict[str, list]:
+        """Keep the available languages and extensions, not every track URL"""
+        return {
+            lang: [track.get('ext') for track in tracks if track]
+            for lang, tracks in (subtitles or {}).items()
+        }
+    
     def _get_max_resolution(self, formats: list) -> str:
         """Get maximum available resolution"""
         max_height = 0
@@ -132,39 +344,198 @@ class VideoInfoExtractor:
         
         return f"{max_height}p" if max_height > 0 else "Unknown"
     
-    def _estimate_total_size(self, formats: list) -> str:
-        """Estimate size of best quality download"""
-        from .file_utils import FileManager
+    def _estimate_total_size(self, formats: list, duration: Optional[float] = None) -> str:
+        """Estimate size of the best quality download (video + audio pair)"""
+        selected = BatchPlanner.select_formats(formats, 'best')
+        return FileManager.format_size(BatchPlanner.estimate_sizes([selected], [duration])[0])
+
+
+class _DownloadLogger:
+    """Pass yt-dlp output through to the console while counting retries"""
+    
+    def __init__(self, on_retry: Optional[Callable[[str], None]] = None):
+        self.on_retry = on_retry
+    
+    def debug(self, msg: str):
+        if not msg.startswith('[debug] '):
+            print(msg)
+    
+    def info(self, msg: str):
+        print(msg)
+    
+    def warning(self, msg: str):
+        if 'Retrying' in msg:
+            error_class = classify_error(msg)
+            RETRIES.inc(1, (error_class,))
+            if self.on_retry:
+                self.on_retry(error_class)
+        print(f"WARNING: {msg}", file=sys.stderr)
+    
+    def error(self, msg: str):
+        print(msg, file=sys.stderr)
+
+
+class _FreeSpaceCheck(PostProcessor):
+    """
+    before_dl step: fail early when the selected formats will not fit
+    Separate video/audio streams need room for both plus the merged file
+    """
+    
+    def __init__(self, downloader, work_path: Path, output_path: Path):
+        super().__init__(downloader)
+        self.work_path = work_path
+        self.output_path = output_path
+    
+    @staticmethod
+    def estimate_bytes(info: Dict) -> int:
+        """filesize, else filesize_approx, else bitrate x duration, summed over the requested formats"""
+        return BatchPlanner.estimate_sizes([info.get('requested_formats') or [info]], [info.get('duration')])[0]
+    
+    def run(self, info):
+        needed = self.estimate_bytes(info)
+        if not needed:
+            return [], info
         
-        max_size = 0
-        for fmt in formats:
-            if size := (fmt.get('filesize') or fmt.get('filesize_approx', 0)):
-                max_size = max(max_size, size)
+        merging = len(info.get('requested_formats') or []) > 1
+        checks = [(self.work_path, needed * 2 if merging else needed)]
+        if self.work_path != self.output_path and not FileManager.same_filesystem(self.work_path, self.output_path):
+            checks.append((self.output_path, needed))
         
-        return FileManager.format_size(max_size)
+        for path, required in checks:
+            free = FileManager.free_space(str(path))
+            if free is not None and free < required:
+                raise PostProcessingError(
+                    f"Not enough free space in {path}: about {FileManager.format_size(required)} needed, "
+                    f"{FileManager.format_size(free)} available"
+                )
+        return [], info
+
+
+class _RecordOutput(PostProcessor):
+    """
+    before_dl step: add the output to the manifest before anything is written,
+    so the retention GC knows its intermediates belong to this app
+    """
+    
+    def __init__(self, downloader, stems: List[str]):
+        super().__init__(downloader)
+        self.stems = stems
+    
+    def run(self, info):
+        self.stems.append(OUTPUTS.record(self._downloader.prepare_filename(info)))
+        return [], info
 
 
 class VideoDownloader:
     """Handles video downloading with progress tracking"""
     
-    def __init__(self, output_path: str, progress_callback: Optional[Callable] = None):
+    # Seconds fetched on each side of a frame-accurate clip so the local cut has whole GOPs
+    SECTION_PADDING = 10
+    
+    # Downloads running in this process, so background work can stay out of their way
+    _active = 0
+    _active_lock = threading.Lock()
+    
+    # Identical downloads in flight; later callers join the first one
+    _flights = SingleFlight()
+    
+    # Options that change what ends up on disk and so are part of the single-flight key.
+    # Bookkeeping options (trace, profile, scratch_dir, add_to_library) are not: the leader's apply.
+    OUTPUT_OPTIONS = (
+        'merge_output_format', 'extract_audio', 'audio_format', 'audio_quality',
+        'embed_thumbnail', 'embed_metadata', 'embed_chapters', 'split_chapters',
+        'download_subtitles', 'subtitle_languages', 'subtitle_format',
+        'section_start', 'section_end', 'section_chapter', 'frame_accurate', 'digest_algorithm',
+        'digest_read_back',
+    )
+    
+    def __init__(self, output_path: str, progress_callback: Optional[Callable] = None,
+                 job_id: Optional[str] = None):
         self.output_path = Path(output_path)
         self.output_path.mkdir(parents=True, exist_ok=True)
         self.progress_callback = progress_callback
         self.is_cancelled = False
+        self.job_id = job_id or f"dl-{id(self):x}"
+        self.tracer: Optional[Tracer] = None
+        self._bytes_seen: Dict[str, int] = {}
+        self._phase_started: Dict[str, float] = {}
+        self._open_phases: Dict[str, str] = {}
+        self._timings: Dict[str, float] = {}
+        self._output_stems: List[str] = []
     
     def download(self, url: str, format_id: str = 'best', options: Optional[Dict] = None) -> Dict:
         """
         Download video with specified format
+        A request identical to one already running (same video, format spec,
+        output options and folder) waits for that download and shares its
+        progress and result instead of fetching the same bytes again.
         Returns: dict with download status and file path
         """
         options = options or {}
+        key = self._flight_key(url, format_id, options)
+        
+        while True:
+            flight, leader = VideoDownloader._flights.join(key, self.progress_callback, self.job_id)
+            if leader:
+                break
+            COALESCED_DOWNLOADS.inc()
+            result = self._follow(flight)
+            if result is not None:
+                return result
+            # The leader was cancelled - try again, most likely as the new leader
+        
+        # Progress goes through the flight so followers see it too
+        own_callback = self.progress_callback
+        self.progress_callback = flight.publish
+        try:
+            result = self._download(url, format_id, options)
+        except BaseException as e:
+            VideoDownloader._flights.finish(flight, error=e)
+            raise
+        finally:
+            self.progress_callback = own_callback
+        
+        VideoDownloader._flights.finish(flight, result, abandoned=self.is_cancelled)
+        return result
+    
+    def _follow(self, flight: Flight) -> Optional[Dict]:
+        """
+        Wait for the leader's result; None means the leader was cancelled
+        and this caller should retry. Cancelling a follower only detaches it.
+        """
+        try:
+            while not wait([flight.future], timeout=0.2).done:
+                if self.is_cancelled:
+                    return {'success': False, 'error': 'Download cancelled by user'}
+            if flight.abandoned and not self.is_cancelled:
+                return None
+            return dict(flight.future.result(), coalesced_with=flight.owner)
+        finally:
+            flight.unsubscribe(self.progress_callback)
+    
+    def _flight_key(self, url: str, format_id: str, options: Dict) -> tuple:
+        """Single-flight key: canonical video, format spec, output options and folder"""
+        spec = f"{format_id}+{options['merge_with']}" if options.get('merge_with') else format_id
+        output_options = tuple(
+            (name, repr(options[name])) for name in self.OUTPUT_OPTIONS if options.get(name) not in (None, False, '')
+        )
+        return VideoInfoExtractor._key(url), spec, str(self.output_path.resolve()), output_options
+    
+    def _download(self, url: str, format_id: str, options: Dict) -> Dict:
+        """Run one download in this thread (download() decides whether to)"""
+        # In-progress files go to the scratch directory when one is configured
+        scratch = self._make_scratch(options.get('scratch_dir'))
+        work_path = scratch or self.output_path
         
         # Build yt-dlp options
         ydl_opts = {
             'format': format_id,
-            'outtmpl': str(self.output_path / '%(title)s.%(ext)s'),
+            'outtmpl': str(work_path / '%(title)s.%(ext)s'),
             'progress_hooks': [self._progress_hook],
+            'postprocessor_hooks': [self._postprocessor_hook],
+            'logger': _DownloadLogger(self._report_retry),
+            # Progress is reported through the hook, not the console bar
+            'noprogress': True,
             'quiet': False,
             'no_warnings': False,
             # Use most compatible format for merging (H.264 + AAC in MP4)
@@ -201,9 +572,11 @@ class VideoDownloader:
                 'key': 'EmbedThumbnail',
             })
         
-        if options.get('embed_metadata'):
+        if options.get('embed_metadata') or options.get('embed_chapters'):
             ydl_opts.setdefault('postprocessors', []).append({
                 'key': 'FFmpegMetadata',
+                'add_metadata': bool(options.get('embed_metadata')),
+                'add_chapters': bool(options.get('embed_chapters')),
             })
         
         # Subtitle options
@@ -212,41 +585,257 @@ class VideoDownloader:
             ydl_opts['subtitleslangs'] = options.get('subtitle_languages', ['en'])
             ydl_opts['subtitlesformat'] = options.get('subtitle_format', 'srt')
         
+        # Section (clip) options - only the fragments covering the range are fetched
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            section = self._build_section(options)
+        except ValueError as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+        
+        if section:
+            ydl_opts['download_ranges'] = section['ranges']
+            ydl_opts['outtmpl'] = str(work_path / '%(title)s [%(section_start)s-%(section_end)s].%(ext)s')
+        
+        # Optional tracing / profiling for this job
+        self.tracer = Tracer(f"{self.job_id}-{int(time.time())}", options.get('trace_dir')) if options.get('trace') else None
+        profiler = None
+        if options.get('profile'):
+            profiler = JobProfiler(self.tracer.name if self.tracer else self.job_id, options['profile'], options.get('trace_dir'))
+            profiler.start()
+        
+        self._phase_started.clear()
+        self._open_phases.clear()
+        self._timings = {}
+        self._phase_begin('extract', 'extract', url=url)
+        self._output_stems = []
+        result = None
+        with VideoDownloader._active_lock:
+            VideoDownloader._active += 1
+        try:
+            result = self._execute(url, ydl_opts, options, section, scratch)
+        finally:
+            with VideoDownloader._active_lock:
+                VideoDownloader._active -= 1
+            OUTPUTS.release(self._output_stems, finished=bool(result and result.get('success')))
+            if scratch:
+                shutil.rmtree(scratch, ignore_errors=True)
+            # Close whatever phase was still running (e.g. extraction that failed)
+            for key, phase in list(self._open_phases.items()):
+                self._phase_end(key, phase)
+        
+        result['timings'] = {phase: round(seconds, 3) for phase, seconds in self._timings.items()}
+        
+        if profiler:
+            result['profile_file'] = profiler.stop()
+        if self.tracer:
+            result['trace_file'] = self.tracer.save()
+        
+        return result
+    
+    def _execute(self, url: str, ydl_opts: Dict, options: Dict, section: Optional[Dict],
+                 scratch: Optional[Path] = None) -> Dict:
+        """Run yt-dlp and the local post-steps; returns the result dict"""
+        try:
+            with YDL_POOL.acquire(ydl_opts) as ydl:
+                # Removed again when the pooled instance is released
+                ydl.add_post_processor(_FreeSpaceCheck(ydl, scratch or self.output_path, self.output_path), when='before_dl')
+                ydl.add_post_processor(_RecordOutput(ydl, self._output_stems), when='before_dl')
                 info = ydl.extract_info(url, download=True)
                 
                 # Get the downloaded file path
                 filename = ydl.prepare_filename(info)
                 
+                # Sections are named per range, so take the path yt-dlp actually wrote
+                if section and info.get('requested_downloads'):
+                    filename = info['requested_downloads'][0].get('filepath') or filename
                 # If audio was extracted, update extension
-                if options.get('extract_audio'):
+                elif options.get('extract_audio'):
                     filename = os.path.splitext(filename)[0] + f".{options.get('audio_format', 'mp3')}"
                 # If merged, the output will be in merge_output_format
                 elif options.get('merge_output_format'):
                     filename = os.path.splitext(filename)[0] + f".{options['merge_output_format']}"
                 
-                return {
+                if section and section['trim'] and os.path.exists(filename):
+                    if not self._traced('trim_section', self._trim_section, filename, section['trim']):
+                        return {
+                            'success': False,
+                            'error': 'Frame-accurate cut failed (requires FFmpeg)'
+                        }
+                
+                result = {
                     'success': True,
                     'filepath': filename,
                     'title': info.get('title', 'Unknown'),
                     'filesize': os.path.getsize(filename) if os.path.exists(filename) else 0
                 }
                 
+                # Chapter splitting runs on the finished file with stream copy
+                if options.get('split_chapters') and not section and info.get('chapters') and os.path.exists(filename):
+                    from .ffmpeg_tools import FFmpegTools
+                    result['chapter_files'] = self._traced(
+                        'split_chapters',
+                        FFmpegTools.split_chapters,
+                        filename,
+                        info['chapters'],
+                        max_workers=options.get('split_workers')
+                    )
+                
+                if scratch:
+                    self._traced('finalize', self._finalize, result, scratch, options.get('digest_algorithm'))
+                    if not result['success']:
+                        return result
+                
+                # Only the cross-filesystem copy streams the bytes through us; anything else costs a re-read
+                if (options.get('digest_algorithm') and options.get('digest_read_back')
+                        and 'digest' not in result and os.path.exists(result['filepath'])):
+                    self._traced('digest', self._digest, result, options['digest_algorithm'])
+                
+                if options.get('add_to_library') and os.path.exists(result['filepath']):
+                    self._traced('library', self._add_to_library, info, result)
+                
+                return result
+        
         except Exception as e:
+            ERRORS.inc(1, ('download', classify_error(e)))
             return {
                 'success': False,
                 'error': str(e)
             }
+        finally:
+            JOB_SPEED.remove((self.job_id,))
+    
+    def _make_scratch(self, scratch_dir: Optional[str]) -> Optional[Path]:
+        """Private working directory for this download under scratch_dir"""
+        if not scratch_dir:
+            return None
+        try:
+            scratch = Path(scratch_dir) / f"{self.job_id}-{int(time.time() * 1000):x}"
+            scratch.mkdir(parents=True, exist_ok=True)
+            return scratch
+        except OSError as e:
+            print(f"Scratch directory unavailable, downloading in place: {e}")
+            return None
+    
+    def _finalize(self, result: Dict, scratch: Path, digest_algorithm: Optional[str] = None):
+        """
+        Move the finished file (and chapter files) from scratch into output_path
+        A cross-filesystem streamed copy also produces the file's digest
+        """
+        methods = set()
+        
+        def place(path: str, hasher=None) -> str:
+            dst = str(self.output_path / os.path.relpath(path, scratch))
+            method = FileManager.move_into_place(path, dst, hasher)
+            methods.add(method)
+            if hasher is not None and method == 'copy':
+                result['digest'] = IntegrityChecker.format_digest(hasher)
+            return dst
+        
+        try:
+            if os.path.exists(result['filepath']):
+                hasher = IntegrityChecker.new_hasher(digest_algorithm) if digest_algorithm else None
+                result['filepath'] = place(result['filepath'], hasher)
+            if result.get('chapter_files'):
+                result['chapter_files'] = [place(path) for path in result['chapter_files']]
+        except OSError as e:
+            ERRORS.inc(1, ('finalize', classify_error(e)))
+            result.update({'success': False, 'error': f"Could not move the download into place: {e}"})
+            return
+        
+        result['finalize_method'] = ', '.join(sorted(methods))
+    
+    @staticmethod
+    def _digest(result: Dict, algorithm: str):
+        """
+        Fingerprint the finished file by reading it back (digest_read_back)
+        This is a second full pass over the file - cheap while its pages are
+        still cached, a full disk read otherwise; a digest error never fails
+        the download
+        """
+        try:
+            result['digest'] = IntegrityChecker.digest_file(result['filepath'], algorithm)
+        except (OSError, ValueError) as e:
+            print(f"Error computing digest: {e}")
+    
+    @staticmethod
+    def _add_to_library(info: Dict, result: Dict):
+        """Index the finished file; a library error never fails the download"""
+        from .library import MediaLibrary
+        try:
+            library = MediaLibrary.shared()
+            result['library_id'] = library.add(info, result['filepath'], result['filesize'], result.get('digest'))
+            if result.get('digest'):
+                # Same content already in the library under another name
+                duplicate = library.find_by_digest(result['digest'], exclude=result['filepath'])
+                if duplicate:
+                    result['duplicate_of'] = duplicate['filepath']
+        except Exception as e:
+            print(f"Error adding to library: {e}")
+    
+    def _build_section(self, options: Dict) -> Optional[Dict]:
+        """
+        Build yt-dlp download ranges from section_start/section_end/section_chapter
+        Returns None when the whole video is wanted
+        """
+        start = options.get('section_start')
+        end = options.get('section_end')
+        chapter = options.get('section_chapter')
+        
+        if start is None and end is None and not chapter:
+            return None
+        
+        if chapter:
+            # Chapter cuts are keyframe aligned by yt-dlp's stream copy
+            return {
+                'ranges': download_range_func([f'^{re.escape(chapter)}$'], []),
+                'trim': None,
+            }
+        
+        start = start or 0
+        if end is not None and end <= start:
+            raise ValueError("Section end must be after section start")
+        
+        trim = None
+        if options.get('frame_accurate'):
+            # Fetch a padded, keyframe-aligned range and cut it exactly on disk
+            padded_start = max(start - self.SECTION_PADDING, 0)
+            padded_end = end + self.SECTION_PADDING if end is not None else float('inf')
+            trim = {
+                'start': start - padded_start,
+                'end': (end - padded_start) if end is not None else None,
+            }
+            start, end = padded_start, padded_end
+        
+        return {
+            'ranges': download_range_func(None, [(start, end if end is not None else float('inf'))]),
+            'trim': trim,
+        }
+    
+    def _trim_section(self, filepath: str, trim: Dict) -> bool:
+        """Cut a padded clip down to the exact requested frames"""
+        from .ffmpeg_tools import FFmpegTools
+        
+        base, ext = os.path.splitext(filepath)
+        trimmed = f"{base}.trim{ext}"
+        if not FFmpegTools.cut(filepath, trimmed, trim['start'], trim['end'], frame_accurate=True):
+            if os.path.exists(trimmed):
+                os.remove(trimmed)
+            return False
+        
+        os.replace(trimmed, filepath)
+        return True
     
     def _progress_hook(self, d: Dict):
         """Hook for progress updates"""
         if self.is_cancelled:
             raise Exception("Download cancelled by user")
         
+        status = d.get('status')
+        self._record_progress(status, d)
+        
         if self.progress_callback:
-            status = d.get('status')
-            
             if status == 'downloading':
                 progress_info = {
                     'status': 'downloading',
@@ -264,6 +853,78 @@ class VideoDownloader:
                     'filename': d.get('filename', '')
                 })
     
+    def _report_retry(self, error_class: str):
+        """Let the caller see retries (e.g. 403/429 throttling) as they happen"""
+        if self.progress_callback:
+            self.progress_callback({'status': 'retry', 'error_class': error_class})
+    
+    def _record_progress(self, status: str, d: Dict):
+        """Update throughput and phase metrics (kept cheap - runs on every hook call)"""
+        filename = d.get('filename', '')
+        
+        if status == 'downloading':
+            downloaded = d.get('downloaded_bytes') or 0
+            delta = downloaded - self._bytes_seen.get(filename, 0)
+            if delta > 0:
+                DOWNLOADED_BYTES.inc(delta)
+            self._bytes_seen[filename] = downloaded
+            JOB_SPEED.set(d.get('speed') or 0, (self.job_id,))
+            
+            if filename not in self._phase_started:
+                # First bytes of this file - extraction is over
+                self._phase_end('extract', 'extract')
+                self._phase_begin(filename, 'download', file=os.path.basename(filename))
+        
+        elif status == 'finished':
+            self._phase_end('extract', 'extract')
+            self._phase_end(filename, 'download')
+    
+    def _postprocessor_hook(self, d: Dict):
+        """Time merge and post-processing steps"""
+        name = d.get('postprocessor', '')
+        key = f"pp:{name}"
+        phase = 'merge' if name == 'Merger' else 'postprocess'
+        
+        if d.get('status') == 'started':
+            self._phase_end('extract', 'extract')
+            self._phase_begin(key, phase, postprocessor=name)
+        elif d.get('status') == 'finished':
+            self._phase_end(key, phase)
+    
+    def _phase_begin(self, key: str, phase: str, **args):
+        """Start timing a phase (metrics always, trace span when tracing)"""
+        if key in self._phase_started:
+            return
+        self._phase_started[key] = time.perf_counter()
+        self._open_phases[key] = phase
+        if self.tracer:
+            self.tracer.begin(key, phase, **args)
+    
+    def _phase_end(self, key: str, phase: str):
+        """Finish timing a phase started with _phase_begin"""
+        started = self._phase_started.pop(key, None)
+        if started is None:
+            return
+        self._open_phases.pop(key, None)
+        elapsed = time.perf_counter() - started
+        self._timings[phase] = self._timings.get(phase, 0) + elapsed
+        PHASE_SECONDS.observe(elapsed, (phase,))
+        if self.tracer:
+            self.tracer.end(key)
+    
+    def _traced(self, phase: str, func: Callable, *args, **kwargs):
+        """Run a local post-step as its own phase"""
+        self._phase_begin(phase, phase)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self._phase_end(phase, phase)
+    
+    @staticmethod
+    def active_downloads() -> int:
+        """Number of downloads currently running in this process"""
+        return VideoDownloader._active
+    
     def cancel(self):
         """Cancel ongoing download"""
         self.is_cancelled = True
@@ -285,7 +946,7 @@ class PlaylistExtractor:
         }
         
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            with YDL_POOL.acquire(ydl_opts) as ydl:
                 info = ydl.extract_info(playlist_url, download=False)
                 
                 if not info or 'entries' not in info:
@@ -311,7 +972,7 @@ class PlaylistExtractor:
                 }
                 
                 return urls, playlist_info
-                
+        
         except Exception as e:
             print(f"Error extracting playlist: {e}")
             return [], {}
@@ -0,0 +1,193 @@
+"""Process-wide download engine shared by all sessions of Converso Downloader"""
+
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+from .concurrency import ConcurrencyController
+from .downloader import VideoInfoExtractor
+from .jobs import DownloadJob, JobManager
+from .prefetch import MetadataPrefetcher
+from .youtube_search import YouTubeSearcher
+
+
+class ConversoEngine:
+    """
+    The one metadata cache, search cache, prefetch pool, job queue and GC of
+    the process
+    
+    Streamlit runs every browser tab as its own session; giving each one its
+    own extractor and download threads made memory and connections grow with
+    the number of open tabs. Sessions instead get an EngineSession: a small
+    view that tags the jobs it submits with its owner id and only lists
+    those, while the work itself runs on the shared, bounded pools.
+    
+    Streamlit does not report closed tabs, so a view unused for SESSION_TTL
+    is closed (its queued prefetches dropped; its jobs keep running). A tab
+    coming back after that gets a fresh view for the same owner id.
+    """
+    
+    SESSION_TTL = 30 * 60
+    # Idle views are looked for at most this often
+    REAP_INTERVAL = 60
+    
+    def __init__(self, download_path: str, max_workers: int = 3,
+                 prefetch_results: int = MetadataPrefetcher.TOP_K,
+                 controller: Optional[ConcurrencyController] = None):
+        self.extractor = VideoInfoExtractor()
+        self.searcher = YouTubeSearcher()
+        self.prefetcher = MetadataPrefetcher(self.extractor, top_k=prefetch_results)
+        self.jobs = JobManager(download_path, max_workers=max_workers, extractor=self.extractor, controller=controller)
+        self.max_workers = controller.max_limit if controller else max_workers
+        self.retention = None
+        self._sessions: Dict[str, 'EngineSession'] = {}
+        self._lock = threading.Lock()
+        self._next_reap = time.time() + self.REAP_INTERVAL
+    
+    def session(self, owner: Optional[str] = None) -> 'EngineSession':
+        """View for one session (a new owner id when none is given)"""
+        owner = owner or uuid.uuid4().hex[:12]
+        now = time.time()
+        with self._lock:
+            view = self._sessions.get(owner)
+            if view is None:
+                view = self._sessions[owner] = EngineSession(self, owner)
+            view.last_seen = now
+            reap = now >= self._next_reap
+        if reap:
+            self.expire_sessions(now)
+        return view
+    
+    def close_session(self, owner: str, cancel_jobs: bool = False):
+        """Forget a session; its jobs keep running unless cancel_jobs"""
+        with self._lock:
+            self._sessions.pop(owner, None)
+        self.prefetcher.cancel(owner)
+        if cancel_jobs:
+            for job in self.jobs.list_jobs(owner):
+                self.jobs.cancel(job.id)
+    
+    def expire_sessions(self, now: Optional[float] = None) -> int:
+        """Close views unused for SESSION_TTL; returns how many"""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._next_reap = now + self.REAP_INTERVAL
+            idle = [owner for owner, view in self._sessions.items() if now - view.last_seen > self.SESSION_TTL]
+            for owner in idle:
+                del self._sessions[owner]
+        for owner in idle:
+            self.prefetcher.cancel(owner)
+        return len(idle)
+    
+    def start_retention(self, keep_history_days: int = 30, library=None) -> bool:
+        """Run the retention GC over the shared job history (once)"""
+        from .retention import RetentionManager
+        
+        with self._lock:
+            if self.retention is not None:
+                return False
+            # Every recorded download, including those written to a scratch directory
+            self.retention = RetentionManager(
+                None, keep_history_days, job_manager=self.jobs, library=library
+            )
+        self.retention.start()
+        return True
+    
+    def stats(self) -> Dict:
+        """Sessions and jobs currently known to the engine"""
+        self.expire_sessions()
+        with self._lock:
+            sessions = len(self._sessions)
+        active = sum(1 for job in self.jobs.list_jobs() if job.is_active)
+        return {
+            'sessions': sessions,
+            'active_jobs': active,
+            'job_workers': self.max_workers,
+            'concurrency_limit': self.jobs.controller.limit if self.jobs.controller else self.max_workers,
+            'threads': threading.active_count(),
+        }
+    
+    def shutdown(self):
+        """Stop background work (process exit / tests)"""
+        if self.retention:
+            self.retention.stop()
+        self.prefetcher.shutdown()
+        self.jobs.shutdown()
+
+
+class EngineSession:
+    """One session's view of the shared engine: its own jobs, shared everything else"""
+    
+    POLL_INTERVAL = 0.25
+    
+    def __init__(self, engine: ConversoEngine, owner: str):
+        self.engine = engine
+        self.owner = owner
+        self.last_seen = time.time()
+    
+    @property
+    def extractor(self) -> VideoInfoExtractor:
+        return self.engine.extractor
+    
+    @property
+    def searcher(self) -> YouTubeSearcher:
+        return self.engine.searcher
+    
+    def prefetch(self, results: List[Dict]) -> int:
+        """Warm the shared cache for this session's current result page"""
+        return self.engine.prefetcher.prefetch(results, self.owner)
+    
+    def submit(self, url: str, format_spec: Optional[str] = None, options: Optional[Dict] = None,
+               interactive: bool = False) -> DownloadJob:
+        """Queue a download on the shared worker pool under this session"""
+        return self.engine.jobs.submit(url, format_spec, options, self.owner, interactive)
+    
+    def jobs(self) -> List[DownloadJob]:
+        """This session's jobs, oldest first"""
+        return self.engine.jobs.list_jobs(self.owner)
+    
+    def cancel(self, job_id: str) -> bool:
+        """Cancel one of this session's jobs"""
+        job = self.engine.jobs.get(job_id)
+        if not job or job.owner != self.owner:
+            return False
+        return self.engine.jobs.cancel(job_id)
+    
+    def wait(self, job: DownloadJob, progress_callback: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """
+        Block until job is done, passing each new progress record to
+        progress_callback on the calling thread (e.g. a Streamlit script run)
+        """
+        last = None
+        while job.is_active:
+            if progress_callback and job.progress and job.progress is not last:
+                last = job.progress
+                progress_callback(last)
+            time.sleep(self.POLL_INTERVAL)
+        return job.result or {'success': False, 'error': f"Job {job.status}"}
+
+
+_ENGINE: Optional[ConversoEngine] = None
+_ENGINE_LOCK = threading.Lock()
+
+
+def get_engine(download_path: Optional[str] = None, max_workers: int = 3,
+               prefetch_results: int = MetadataPrefetcher.TOP_K,
+               max_adaptive_workers: int = 0) -> ConversoEngine:
+    """
+    The process-wide engine, created on first use
+    max_adaptive_workers > max_workers lets a ConcurrencyController move the
+    download limit between 1 and that bound, starting at max_workers.
+    Arguments only apply to that first call.
+    """
+    global _ENGINE
+    with _ENGINE_LOCK:
+        if _ENGINE is None:
+            if not download_path:
+                raise ValueError("download_path is required to create the engine")
+            controller = None
+            if max_adaptive_workers > max_workers:
+                controller = ConcurrencyController(1, max_adaptive_workers, initial=max_workers)
+            _ENGINE = ConversoEngine(download_path, max_workers, prefetch_results, controller)
+        return _ENGINE
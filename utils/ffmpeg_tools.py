@@ -0,0 +1,364 @@
+"""FFmpeg helpers for cutting media without a full re-encode"""
+
+import bisect
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+
+class FFmpegTools:
+    """Keyframe-aware cutting built on the ffmpeg/ffprobe binaries"""
+    
+    # Encoders used to re-encode boundary GOPs so they concat cleanly with copied packets
+    VIDEO_ENCODERS = {
+        'h264': 'libx264',
+        'hevc': 'libx265',
+        'vp9': 'libvpx-vp9',
+        'vp8': 'libvpx',
+        'av1': 'libaom-av1',
+    }
+    AUDIO_ENCODERS = {
+        'aac': 'aac',
+        'opus': 'libopus',
+        'vorbis': 'libvorbis',
+        'mp3': 'libmp3lame',
+    }
+    
+    # ffprobe H.264 profile names -> libx264 -profile:v values
+    X264_PROFILES = {
+        'Constrained Baseline': 'baseline',
+        'Baseline': 'baseline',
+        'Main': 'main',
+        'High': 'high',
+        'High 10': 'high10',
+        'High 4:2:2': 'high422',
+        'High 4:4:4 Predictive': 'high444',
+    }
+    
+    # Parameters re-encoded boundary segments must share with the copied middle
+    VIDEO_MATCH_KEYS = ('codec_name', 'profile', 'pix_fmt', 'width', 'height')
+    AUDIO_MATCH_KEYS = ('codec_name', 'sample_rate', 'channels')
+    
+    # Seconds decoded on either side of a join to check it
+    SEAM_WINDOW = 2.0
+    
+    @staticmethod
+    def ffmpeg_path() -> str:
+        """Locate the ffmpeg binary"""
+        return shutil.which('ffmpeg') or 'ffmpeg'
+    
+    @staticmethod
+    def ffprobe_path() -> str:
+        """Locate the ffprobe binary"""
+        return shutil.which('ffprobe') or 'ffprobe'
+    
+    @staticmethod
+    def is_available() -> bool:
+        """Check if ffmpeg and ffprobe can be found"""
+        return bool(shutil.which('ffmpeg') and shutil.which('ffprobe'))
+    
+    @staticmethod
+    def probe_keyframes(filepath: str) -> List[float]:
+        """List keyframe timestamps of the first video stream"""
+        return [pts for pts, keyframe in FFmpegTools.probe_packets(filepath) if keyframe]
+    
+    @staticmethod
+    def probe_packets(filepath: str) -> List[Tuple[float, bool]]:
+        """
+        List (timestamp, is_keyframe) of every packet of the first video stream
+        Reads packet flags only, so nothing is decoded
+        """
+        cmd = [
+            FFmpegTools.ffprobe_path(), '-v', 'error',
+            '-select_streams', 'v:0',
+            '-show_entries', 'packet=pts_time,flags',
+            '-of', 'csv=p=0',
+            filepath,
+        ]
+        try:
+            output = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+        except Exception as e:
+            print(f"Error probing keyframes: {e}")
+            return []
+        
+        packets = []
+        for line in output.splitlines():
+            pts, _, flags = line.partition(',')
+            if pts not in ('', 'N/A'):
+                packets.append((float(pts), 'K' in flags))
+        
+        return sorted(packets)
+    
+    @staticmethod
+    def probe_stream(filepath: str, selector: str) -> Dict:
+        """Codec parameters of one stream ('v:0', 'a:0'); empty when there is none"""
+        cmd = [
+            FFmpegTools.ffprobe_path(), '-v', 'error',
+            '-select_streams', selector,
+            '-show_entries', 'stream=codec_name,profile,level,pix_fmt,width,height,sample_rate,channels',
+            '-of', 'json',
+            filepath,
+        ]
+        try:
+            output = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+            streams = json.loads(output).get('streams') or [{}]
+        except Exception:
+            return {}
+        return streams[0]
+    
+    @staticmethod
+    def probe_codecs(filepath: str) -> tuple[str, str]:
+        """Return (video_codec, audio_codec) names of the first streams"""
+        return (
+            FFmpegTools.probe_stream(filepath, 'v:0').get('codec_name', ''),
+            FFmpegTools.probe_stream(filepath, 'a:0').get('codec_name', ''),
+        )
+    
+    @staticmethod
+    def stream_copy(src: str, dst: str, start: float, end: Optional[float] = None,
+                    extra_args: Optional[List[str]] = None, maps: Optional[List[str]] = None) -> bool:
+        """
+        Cut [start, end) with stream copy
+        Input seeking snaps the start to the preceding keyframe
+        """
+        cmd = [FFmpegTools.ffmpeg_path(), '-v', 'error', '-y', '-ss', f'{start:.3f}']
+        if end is not None:
+            cmd += ['-t', f'{max(end - start, 0):.3f}']
+        cmd += ['-i', src]
+        for stream_map in maps or ['0']:
+            cmd += ['-map', stream_map]
+        cmd += ['-c', 'copy', '-avoid_negative_ts', 'make_zero']
+        cmd += extra_args or []
+        cmd.append(dst)
+        
+        return FFmpegTools._run(cmd)
+    
+    @staticmethod
+    def encoder_args(video: Dict, audio: Dict) -> List[str]:
+        """
+        Encoder options reproducing the probed source streams: same codec,
+        pixel format, sample rate and channels, and for H.264 the profile and level
+        """
+        args = []
+        if video:
+            codec = video.get('codec_name', '')
+            args += ['-c:v', FFmpegTools.VIDEO_ENCODERS.get(codec, 'libx264')]
+            if video.get('pix_fmt'):
+                args += ['-pix_fmt', video['pix_fmt']]
+            if codec == 'h264':
+                if profile := FFmpegTools.X264_PROFILES.get(video.get('profile')):
+                    args += ['-profile:v', profile]
+                if (level := video.get('level')) and level > 0:
+                    args += ['-level', f'{level // 10}.{level % 10}']
+        if audio:
+            args += ['-c:a', FFmpegTools.AUDIO_ENCODERS.get(audio.get('codec_name', ''), 'aac')]
+            if audio.get('sample_rate'):
+                args += ['-ar', str(audio['sample_rate'])]
+            if audio.get('channels'):
+                args += ['-ac', str(audio['channels'])]
+        return args
+    
+    @staticmethod
+    def reencode(src: str, dst: str, start: float, end: Optional[float] = None,
+                 video: Optional[Dict] = None, audio: Optional[Dict] = None) -> bool:
+        """Re-encode [start, end) (to the end when end is None) matching the probed source streams"""
+        cmd = [FFmpegTools.ffmpeg_path(), '-v', 'error', '-y', '-ss', f'{start:.3f}']
+        if end is not None:
+            cmd += ['-t', f'{max(end - start, 0):.3f}']
+        cmd += ['-i', src, '-map', '0:v:0?', '-map', '0:a:0?']
+        cmd += FFmpegTools.encoder_args(video or {}, audio or {})
+        cmd.append(dst)
+        return FFmpegTools._run(cmd)
+    
+    @staticmethod
+    def matches(filepath: str, video: Dict, audio: Dict) -> bool:
+        """Whether a re-encoded segment has the source's stream parameters, so it can be concatenated"""
+        for selector, source, keys in (('v:0', video, FFmpegTools.VIDEO_MATCH_KEYS),
+                                       ('a:0', audio, FFmpegTools.AUDIO_MATCH_KEYS)):
+            if not source:
+                continue
+            probed = FFmpegTools.probe_stream(filepath, selector)
+            if any(source.get(key) != probed.get(key) for key in keys if source.get(key) is not None):
+                return False
+        return True
+    
+    @staticmethod
+    def decodes_cleanly(filepath: str, start: float = 0.0, duration: Optional[float] = None) -> bool:
+        """
+        Decode a file (or duration seconds of it from start) and report whether
+        ffmpeg saw any errors; decoding begins at the keyframe before start
+        """
+        cmd = [FFmpegTools.ffmpeg_path(), '-v', 'error']
+        if start > 0:
+            cmd += ['-ss', f'{start:.3f}']
+        if duration is not None:
+            cmd += ['-t', f'{duration:.3f}']
+        cmd += ['-i', filepath, '-f', 'null', '-']
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True)
+        except Exception as e:
+            print(f"Error running FFmpeg: {e}")
+            return False
+        return result.returncode == 0 and not result.stderr.strip()
+    
+    @staticmethod
+    def cut(src: str, dst: str, start: float, end: Optional[float] = None,
+            frame_accurate: bool = False) -> bool:
+        """
+        Cut a segment out of a local file; end=None runs to the end of the file
+        Without frame_accuracy the cut is a pure stream copy at keyframes.
+        With it, only the partial GOPs at either boundary are re-encoded (with
+        the source's codec parameters) and the keyframe-aligned middle is
+        copied, then everything is concatenated. When a re-encoded segment
+        does not match the source or the joined file does not decode cleanly
+        around a join (SEAM_WINDOW on either side), the whole range is
+        re-encoded instead.
+        """
+        if not frame_accurate:
+            return FFmpegTools.stream_copy(src, dst, start, end)
+        
+        packets = FFmpegTools.probe_packets(src)
+        keyframes = [pts for pts, keyframe in packets if keyframe]
+        video = FFmpegTools.probe_stream(src, 'v:0')
+        audio = FFmpegTools.probe_stream(src, 'a:0')
+        
+        inner = [k for k in keyframes if k >= start and (end is None or k <= end)]
+        if len(inner) < (1 if end is None else 2):
+            # Range fits inside a single GOP - nothing to copy
+            return FFmpegTools.reencode(src, dst, start, end, video, audio)
+        
+        first_key = inner[0]
+        # Open-ended cuts copy from the first keyframe through to the end of the file
+        last_key = inner[-1] if end is not None else None
+        ext = os.path.splitext(dst)[1] or '.mp4'
+        
+        with tempfile.TemporaryDirectory(prefix='converso_cut_') as workdir:
+            # Clip segments in order as (path, start, end); the middle one is copied, the others re-encoded
+            segments = []
+            if first_key - start > 0.001:
+                segments.append((os.path.join(workdir, f'head{ext}'), start, first_key))
+            middle = os.path.join(workdir, f'middle{ext}')
+            segments.append((middle, None, None))
+            if end is not None and end - last_key > 0.001:
+                segments.append((os.path.join(workdir, f'tail{ext}'), last_key, end))
+            
+            for path, seg_start, seg_end in segments:
+                if path == middle:
+                    continue
+                if not FFmpegTools.reencode(src, path, seg_start, seg_end, video, audio):
+                    return False
+                if not FFmpegTools.matches(path, video, audio):
+                    print("Boundary re-encode does not match the source streams, re-encoding the whole clip")
+                    return FFmpegTools.reencode(src, dst, start, end, video, audio)
+            
+            # -t keeps the next keyframe when its decode time precedes last_key,
+            # so the copied video is limited to the frames before it
+            extra_args = []
+            if last_key is not None:
+                frames = sum(1 for pts, _ in packets if first_key <= pts < last_key)
+                extra_args = ['-frames:v', str(frames)]
+            if not FFmpegTools.stream_copy(src, middle, first_key, last_key, extra_args, maps=['0:v:0?', '0:a:0?']):
+                return False
+            
+            parts = [path for path, _, _ in segments]
+            # Joins sit where the copied middle starts and ends, as offsets into the clip
+            seams = []
+            if parts[0] != middle:
+                seams.append(first_key - start)
+            if parts[-1] != middle:
+                seams.append(last_key - start)
+            window = FFmpegTools.SEAM_WINDOW
+            if FFmpegTools.concat(parts, dst) and all(
+                FFmpegTools.decodes_cleanly(dst, max(seam - window, 0.0), 2 * window) for seam in seams
+            ):
+                return True
+            
+            print("Joined clip does not decode cleanly, re-encoding the whole clip")
+            return FFmpegTools.reencode(src, dst, start, end, video, audio)
+    
+    @staticmethod
+    def split_chapters(src: str, chapters: List[Dict], output_dir: Optional[str] = None,
+                       max_workers: Optional[int] = None) -> List[str]:
+        """
+        Split a file into one file per chapter using stream copy
+        Chapter boundaries are snapped to keyframes from a single packet probe
+        so cuts neither overlap nor leave gaps, then every cut is scheduled at
+        once on a thread pool. Nothing is decoded.
+        Returns the list of written files in chapter order
+        """
+        from .validators import FileValidator
+        
+        if not chapters:
+            return []
+        
+        base, ext = os.path.splitext(src)
+        output_dir = output_dir or base
+        os.makedirs(output_dir, exist_ok=True)
+        
+        keyframes = FFmpegTools.probe_keyframes(src)
+        
+        def snap(t: float) -> float:
+            # Last keyframe at or before t - the point input seeking lands on anyway
+            index = bisect.bisect_right(keyframes, t + 0.001)
+            return keyframes[index - 1] if index else t
+        
+        starts = [snap(c.get('start_time') or 0) for c in chapters]
+        jobs = []
+        for i, chapter in enumerate(chapters):
+            start = starts[i]
+            end = starts[i + 1] if i + 1 < len(chapters) else chapter.get('end_time')
+            if end is not None and end <= start:
+                # Chapter shorter than a GOP collapses into its neighbour
+                continue
+            
+            title = FileValidator.sanitize_filename(chapter.get('title') or f'Chapter {i + 1}')
+            dst = os.path.join(output_dir, f"{i + 1:03d} - {title}{ext}")
+            jobs.append((dst, start, end))
+        
+        workers = max_workers or min(len(jobs), os.cpu_count() or 4) or 1
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='chapter_split') as pool:
+            futures = [pool.submit(FFmpegTools.stream_copy, src, dst, start, end) for dst, start, end in jobs]
+            results = [f.result() for f in futures]
+        
+        return [dst for (dst, _, _), ok in zip(jobs, results) if ok]
+    
+    @staticmethod
+    def concat(parts: List[str], dst: str) -> bool:
+        """Join segments with the concat demuxer (stream copy)"""
+        if len(parts) == 1:
+            shutil.move(parts[0], dst)
+            return True
+        
+        list_file = dst + '.concat.txt'
+        try:
+            with open(list_file, 'w', encoding='utf-8') as f:
+                for part in parts:
+                    escaped = part.replace("'", "'\\''")
+                    f.write(f"file '{escaped}'\n")
+            
+            cmd = [
+                FFmpegTools.ffmpeg_path(), '-v', 'error', '-y',
+                '-f', 'concat', '-safe', '0', '-i', list_file,
+                '-c', 'copy', dst,
+            ]
+            return FFmpegTools._run(cmd)
+        finally:
+            if os.path.exists(list_file):
+                os.remove(list_file)
+    
+    @staticmethod
+    def _run(cmd: List[str]) -> bool:
+        """Run an ffmpeg command and report failures"""
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            if result.returncode != 0:
+                print(f"FFmpeg error: {result.stderr.strip()}")
+                return False
+            return True
+        except Exception as e:
+            print(f"Error running FFmpeg: {e}")
+            return False
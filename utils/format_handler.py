@@ -1,6 +1,69 @@
 """Format processing and categorization for Converso Pro Downloader"""
 
-from typing import Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
+
+
+_MISSING = object()
+
+
+class FormatRecord:
+    """
+    Compact, read-only view of one yt-dlp format
+    
+    Keeps only the fields the UI, the format helpers and download planning
+    read, in slots instead of a per-format dict. get()/[] behave like the raw
+    dict, including keys that yt-dlp set to None, so existing callers work
+    unchanged. Headers, fragments, URLs and downloader options are dropped.
+    """
+    
+    FIELDS = (
+        'format_id', 'format_note', 'ext', 'protocol', 'vcodec', 'acodec',
+        'width', 'height', 'fps', 'dynamic_range', 'tbr', 'vbr', 'abr', 'asr',
+        'audio_channels', 'language', 'filesize', 'filesize_approx',
+    )
+    __slots__ = FIELDS
+    
+    def __init__(self, fmt: dict):
+        for field in self.FIELDS:
+            object.__setattr__(self, field, fmt.get(field, _MISSING))
+    
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError("FormatRecord is read-only")
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        value = getattr(self, key, _MISSING) if key in self.__slots__ else _MISSING
+        return default if value is _MISSING else value
+    
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+    
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+    
+    def keys(self) -> Iterator[str]:
+        return (field for field in self.FIELDS if field in self)
+    
+    def to_dict(self) -> dict:
+        """Plain dict of the kept fields, e.g. for JSON output"""
+        return {field: self[field] for field in self.keys()}
+    
+    def __repr__(self) -> str:
+        return f"FormatRecord({self.to_dict()!r})"
+    
+    @classmethod
+    def from_formats(cls, formats: Optional[List[dict]]) -> List['FormatRecord']:
+        """Compact a raw yt-dlp formats list"""
+        return [cls(fmt) for fmt in formats or [] if fmt]
+
+
+def json_default(obj: Any) -> Any:
+    """json.dumps default that writes FormatRecords as dicts"""
+    if isinstance(obj, FormatRecord):
+        return obj.to_dict()
+    return str(obj)
 
 
 class FormatProcessor:
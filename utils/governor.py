@@ -0,0 +1,266 @@
+"""Per-host request governor for Converso Downloader"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import urlsplit
+
+from yt_dlp.networking.exceptions import HTTPError
+
+from .metrics import GOVERNED_REQUESTS, GOVERNOR_COOLDOWNS, GOVERNOR_WAIT_SECONDS
+
+
+class Lane:
+    """
+    Priority of the requests made by one piece of work
+    A background lane can be promoted once an interactive caller waits on its result.
+    """
+    
+    __slots__ = ('background',)
+    
+    def __init__(self, background: bool = False):
+        self.background = background
+    
+    @property
+    def name(self) -> str:
+        return 'background' if self.background else 'interactive'
+
+
+class _Bucket:
+    """Token bucket and throttling state of one host"""
+    
+    def __init__(self, rate: float, burst: int, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = now
+        self.cooldown_until = 0.0
+        self.strikes = 0
+        self.waiting: List[Lane] = []
+    
+    def refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def interactive_waiting(self) -> bool:
+        return any(not lane.background for lane in self.waiting)
+
+
+class RequestGovernor:
+    """
+    Pace the metadata, search and API requests sent to each host
+    
+    Every host gets a token bucket (RATE requests/s, BURST at once). Requests
+    run in one of two lanes, chosen per thread with background():
+    
+    - interactive (the default): takes any available token, and is served
+      first whenever both lanes wait
+    - background (prefetch, batch previews, subscription polls, update
+      checks): only takes a token while INTERACTIVE_RESERVE more are left and
+      no interactive request is waiting, so bulk work can never use up the
+      headroom a user's lookup needs
+    
+    A throttling response (HTTP 429) empties the host's bucket and pauses its
+    background lane for a cooldown - Retry-After when given, otherwise
+    COOLDOWN doubling on repeated throttling up to MAX_COOLDOWN. Interactive
+    requests keep going at the bucket rate. A host's www. and m. names share
+    its bucket (www.youtube.com, m.youtube.com and youtube.com); other
+    subdomains get their own.
+    
+    Media transfers are not governed: install() exempts everything a
+    YoutubeDL instance requests from inside its dl() call.
+    """
+    
+    RATE = 5.0
+    BURST = 10
+    INTERACTIVE_RESERVE = 3
+    COOLDOWN = 30.0
+    MAX_COOLDOWN = 300.0
+    THROTTLE_STATUSES = (429,)
+    
+    def __init__(self, rate: float = RATE, burst: int = BURST):
+        if burst <= self.INTERACTIVE_RESERVE:
+            raise ValueError(f"burst must be larger than the interactive reserve ({self.INTERACTIVE_RESERVE})")
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, _Bucket] = {}
+        self._limits: Dict[str, tuple] = {}
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._interactive = Lane()
+    
+    def configure(self, host: str, rate: float, burst: int):
+        """Use a different rate and burst for one host"""
+        if burst <= self.INTERACTIVE_RESERVE:
+            raise ValueError(f"burst must be larger than the interactive reserve ({self.INTERACTIVE_RESERVE})")
+        key = self.host_key(host if '/' in host else f'//{host}')
+        with self._cond:
+            self._limits[key] = (rate, burst)
+            self._buckets.pop(key, None)
+    
+    @contextmanager
+    def background(self) -> Iterator[Lane]:
+        """Send the calling thread's requests through the background lane for the block"""
+        lane = Lane(background=True)
+        stack = self._stack()
+        stack.append(lane)
+        try:
+            yield lane
+        finally:
+            stack.remove(lane)
+    
+    def current(self) -> Lane:
+        """The calling thread's lane"""
+        stack = self._stack()
+        return stack[-1] if stack else self._interactive
+    
+    def promote(self, lane: Optional[Lane]):
+        """Move a background lane's remaining requests to the interactive lane"""
+        if lane is None or not lane.background:
+            return
+        with self._cond:
+            lane.background = False
+            self._cond.notify_all()
+    
+    def acquire(self, url: str, lane: Optional[Lane] = None, timeout: Optional[float] = None) -> bool:
+        """Wait until a request to url may be sent; False on timeout"""
+        key = self.host_key(url)
+        lane = lane or self.current()
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        
+        with self._cond:
+            bucket = self._bucket(key, started)
+            bucket.waiting.append(lane)
+            try:
+                while True:
+                    now = time.monotonic()
+                    bucket.refill(now)
+                    
+                    if not lane.background:
+                        needed = 1.0
+                        wait = None if bucket.tokens >= needed else (needed - bucket.tokens) / bucket.rate
+                    elif now < bucket.cooldown_until:
+                        wait = bucket.cooldown_until - now
+                    elif bucket.interactive_waiting():
+                        wait = 1.0 / bucket.rate
+                    else:
+                        needed = 1.0 + self.INTERACTIVE_RESERVE
+                        wait = None if bucket.tokens >= needed else (needed - bucket.tokens) / bucket.rate
+                    
+                    if wait is None:
+                        bucket.tokens -= 1
+                        break
+                    if deadline is not None:
+                        if now >= deadline:
+                            return False
+                        wait = min(wait, deadline - now)
+                    self._cond.wait(wait)
+            finally:
+                bucket.waiting.remove(lane)
+                self._cond.notify_all()
+        
+        GOVERNED_REQUESTS.inc(1, (key, lane.name))
+        GOVERNOR_WAIT_SECONDS.observe(time.monotonic() - started, (lane.name,))
+        return True
+    
+    def observe(self, url: str, status: Optional[int], retry_after: Optional[str] = None):
+        """Report a response status; throttling starts or extends the host's cooldown"""
+        if status not in self.THROTTLE_STATUSES:
+            return
+        
+        key = self.host_key(url)
+        try:
+            cooldown = float(retry_after) if retry_after else None
+        except ValueError:
+            cooldown = None
+        
+        with self._cond:
+            now = time.monotonic()
+            bucket = self._bucket(key, now)
+            # Throttling while paused only extends the pause: count and report new pauses only
+            started = now >= bucket.cooldown_until
+            # Throttled again soon after the last cooldown: back off further
+            bucket.strikes = bucket.strikes + 1 if now < bucket.cooldown_until + self.COOLDOWN else 1
+            if cooldown is None:
+                cooldown = min(self.MAX_COOLDOWN, self.COOLDOWN * 2 ** (bucket.strikes - 1))
+            bucket.cooldown_until = max(bucket.cooldown_until, now + min(cooldown, self.MAX_COOLDOWN))
+            bucket.tokens = 0.0
+            bucket.updated = now
+        
+        if started:
+            GOVERNOR_COOLDOWNS.inc(1, (key,))
+            print(f"Throttled by {key}: background requests paused for {cooldown:.0f}s")
+    
+    def install(self, ydl):
+        """Route a YoutubeDL instance's requests through the governor"""
+        urlopen, dl = ydl.urlopen, ydl.dl
+        # dl() calls in progress on this instance, incl. its fragment threads
+        media = [0]
+        
+        def governed_urlopen(req):
+            if media[0]:
+                return urlopen(req)
+            url = req if isinstance(req, str) else getattr(req, 'url', None) or req.get_full_url()
+            self.acquire(url)
+            try:
+                return urlopen(req)
+            except HTTPError as e:
+                retry_after = e.response.headers.get('Retry-After') if e.response is not None else None
+                self.observe(url, e.status, retry_after)
+                raise
+        
+        def ungoverned_dl(*args, **kwargs):
+            media[0] += 1
+            try:
+                return dl(*args, **kwargs)
+            finally:
+                media[0] -= 1
+        
+        ydl.urlopen = governed_urlopen
+        ydl.dl = ungoverned_dl
+        return ydl
+    
+    def stats(self) -> Dict:
+        """Tokens, waiters and remaining cooldown per host"""
+        with self._cond:
+            now = time.monotonic()
+            stats = {}
+            for key, bucket in self._buckets.items():
+                bucket.refill(now)
+                stats[key] = {
+                    'tokens': round(bucket.tokens, 2),
+                    'waiting_interactive': sum(1 for lane in bucket.waiting if not lane.background),
+                    'waiting_background': sum(1 for lane in bucket.waiting if lane.background),
+                    'cooldown_seconds': round(max(0.0, bucket.cooldown_until - now), 1),
+                }
+            return stats
+    
+    @staticmethod
+    def host_key(url: str) -> str:
+        """Bucket key for a URL: its host name without a www. or m. prefix"""
+        host = (urlsplit(url).hostname or '').rstrip('.')
+        for prefix in ('www.', 'm.'):
+            # Keep a bare two-label name whole (m.com is not a subdomain)
+            if host.startswith(prefix) and host.count('.') > 1:
+                return host[len(prefix):]
+        return host
+    
+    def _bucket(self, key: str, now: float) -> _Bucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            rate, burst = self._limits.get(key, (self.rate, self.burst))
+            bucket = self._buckets[key] = _Bucket(rate, burst, now)
+        return bucket
+    
+    def _stack(self) -> List[Lane]:
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+
+# Process-wide governor used by the YoutubeDL pool and the update checker
+GOVERNOR = RequestGovernor()
@@ -0,0 +1,275 @@
+"""Background download job queue for Converso Downloader"""
+
+import threading
+import time
+import uuid
+import weakref
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, List, Optional, Callable
+
+from .concurrency import ConcurrencyController
+from .downloader import VideoInfoExtractor, VideoDownloader
+from .format_handler import FormatProcessor
+from .metrics import JOBS, JOBS_FINISHED, classify_error
+
+
+class DownloadJob:
+    """A single queued or running download"""
+    
+    def __init__(self, url: str, format_spec: Optional[str], options: Dict, owner: Optional[str] = None,
+                 interactive: bool = False):
+        self.id = uuid.uuid4().hex[:12]
+        self.url = url
+        self.format_spec = format_spec
+        self.options = options
+        self.owner = owner
+        self.interactive = interactive
+        self.status = 'queued'
+        self.progress: Dict = {}
+        self.result: Optional[Dict] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.future: Optional[Future] = None
+        self.downloader: Optional[VideoDownloader] = None
+        self.cancel_requested = False
+    
+    @property
+    def is_active(self) -> bool:
+        """True while the job is queued or running"""
+        return self.status in ('queued', 'running')
+    
+    def to_dict(self) -> Dict:
+        """Serializable view of the job"""
+        return {
+            'id': self.id,
+            'url': self.url,
+            'format': self.format_spec,
+            'options': self.options,
+            'owner': self.owner,
+            'interactive': self.interactive,
+            'status': self.status,
+            'progress': self.progress,
+            'result': self.result,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class JobManager:
+    """
+    Run downloads on a worker pool and publish their progress to listeners
+    With a ConcurrencyController the pool is sized to its upper bound and the
+    controller decides how many of those workers may download at once.
+    
+    Downloads a user starts and waits for (interactive=True) run on a small
+    pool of their own, outside the controller's slots, so they never queue
+    behind a bulk import or batch backlog.
+    """
+    
+    INTERACTIVE_WORKERS = 2
+    
+    # Every live manager, so the jobs gauge counts them all (the CLI, API and
+    # tests can run several in one process next to the engine's)
+    _instances: 'weakref.WeakSet[JobManager]' = weakref.WeakSet()
+    
+    def __init__(self, output_path: str, max_workers: int = 3,
+                 extractor: Optional[VideoInfoExtractor] = None,
+                 controller: Optional[ConcurrencyController] = None):
+        self.output_path = output_path
+        self.extractor = extractor or VideoInfoExtractor()
+        self.controller = controller
+        self.executor = ThreadPoolExecutor(
+            max_workers=controller.max_limit if controller else max_workers, thread_name_prefix='converso_job'
+        )
+        self.interactive_executor = ThreadPoolExecutor(
+            max_workers=self.INTERACTIVE_WORKERS, thread_name_prefix='converso_job_interactive'
+        )
+        self.jobs: Dict[str, DownloadJob] = {}
+        self._listeners: List[Callable[[Dict], None]] = []
+        self._lock = threading.Lock()
+        
+        JobManager._instances.add(self)
+    
+    def submit(self, url: str, format_spec: Optional[str] = None, options: Optional[Dict] = None,
+               owner: Optional[str] = None, interactive: bool = False) -> DownloadJob:
+        """
+        Queue a download
+        format_spec may be omitted; it is then resolved from options['quality']
+        like the Quick Download tab does. interactive puts the job in the
+        lane reserved for downloads a user is waiting on.
+        """
+        job = DownloadJob(url, format_spec, dict(options or {}), owner, interactive)
+        
+        with self._lock:
+            self.jobs[job.id] = job
+        
+        self._publish(job, 'status', {'status': job.status})
+        executor = self.interactive_executor if interactive else self.executor
+        job.future = executor.submit(self._run, job)
+        return job
+    
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job"""
+        job = self.jobs.get(job_id)
+        if not job or not job.is_active:
+            return False
+        
+        job.cancel_requested = True
+        if job.future and job.future.cancel():
+            self._finish(job, 'cancelled', {'success': False, 'error': 'Download cancelled by user'})
+            return True
+        
+        if job.downloader:
+            job.downloader.cancel()
+        return True
+    
+    def get(self, job_id: str) -> Optional[DownloadJob]:
+        """Look up a job by ID"""
+        return self.jobs.get(job_id)
+    
+    def list_jobs(self, owner: Optional[str] = None) -> List[DownloadJob]:
+        """All jobs, optionally only those of one owner, oldest first"""
+        with self._lock:
+            jobs = list(self.jobs.values())
+        
+        if owner is not None:
+            jobs = [job for job in jobs if job.owner == owner]
+        return jobs
+    
+    def prune_history(self, older_than: float) -> int:
+        """Forget finished jobs that ended before the older_than timestamp"""
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self.jobs.items()
+                if not job.is_active and job.finished_at and job.finished_at < older_than
+            ]
+            for job_id in expired:
+                del self.jobs[job_id]
+        return len(expired)
+    
+    def add_listener(self, listener: Callable[[Dict], None]):
+        """Register a callable that receives every job event"""
+        with self._lock:
+            self._listeners.append(listener)
+    
+    def remove_listener(self, listener: Callable[[Dict], None]):
+        """Unregister an event listener"""
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+    
+    def shutdown(self, wait: bool = False):
+        """Cancel running downloads and stop the worker pool"""
+        for job in self.list_jobs():
+            if job.is_active:
+                self.cancel(job.id)
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+        self.interactive_executor.shutdown(wait=wait, cancel_futures=True)
+    
+    def _run(self, job: DownloadJob):
+        """Worker body - wait for a slot, resolve the format and download"""
+        if self.controller and not job.interactive:
+            while not self.controller.acquire(timeout=1.0):
+                if job.cancel_requested:
+                    self._finish(job, 'cancelled', {'success': False, 'error': 'Download cancelled by user'})
+                    return
+            try:
+                self._download(job)
+            finally:
+                self.controller.release(job.id)
+        else:
+            self._download(job)
+    
+    def _download(self, job: DownloadJob):
+        job.status = 'running'
+        job.started_at = time.time()
+        self._publish(job, 'status', {'status': job.status})
+        received = {'bytes': 0}
+        
+        def progress_callback(info: Dict):
+            if info.get('status') == 'retry':
+                # Retries are signals, not progress - keep the last progress record
+                if self.controller:
+                    self.controller.record_error(info['error_class'])
+                self._publish(job, 'progress', info)
+                return
+            
+            # Interactive jobs hold no slot: their throttling counts, their throughput does not
+            if self.controller and not job.interactive and info.get('status') == 'downloading':
+                downloaded = info.get('downloaded_bytes') or 0
+                # Counters restart for each file of a merged format
+                delta = downloaded - received['bytes'] if downloaded >= received['bytes'] else downloaded
+                received['bytes'] = downloaded
+                self.controller.record_progress(job.id, delta, info.get('speed'))
+            
+            job.progress = info
+            self._publish(job, 'progress', info)
+        
+        job.downloader = VideoDownloader(
+            job.options.get('output_path') or self.output_path, progress_callback, job_id=job.id
+        )
+        if job.cancel_requested:
+            job.downloader.cancel()
+        
+        try:
+            if not job.format_spec:
+                job.format_spec = self._resolve_format(job)
+            
+            if not job.format_spec:
+                result = {'success': False, 'error': 'No suitable format found'}
+            else:
+                result = job.downloader.download(job.url, job.format_spec, job.options)
+        except Exception as e:
+            result = {'success': False, 'error': str(e)}
+        
+        if self.controller and not result.get('success'):
+            self.controller.record_error(classify_error(result.get('error', '')))
+        
+        if job.downloader.is_cancelled:
+            self._finish(job, 'cancelled', result)
+        else:
+            self._finish(job, 'finished' if result.get('success') else 'failed', result)
+    
+    def _resolve_format(self, job: DownloadJob) -> Optional[str]:
+        """Pick a format spec from the job's quality preference"""
+        if job.options.get('extract_audio'):
+            return 'bestaudio'
+        
+        info = self.extractor.extract_info(job.url)
+        if not info:
+            return None
+        
+        format_id = FormatProcessor.get_best_format_id(info['formats'], job.options.get('quality', 'best'))
+        return f"{format_id}+bestaudio" if format_id else None
+    
+    def _finish(self, job: DownloadJob, status: str, result: Dict):
+        """Record the outcome and announce it"""
+        job.status = status
+        job.result = result
+        job.finished_at = time.time()
+        JOBS_FINISHED.inc(1, (status,))
+        self._publish(job, 'status', {'status': status, 'result': result})
+    
+    @staticmethod
+    def _count_states() -> Dict[tuple, float]:
+        """Current number of jobs per state over all managers, for the metrics gauge"""
+        counts = {('queued',): 0, ('running',): 0, ('finished',): 0, ('failed',): 0, ('cancelled',): 0}
+        for manager in list(JobManager._instances):
+            for job in manager.list_jobs():
+                counts[(job.status,)] = counts.get((job.status,), 0) + 1
+        return counts
+    
+    def _publish(self, job: DownloadJob, event: str, data: Dict):
+        """Send an event to every listener; listener errors never break a download"""
+        message = {'event': event, 'job_id': job.id, 'owner': job.owner, **data}
+        for listener in list(self._listeners):
+            try:
+                listener(message)
+            except Exception as e:
+                print(f"Job listener error: {e}")
+
+
+# Job counts are computed when metrics are scraped, not on every update
+JOBS.set_function(JobManager._count_states)
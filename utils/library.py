@@ -0,0 +1,379 @@
+"""Indexed local media library for Converso Downloader"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+class MediaLibrary:
+    """
+    SQLite index of downloaded files with FTS5 full-text search
+    
+    Rows are written from the metadata already extracted for a download
+    (processed info from VideoInfoExtractor or yt-dlp's own info dict), so
+    nothing is probed. Title, uploader, tags, categories and description are
+    searchable through an external-content FTS5 table kept in sync by
+    triggers; uploader, upload date and height have ordinary indexes.
+    """
+    
+    DB_PATH = Path.home() / '.converso' / 'library.db'
+    
+    MEDIA_EXTENSIONS = {
+        '.mp4', '.mkv', '.webm', '.mov', '.avi', '.flv', '.m4v',
+        '.mp3', '.m4a', '.opus', '.ogg', '.wav', '.flac', '.aac',
+    }
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS items (
+            id INTEGER PRIMARY KEY,
+            video_id TEXT,
+            filepath TEXT NOT NULL UNIQUE,
+            title TEXT,
+            uploader TEXT,
+            description TEXT,
+            tags TEXT,
+            categories TEXT,
+            duration INTEGER,
+            height INTEGER,
+            upload_date TEXT,
+            webpage_url TEXT,
+            filesize INTEGER,
+            mtime REAL,
+            added_at REAL,
+            missing INTEGER NOT NULL DEFAULT 0,
+            digest TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_items_uploader ON items(uploader COLLATE NOCASE);
+        CREATE INDEX IF NOT EXISTS idx_items_upload_date ON items(upload_date);
+        CREATE INDEX IF NOT EXISTS idx_items_height ON items(height);
+        CREATE INDEX IF NOT EXISTS idx_items_video_id ON items(video_id);
+        CREATE INDEX IF NOT EXISTS idx_items_added_at ON items(added_at);
+        
+        CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+            title, uploader, tags, categories, description,
+            content='items', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+        );
+        
+        CREATE TRIGGER IF NOT EXISTS items_ai AFTER INSERT ON items BEGIN
+            INSERT INTO items_fts(rowid, title, uploader, tags, categories, description)
+            VALUES (new.id, new.title, new.uploader, new.tags, new.categories, new.description);
+        END;
+        CREATE TRIGGER IF NOT EXISTS items_ad AFTER DELETE ON items BEGIN
+            INSERT INTO items_fts(items_fts, rowid, title, uploader, tags, categories, description)
+            VALUES ('delete', old.id, old.title, old.uploader, old.tags, old.categories, old.description);
+        END;
+        CREATE TRIGGER IF NOT EXISTS items_au AFTER UPDATE OF title, uploader, tags, categories, description ON items BEGIN
+            INSERT INTO items_fts(items_fts, rowid, title, uploader, tags, categories, description)
+            VALUES ('delete', old.id, old.title, old.uploader, old.tags, old.categories, old.description);
+            INSERT INTO items_fts(rowid, title, uploader, tags, categories, description)
+            VALUES (new.id, new.title, new.uploader, new.tags, new.categories, new.description);
+        END;
+    """
+    
+    _TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+    
+    _shared: Optional['MediaLibrary'] = None
+    _shared_lock = threading.Lock()
+    _reconcile_started = False
+    
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = Path(db_path) if db_path else self.DB_PATH
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(self.SCHEMA)
+        self._migrate()
+    
+    def _migrate(self):
+        """Bring databases created by older versions up to SCHEMA"""
+        columns = {row['name'] for row in self._conn.execute('PRAGMA table_info(items)')}
+        with self._conn:
+            if 'digest' not in columns:
+                self._conn.execute('ALTER TABLE items ADD COLUMN digest TEXT')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_items_digest ON items(digest)')
+    
+    @staticmethod
+    def shared() -> 'MediaLibrary':
+        """Process-wide library at the default location"""
+        with MediaLibrary._shared_lock:
+            if MediaLibrary._shared is None:
+                MediaLibrary._shared = MediaLibrary()
+            return MediaLibrary._shared
+    
+    def add(self, info: Dict, filepath: str, filesize: Optional[int] = None, digest: Optional[str] = None) -> int:
+        """
+        Index a downloaded file from its metadata; re-adding a path updates it
+        digest is the content fingerprint from the download, if one was made
+        Returns the row id
+        """
+        filepath = os.path.abspath(filepath)
+        try:
+            st = os.stat(filepath)
+            filesize, mtime = st.st_size, st.st_mtime
+        except OSError:
+            mtime = None
+        
+        row = {
+            'video_id': info.get('id') or None,
+            'filepath': filepath,
+            'title': info.get('title') or Path(filepath).stem,
+            'uploader': info.get('uploader') or info.get('channel'),
+            'description': info.get('description') or '',
+            'tags': ' '.join(info.get('tags') or []),
+            'categories': ' '.join(info.get('categories') or []),
+            'duration': int(info.get('duration') or 0) or None,
+            'height': self._height(info),
+            'upload_date': self._iso_date(info.get('upload_date')),
+            'webpage_url': info.get('webpage_url'),
+            'filesize': filesize,
+            'mtime': mtime,
+            'added_at': time.time(),
+            'digest': digest,
+        }
+        
+        columns = ', '.join(row)
+        placeholders = ', '.join(f':{name}' for name in row)
+        updates = ', '.join(f'{name} = excluded.{name}' for name in row if name not in ('filepath', 'added_at'))
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT INTO items ({columns}) VALUES ({placeholders}) "
+                f"ON CONFLICT(filepath) DO UPDATE SET {updates}, missing = 0",
+                row
+            )
+            # lastrowid is not reliable after the update branch of an upsert
+            return self._conn.execute('SELECT id FROM items WHERE filepath = ?', (filepath,)).fetchone()[0]
+    
+    def remove(self, filepath: str) -> bool:
+        """Drop a file from the index"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute('DELETE FROM items WHERE filepath = ?', (os.path.abspath(filepath),))
+        return cursor.rowcount > 0
+    
+    def expire(self, older_than: float) -> int:
+        """Drop entries whose file is missing and was last seen before older_than"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                'DELETE FROM items WHERE missing = 1 AND COALESCE(mtime, added_at) < ?', (older_than,)
+            )
+        return cursor.rowcount
+    
+    def search(self, query: Optional[str] = None, uploader: Optional[str] = None,
+               min_height: Optional[int] = None, max_height: Optional[int] = None,
+               date_from: Optional[str] = None, date_to: Optional[str] = None,
+               include_missing: bool = False, order: str = 'relevance',
+               limit: int = 50, offset: int = 0) -> List[Dict]:
+        """
+        Find library items
+        query is matched word by word (prefixes) against the text columns;
+        dates are YYYY-MM-DD; order is relevance, newest, added or title
+        """
+        where, params = [], []
+        
+        match = self._match_expression(query)
+        if match:
+            where.append('items.id IN (SELECT rowid FROM items_fts WHERE items_fts MATCH ?)')
+            params.append(match)
+        if uploader:
+            where.append('items.uploader = ? COLLATE NOCASE')
+            params.append(uploader)
+        if min_height:
+            where.append('items.height >= ?')
+            params.append(min_height)
+        if max_height:
+            where.append('items.height <= ?')
+            params.append(max_height)
+        if date_from:
+            where.append('items.upload_date >= ?')
+            params.append(date_from)
+        if date_to:
+            where.append('items.upload_date <= ?')
+            params.append(date_to)
+        if not include_missing:
+            where.append('items.missing = 0')
+        
+        if match and order == 'relevance':
+            # bm25 is only defined inside a full-text query, so rank through a join
+            sql = ("SELECT items.* FROM items_fts JOIN items ON items.id = items_fts.rowid "
+                   "WHERE items_fts MATCH ?" + ''.join(f' AND {clause}' for clause in where[1:]) +
+                   " ORDER BY bm25(items_fts, 10.0, 5.0, 3.0, 2.0, 1.0)")
+        else:
+            order_by = {
+                'newest': 'items.upload_date DESC',
+                'title': 'items.title COLLATE NOCASE',
+            }.get(order, 'items.added_at DESC')
+            sql = "SELECT items.* FROM items" + (f" WHERE {' AND '.join(where)}" if where else '') + f" ORDER BY {order_by}"
+        
+        sql += ' LIMIT ? OFFSET ?'
+        params += [limit, offset]
+        
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(row) for row in rows]
+    
+    def find_by_digest(self, digest: str, exclude: Optional[str] = None) -> Optional[Dict]:
+        """A present item with this content, other than the file at exclude"""
+        exclude = os.path.abspath(exclude) if exclude else ''
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT * FROM items WHERE digest = ? AND missing = 0 AND filepath != ? ORDER BY added_at LIMIT 1',
+                (digest, exclude)
+            ).fetchone()
+        return dict(row) if row else None
+    
+    def duplicates(self) -> List[Dict]:
+        """Groups of present files with identical content (same digest), largest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT digest, filesize, filepath FROM items WHERE missing = 0 AND digest IN "
+                "(SELECT digest FROM items WHERE missing = 0 AND digest IS NOT NULL "
+                "GROUP BY digest HAVING COUNT(*) > 1) ORDER BY filesize DESC, digest, added_at"
+            ).fetchall()
+        
+        groups: Dict[str, Dict] = {}
+        for row in rows:
+            group = groups.setdefault(row['digest'], {'digest': row['digest'], 'filesize': row['filesize'], 'paths': []})
+            group['paths'].append(row['filepath'])
+        return list(groups.values())
+    
+    def with_digests(self, root: Optional[str] = None) -> List[Dict]:
+        """Present items that have a stored digest (optionally under root)"""
+        sql = 'SELECT id, filepath, digest FROM items WHERE missing = 0 AND digest IS NOT NULL'
+        params: list = []
+        if root:
+            prefix = os.path.join(os.path.abspath(root), '')
+            sql += ' AND substr(filepath, 1, ?) = ?'
+            params += [len(prefix), prefix]
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql + ' ORDER BY filepath', params)]
+    
+    def set_digest(self, filepath: str, digest: str):
+        """Record a digest computed after the fact (e.g. by converso verify)"""
+        with self._lock, self._conn:
+            self._conn.execute('UPDATE items SET digest = ? WHERE filepath = ?', (digest, os.path.abspath(filepath)))
+    
+    def stats(self) -> Dict:
+        """Item count, total size and missing files"""
+        with self._lock:
+            count, size, missing = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(filesize), 0), COALESCE(SUM(missing), 0) FROM items'
+            ).fetchone()
+        return {'items': count, 'total_bytes': size, 'missing': missing}
+    
+    def reconcile(self, root: str, index_untracked: bool = True) -> Dict:
+        """
+        Bring the index in line with the files under root
+        Uses os.scandir metadata only: vanished files are flagged missing,
+        changed sizes/mtimes are updated and (optionally) untracked media
+        files are indexed under their file name.
+        """
+        started = time.perf_counter()
+        root = os.path.abspath(root)
+        on_disk: Dict[str, tuple] = {}
+        
+        stack = [root]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file() and os.path.splitext(entry.name)[1].lower() in self.MEDIA_EXTENSIONS:
+                            st = entry.stat()
+                            on_disk[entry.path] = (st.st_size, st.st_mtime)
+            except OSError as e:
+                print(f"Error scanning library folder: {e}")
+        
+        stats = {'scanned': len(on_disk), 'missing': 0, 'restored': 0, 'updated': 0, 'added': 0}
+        prefix = os.path.join(root, '')
+        
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT id, filepath, filesize, mtime, missing FROM items WHERE substr(filepath, 1, ?) = ?",
+                (len(prefix), prefix)
+            ).fetchall()
+            
+            missing, changed = [], []
+            for row in rows:
+                current = on_disk.pop(row['filepath'], None)
+                if current is None:
+                    if not row['missing']:
+                        missing.append((row['id'],))
+                    continue
+                if row['missing']:
+                    stats['restored'] += 1
+                if row['missing'] or current != (row['filesize'], row['mtime']):
+                    changed.append((current[0], current[1], row['id']))
+            
+            self._conn.executemany('UPDATE items SET missing = 1 WHERE id = ?', missing)
+            self._conn.executemany('UPDATE items SET filesize = ?, mtime = ?, missing = 0 WHERE id = ?', changed)
+            stats['missing'] = len(missing)
+            stats['updated'] = len(changed) - stats['restored']
+            
+            if index_untracked and on_disk:
+                now = time.time()
+                self._conn.executemany(
+                    "INSERT INTO items (filepath, title, filesize, mtime, added_at) VALUES (?, ?, ?, ?, ?)",
+                    [(path, Path(path).stem, size, mtime, now) for path, (size, mtime) in on_disk.items()]
+                )
+                stats['added'] = len(on_disk)
+        
+        stats['seconds'] = round(time.perf_counter() - started, 3)
+        return stats
+    
+    @staticmethod
+    def reconcile_async(root: str) -> bool:
+        """Reconcile the shared library in a background thread, once per process"""
+        with MediaLibrary._shared_lock:
+            if MediaLibrary._reconcile_started:
+                return False
+            MediaLibrary._reconcile_started = True
+        
+        def run():
+            try:
+                MediaLibrary.shared().reconcile(root)
+            except Exception as e:
+                print(f"Library reconcile failed: {e}")
+        
+        threading.Thread(target=run, name='library_reconcile', daemon=True).start()
+        return True
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+    
+    @staticmethod
+    def _match_expression(query: Optional[str]) -> Optional[str]:
+        """Turn free text into an FTS5 query: every word must match as a prefix"""
+        tokens = MediaLibrary._TOKEN_RE.findall(query or '')
+        if not tokens:
+            return None
+        return ' '.join(f'"{token}"*' for token in tokens)
+    
+    @staticmethod
+    def _height(info: Dict) -> Optional[int]:
+        """Video height from yt-dlp info (height) or processed info (resolution '1080p')"""
+        if info.get('height'):
+            return int(info['height'])
+        if match := re.match(r'^(\d+)p$|^\d+x(\d+)$', str(info.get('resolution') or '')):
+            return int(match.group(1) or match.group(2))
+        return None
+    
+    @staticmethod
+    def _iso_date(value: Optional[str]) -> Optional[str]:
+        """Normalize yt-dlp's YYYYMMDD or the processed 'Month DD, YYYY' to YYYY-MM-DD"""
+        if not value:
+            return None
+        for fmt in ('%Y%m%d', '%B %d, %Y', '%Y-%m-%d'):
+            try:
+                return datetime.strptime(value, fmt).strftime('%Y-%m-%d')
+            except ValueError:
+                continue
+        return None
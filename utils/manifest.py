@@ -0,0 +1,112 @@
+"""Manifest of the files Converso downloads write"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional
+
+
+class OutputManifest:
+    """
+    Output stems of the downloads this app started
+    
+    A stem is a download's final path without its extension; yt-dlp names
+    every intermediate of that download after it (.part, .ytdl, .fNNN.ext,
+    .temp.ext). Stems are recorded before the first byte is written and kept
+    on disk, so intermediates left behind by a crash or a failed job are
+    still known to be ours later. Finished downloads are forgotten again
+    (yt-dlp has removed their intermediates by then); the retention GC forgets
+    the rest once it has removed what they left.
+    
+    Stems of downloads running in this process are also counted in memory:
+    idle() lets the GC delete one file while no download can claim its stem.
+    """
+    
+    PATH = Path.home() / '.converso' / 'outputs.json'
+    
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path) if path else self.PATH
+        self._lock = threading.Lock()
+        self._active: Dict[str, int] = {}
+    
+    @staticmethod
+    def stem_of(filename: str) -> str:
+        """Absolute output path without its extension"""
+        return os.path.splitext(os.path.abspath(filename))[0]
+    
+    def record(self, filename: str) -> str:
+        """Remember a download's output (final filename) and mark it running; returns its stem"""
+        stem = self.stem_of(filename)
+        with self._lock:
+            self._active[stem] = self._active.get(stem, 0) + 1
+            stems = self._load()
+            if stem not in stems:
+                stems[stem] = time.time()
+                self._save(stems)
+        return stem
+    
+    def release(self, stems: Iterable[str], finished: bool = False):
+        """A download ended; a finished one leaves nothing behind, so its stems are forgotten"""
+        stems = list(stems)
+        with self._lock:
+            for stem in stems:
+                count = self._active.get(stem, 0) - 1
+                if count > 0:
+                    self._active[stem] = count
+                else:
+                    self._active.pop(stem, None)
+        if finished:
+            self.forget(stems)
+    
+    def forget(self, stems: Iterable[str]):
+        """Drop stems whose downloads are not running"""
+        with self._lock:
+            recorded = self._load()
+            dropped = [stem for stem in stems if stem in recorded and stem not in self._active]
+            for stem in dropped:
+                del recorded[stem]
+            if dropped:
+                self._save(recorded)
+    
+    def stems(self) -> Dict[str, float]:
+        """Recorded stems and when they were first recorded"""
+        with self._lock:
+            return self._load()
+    
+    @contextmanager
+    def idle(self, stem: str) -> Iterator[bool]:
+        """
+        Yields True when no download of this stem is running; until the block
+        ends none can start (keep it to a single file operation)
+        """
+        with self._lock:
+            yield stem not in self._active
+    
+    def _load(self) -> Dict[str, float]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                stems = json.load(f)
+            return stems if isinstance(stems, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"Error loading output manifest: {e}")
+            return {}
+    
+    def _save(self, stems: Dict[str, float]):
+        # Written to a temp file and renamed, so a reader never sees half a manifest
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(stems, f, indent=2)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            print(f"Error saving output manifest: {e}")
+
+
+# Process-wide manifest shared by the downloader and the retention GC
+OUTPUTS = OutputManifest()
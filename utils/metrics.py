@@ -0,0 +1,358 @@
+"""Prometheus-style metrics for Converso Downloader"""
+
+import re
+import threading
+import time
+import weakref
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+
+class _ThreadCells:
+    """
+    Per-thread value cells
+    Each thread only ever writes its own dict, so updates on the progress-hook
+    hot path take no lock. Readers merge all cells at scrape time. Cells of
+    threads that have exited (e.g. one per Streamlit rerun) are folded into a
+    shared total, so their number stays bounded by the live threads.
+    """
+    
+    def __init__(self):
+        self._local = threading.local()
+        # (weak reference to the owning thread, its cells)
+        self._cells: List[Tuple[Callable, Dict]] = []
+        self._retired: Dict = {}
+        self._lock = threading.Lock()
+    
+    def get(self) -> Dict:
+        """Return the calling thread's cell dict"""
+        try:
+            return self._local.cells
+        except AttributeError:
+            cells = {}
+            with self._lock:
+                self._reap()
+                self._cells.append((weakref.ref(threading.current_thread()), cells))
+            self._local.cells = cells
+            return cells
+    
+    def snapshot(self) -> List[Dict]:
+        """Copies of every thread's cells (dict.copy is atomic under the GIL)"""
+        with self._lock:
+            self._reap()
+            # Histogram lists in the retired total are updated by later reaps
+            retired = {labels: list(v) if isinstance(v, list) else v for labels, v in self._retired.items()}
+            return [retired] + [c.copy() for _, c in self._cells]
+    
+    def _reap(self):
+        """Fold the cells of finished threads into the retired total; lock held"""
+        alive = []
+        for ref, cells in self._cells:
+            thread = ref()
+            if thread is not None and thread.is_alive():
+                alive.append((ref, cells))
+                continue
+            # The thread is gone, so nothing writes these cells any more
+            for labels, value in cells.items():
+                total = self._retired.get(labels)
+                if total is None:
+                    self._retired[labels] = list(value) if isinstance(value, list) else value
+                elif isinstance(value, list):
+                    for i, part in enumerate(value):
+                        total[i] += part
+                else:
+                    self._retired[labels] = total + value
+        self._cells = alive
+
+
+class _Metric:
+    """Base class holding name, help text and label names"""
+    
+    kind = 'untyped'
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+    
+    def samples(self) -> List[Tuple[str, Tuple, float]]:
+        """Return (suffix, label_values, value) tuples"""
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing value"""
+    
+    kind = 'counter'
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._cells = _ThreadCells()
+    
+    def inc(self, amount: float = 1, labels: Tuple = ()):
+        """Add amount for the given label values"""
+        cells = self._cells.get()
+        cells[labels] = cells.get(labels, 0) + amount
+    
+    def value(self, labels: Tuple = ()) -> float:
+        """Current total for one label set"""
+        return sum(cells.get(labels, 0) for cells in self._cells.snapshot())
+    
+    def samples(self) -> List[Tuple[str, Tuple, float]]:
+        totals: Dict[Tuple, float] = {}
+        for cells in self._cells.snapshot():
+            for labels, value in cells.items():
+                totals[labels] = totals.get(labels, 0) + value
+        return [('_total', labels, value) for labels, value in sorted(totals.items())]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, or be computed at scrape time"""
+    
+    kind = 'gauge'
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._function: Optional[Callable[[], Dict[Tuple, float]]] = None
+    
+    def set(self, value: float, labels: Tuple = ()):
+        """Set the value (a single dict store, atomic under the GIL)"""
+        self._values[labels] = value
+    
+    def remove(self, labels: Tuple = ()):
+        """Drop a label set, e.g. when a job finishes"""
+        self._values.pop(labels, None)
+    
+    def set_function(self, function: Callable[[], Dict[Tuple, float]]):
+        """Compute values lazily at scrape time; function returns {labels: value}"""
+        self._function = function
+    
+    def samples(self) -> List[Tuple[str, Tuple, float]]:
+        values = dict(self._values)
+        if self._function:
+            try:
+                values.update(self._function())
+            except Exception as e:
+                print(f"Metrics gauge error ({self.name}): {e}")
+        return [('', labels, value) for labels, value in sorted(values.items())]
+
+
+class Histogram(_Metric):
+    """Bucketed observations with count and sum"""
+    
+    kind = 'histogram'
+    DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._cells = _ThreadCells()
+    
+    def observe(self, value: float, labels: Tuple = ()):
+        """Record one observation"""
+        cells = self._cells.get()
+        cell = cells.get(labels)
+        if cell is None:
+            # [bucket counts..., +Inf count, sum]
+            cell = cells[labels] = [0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                cell[i] += 1
+                break
+        else:
+            cell[len(self.buckets)] += 1
+        cell[-1] += value
+    
+    def time(self, labels: Tuple = ()):
+        """Context manager that observes the elapsed seconds"""
+        return _Timer(self, labels)
+    
+    def samples(self) -> List[Tuple[str, Tuple, float]]:
+        merged: Dict[Tuple, List[float]] = {}
+        for cells in self._cells.snapshot():
+            for labels, cell in cells.items():
+                total = merged.setdefault(labels, [0] * len(cell))
+                for i, value in enumerate(list(cell)):
+                    total[i] += value
+        
+        samples = []
+        for labels, cell in sorted(merged.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), cell[:-1]):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                samples.append(('_bucket', labels + (('le', le),), cumulative))
+            samples.append(('_count', labels, cumulative))
+            samples.append(('_sum', labels, cell[-1]))
+        return samples
+
+
+class _Timer:
+    """Histogram timing context manager"""
+    
+    def __init__(self, histogram: Histogram, labels: Tuple):
+        self.histogram = histogram
+        self.labels = labels
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """Holds metrics and renders the Prometheus text exposition format"""
+    
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+    
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+    
+    def _register(self, cls, name: str, documentation: str, labelnames: Sequence[str], **kwargs):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            return self._metrics[name]
+    
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = (), cls=None) -> Counter:
+        """Get or create a counter (cls allows scrape-time subclasses)"""
+        return self._register(cls or Counter, name, documentation, labelnames)
+    
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """Get or create a gauge"""
+        return self._register(Gauge, name, documentation, labelnames)
+    
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = Histogram.DEFAULT_BUCKETS) -> Histogram:
+        """Get or create a histogram"""
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+    
+    def render(self) -> str:
+        """Render every metric in the text exposition format"""
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, labels, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{self._format_labels(metric.labelnames, labels)} {self._format_value(value)}")
+        
+        return '\n'.join(lines) + '\n'
+    
+    @staticmethod
+    def _format_labels(labelnames: Tuple, labels: Tuple) -> str:
+        """Pair positional label values with their names; extra pairs are passed through"""
+        pairs = []
+        for i, value in enumerate(labels):
+            if isinstance(value, tuple):
+                pairs.append(value)
+            elif i < len(labelnames):
+                pairs.append((labelnames[i], value))
+        if not pairs:
+            return ''
+        escaped = []
+        for name, value in pairs:
+            value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            escaped.append(f'{name}="{value}"')
+        return '{' + ','.join(escaped) + '}'
+    
+    @staticmethod
+    def _format_value(value: float) -> str:
+        if value == float('inf'):
+            return '+Inf'
+        # repr keeps every significant digit (':g' would turn 1234567890.0 into 1.23457e+09)
+        return repr(value) if isinstance(value, float) else str(value)
+
+
+def classify_error(message: str) -> str:
+    """Reduce an error message to a small, stable error class label"""
+    text = str(message).lower()
+    if match := re.search(r'http error (\d{3})', text):
+        return f'http_{match.group(1)}'
+    if 'timed out' in text or 'timeout' in text:
+        return 'timeout'
+    if 'connection' in text or 'network' in text:
+        return 'connection'
+    if 'cancelled' in text:
+        return 'cancelled'
+    if 'ffmpeg' in text or 'postprocessing' in text:
+        return 'ffmpeg'
+    if 'unavailable' in text or 'private' in text:
+        return 'unavailable'
+    return 'other'
+
+
+def _children_cpu_seconds() -> Dict[Tuple, float]:
+    """CPU time of reaped child processes - FFmpeg/ffprobe are the only children we spawn"""
+    try:
+        import resource
+    except ImportError:
+        return {}
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return {(): usage.ru_utime + usage.ru_stime}
+
+
+class _ChildCPUCounter(Counter):
+    """Counter whose value is read from the OS at scrape time"""
+    
+    def samples(self) -> List[Tuple[str, Tuple, float]]:
+        return [('_total', labels, value) for labels, value in _children_cpu_seconds().items()]
+
+
+# Process-wide default registry and the metrics the downloader reports
+REGISTRY = MetricsRegistry()
+
+DOWNLOADED_BYTES = REGISTRY.counter(
+    'converso_downloaded_bytes', 'Bytes received by all downloads')
+JOB_SPEED = REGISTRY.gauge(
+    'converso_job_speed_bytes_per_second', 'Current transfer speed per running job', ('job',))
+DOWNLOAD_SPEED = REGISTRY.gauge(
+    'converso_download_speed_bytes_per_second', 'Current transfer speed of all running jobs')
+JOBS = REGISTRY.gauge(
+    'converso_jobs', 'Jobs currently in each state', ('state',))
+JOBS_FINISHED = REGISTRY.counter(
+    'converso_jobs_finished', 'Jobs that reached a terminal state', ('status',))
+PHASE_SECONDS = REGISTRY.histogram(
+    'converso_phase_seconds', 'Time spent per job phase', ('phase',))
+CACHE_REQUESTS = REGISTRY.counter(
+    'converso_cache_requests', 'Cache lookups by cache and result', ('cache', 'result'))
+RETRIES = REGISTRY.counter(
+    'converso_retries', 'yt-dlp retries by error class', ('error_class',))
+ERRORS = REGISTRY.counter(
+    'converso_errors', 'Failed operations by error class', ('operation', 'error_class'))
+YDL_INSTANCES = REGISTRY.counter(
+    'converso_ydl_instances', 'YoutubeDL pool acquisitions (created, reused, recycled) and closed instances of exited threads (reaped)', ('result',))
+PREFETCHES = REGISTRY.counter(
+    'converso_prefetches', 'Speculative metadata extractions by outcome', ('result',))
+COALESCED_DOWNLOADS = REGISTRY.counter(
+    'converso_coalesced_downloads', 'Download requests that joined an identical in-flight download')
+CONCURRENCY_LIMIT = REGISTRY.gauge(
+    'converso_concurrency_limit', 'Downloads allowed to run at once (adaptive controller)')
+CONCURRENCY_DECISIONS = REGISTRY.counter(
+    'converso_concurrency_decisions', 'Adaptive concurrency decisions by reason', ('reason',))
+GOVERNED_REQUESTS = REGISTRY.counter(
+    'converso_governed_requests', 'Requests admitted by the request governor', ('host', 'lane'))
+GOVERNOR_WAIT_SECONDS = REGISTRY.histogram(
+    'converso_governor_wait_seconds', 'Time requests waited for a token', ('lane',),
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300))
+GOVERNOR_COOLDOWNS = REGISTRY.counter(
+    'converso_governor_cooldowns', 'Throttling responses that started a host cooldown', ('host',))
+GC_RECLAIMED_BYTES = REGISTRY.counter(
+    'converso_gc_reclaimed_bytes', 'Bytes freed by the retention GC', ('kind',))
+FFMPEG_CPU_SECONDS = REGISTRY.counter(
+    'converso_ffmpeg_cpu_seconds', 'CPU seconds used by FFmpeg child processes', cls=_ChildCPUCounter)
+
+
+def aggregate_speed() -> float:
+    """Sum of the current per-job speeds"""
+    return sum(value for _, _, value in JOB_SPEED.samples())
+
+
+DOWNLOAD_SPEED.set_function(lambda: {(): aggregate_speed()})
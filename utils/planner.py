@@ -0,0 +1,196 @@
+"""Size-aware batch planning for Converso Downloader"""
+
+import heapq
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from .file_utils import FileManager
+from .format_handler import FormatProcessor
+
+
+class BatchPlanner:
+    """
+    Predict, order and budget a batch before any of it is downloaded
+    
+    Each item's size is that of the formats the download will actually
+    fetch - the video format picked for the quality preference plus the best
+    audio, as the Quick Download tab does, or a progressive format alone -
+    using filesize, else filesize_approx, else tbr x duration. Clips are
+    scaled to their range.
+    
+    Items run shortest-first, which minimizes mean completion time on the
+    worker pool. Waiting ages an item (AGING_RATE seconds of predicted
+    length per second waited), so deferred items brought back into a later
+    batch are not starved by a stream of shorter ones. Items are admitted in
+    that order while they fit the free-space budget of the output directory:
+    the rest are deferred, or refused when they could never fit.
+    """
+    
+    # Per-job transfer speed assumed until finished jobs give a measurement
+    DEFAULT_JOB_SPEED = 2 * 1024 * 1024
+    # Extraction, merging and post-processing per item
+    OVERHEAD_SECONDS = 5.0
+    AGING_RATE = 0.5
+    # Left free on the output filesystem
+    RESERVE_BYTES = 512 * 1024 * 1024
+    
+    def __init__(self, output_path: str, quality: str = 'best', audio_only: bool = False,
+                 workers: int = 3, job_speed: Optional[float] = None,
+                 reserve_bytes: int = RESERVE_BYTES):
+        self.output_path = output_path
+        self.quality = quality
+        self.audio_only = audio_only
+        self.workers = max(1, workers)
+        self.job_speed = job_speed or self.DEFAULT_JOB_SPEED
+        self.reserve_bytes = reserve_bytes
+    
+    @staticmethod
+    def select_formats(formats: List[dict], quality: str = 'best', audio_only: bool = False) -> List[dict]:
+        """The formats a quality preference resolves to: [video, audio], [progressive] or [audio]"""
+        categorized = FormatProcessor.categorize_formats(formats or [])
+        audio = FormatProcessor.sort_by_quality(categorized['audio_only'], 'audio')[:1]
+        if audio_only:
+            return audio or FormatProcessor.sort_by_quality(categorized['progressive'], 'audio')[:1]
+        
+        format_id = FormatProcessor.get_best_format_id(formats or [], quality)
+        video = [fmt for fmt in formats or [] if fmt.get('format_id') == format_id][:1]
+        if video and video[0] in categorized['progressive']:
+            return video
+        return video + audio
+    
+    @staticmethod
+    def format_spec(selected: List[dict], audio_only: bool = False) -> Optional[str]:
+        """yt-dlp format spec that downloads exactly the selection"""
+        if audio_only:
+            return 'bestaudio' if selected else None
+        if not selected:
+            return None
+        return '+'.join(fmt['format_id'] for fmt in selected)
+    
+    @staticmethod
+    def estimate_sizes(selections: Sequence[Sequence[dict]], durations: Sequence[Optional[float]]) -> List[int]:
+        """
+        Predicted bytes per item, for a whole batch at once
+        The size fields of every selected format are gathered into columns
+        and resolved together, then summed per item; 0 means unknown.
+        """
+        owner = [i for i, selected in enumerate(selections) for _ in selected]
+        flat = [fmt for selected in selections for fmt in selected]
+        
+        filesize = [fmt.get('filesize') or 0 for fmt in flat]
+        approx = [fmt.get('filesize_approx') or 0 for fmt in flat]
+        tbr = [fmt.get('tbr') or 0 for fmt in flat]
+        duration = [durations[i] or 0 for i in owner]
+        
+        # tbr is in kbit/s
+        sizes = [exact or approximate or rate * 125 * length
+                 for exact, approximate, rate, length in zip(filesize, approx, tbr, duration)]
+        
+        totals = [0.0] * len(selections)
+        for i, size in zip(owner, sizes):
+            totals[i] += size
+        return [int(total) for total in totals]
+    
+    @staticmethod
+    def estimate_info_bytes(info: Dict, quality: str = 'best', audio_only: bool = False) -> int:
+        """Predicted bytes for one extracted video"""
+        selected = BatchPlanner.select_formats(info.get('formats') or [], quality, audio_only)
+        return BatchPlanner.estimate_sizes([selected], [info.get('duration')])[0]
+    
+    @staticmethod
+    def job_speed_from(jobs: Iterable) -> Optional[float]:
+        """Mean per-job transfer speed of finished jobs, or None without any"""
+        total_bytes, total_seconds = 0, 0.0
+        for job in jobs:
+            result = job.result or {}
+            if job.status == 'finished' and result.get('filesize') and job.started_at and job.finished_at:
+                total_bytes += result['filesize']
+                total_seconds += max(job.finished_at - job.started_at - BatchPlanner.OVERHEAD_SECONDS, 1.0)
+        return total_bytes / total_seconds if total_seconds else None
+    
+    def plan(self, items: List[Dict], infos: List[Optional[Dict]], now: Optional[float] = None) -> Dict:
+        """
+        Order a batch and check it against the free-space budget
+        items are parse_batch_line() dicts (url, start, end; optionally
+        queued_at), infos the extracted metadata in the same order.
+        """
+        now = time.time() if now is None else now
+        selections, durations, scale = [], [], []
+        for item, info in zip(items, infos):
+            formats = (info or {}).get('formats') or []
+            selections.append(self.select_formats(formats, self.quality, self.audio_only))
+            duration = (info or {}).get('duration') or 0
+            durations.append(duration)
+            scale.append(self._clip_fraction(item, duration))
+        sizes = self.estimate_sizes(selections, durations)
+        
+        candidates, refused = [], []
+        for index, (item, info, selected, size, fraction) in enumerate(zip(items, infos, selections, sizes, scale)):
+            entry = {
+                **item,
+                'title': (info or {}).get('title'),
+                'format_spec': self.format_spec(selected, self.audio_only),
+                'bytes': int(size * fraction),
+            }
+            if not info or not entry['format_spec']:
+                refused.append({**entry, 'reason': 'unavailable'})
+                continue
+            entry['seconds'] = round(entry['bytes'] / self.job_speed + self.OVERHEAD_SECONDS, 1)
+            waited = max(0.0, now - item.get('queued_at', now))
+            # Unknown sizes cannot be ranked: they go last, in input order
+            rank = (not entry['bytes'], entry['seconds'] - self.AGING_RATE * waited, index)
+            candidates.append((rank, len(selected) > 1, entry))
+        candidates.sort(key=lambda candidate: candidate[0])
+        
+        free = FileManager.free_space(self.output_path)
+        budget = None if free is None else max(0, free - self.reserve_bytes)
+        planned, deferred, used = [], [], 0
+        for _, merges, entry in candidates:
+            # The separate streams sit next to the merged file until the merge ends
+            peak = entry['bytes'] * (2 if merges else 1)
+            if budget is not None and used + peak > budget:
+                if peak > budget:
+                    refused.append({**entry, 'reason': 'too_large'})
+                else:
+                    # Keep the first queued_at so the item ages across batches
+                    deferred.append({**entry, 'reason': 'space', 'queued_at': entry.get('queued_at', now)})
+                continue
+            used += entry['bytes']
+            planned.append(entry)
+        
+        eta = self._schedule(planned)
+        return {
+            'items': planned,
+            'deferred': deferred,
+            'refused': refused,
+            'unknown_size': sum(1 for entry in planned if not entry['bytes']),
+            'total_bytes': used,
+            'eta_seconds': eta,
+            'free_bytes': free,
+            'budget_bytes': budget,
+            'workers': self.workers,
+            'job_speed': self.job_speed,
+        }
+    
+    def _schedule(self, planned: List[Dict]) -> float:
+        """Simulate the worker pool: set each item's start and finish offsets, return the makespan"""
+        slots = [0.0] * min(self.workers, len(planned))
+        finish = 0.0
+        for entry in planned:
+            start = heapq.heappop(slots)
+            entry['start_seconds'] = round(start, 1)
+            entry['finish_seconds'] = round(start + entry['seconds'], 1)
+            heapq.heappush(slots, start + entry['seconds'])
+            finish = max(finish, start + entry['seconds'])
+        return round(finish, 1)
+    
+    @staticmethod
+    def _clip_fraction(item: Dict, duration: float) -> float:
+        """Share of the video a clip covers (1.0 for whole videos)"""
+        start, end = item.get('start'), item.get('end')
+        if not duration or (start is None and end is None):
+            return 1.0
+        start = min(max(start or 0, 0), duration)
+        end = duration if end is None else min(max(end, start), duration)
+        return (end - start) / duration
+
@@ -0,0 +1,138 @@
+"""Managed yt-dlp player/signature cache for Converso Downloader"""
+
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+
+class PlayerCache:
+    """
+    Shared cache directory for yt-dlp's solved YouTube player functions
+    
+    yt-dlp stores the deciphered signature and n-parameter functions per player
+    version ('youtube-sigfuncs', 'youtube-nsig'). Pointing every instance at one
+    directory under ~/.converso - including the frozen build, whose default
+    location is not stable - means each player is solved once, not per run.
+    """
+    
+    CACHE_DIR = Path.home() / '.converso' / 'cache' / 'yt-dlp'
+    MAX_BYTES = 20 * 1024 * 1024
+    
+    # Older players are dropped once YouTube has rolled out newer ones
+    KEEP_PLAYERS = 3
+    PLAYER_SECTIONS = ('youtube-sigfuncs', 'youtube-nsig')
+    
+    # Short, long-lived public video used to solve the current player at startup
+    WARMUP_URL = 'https://www.youtube.com/watch?v=jNQXAC9IVRQ'
+    
+    _PLAYER_ID_RE = re.compile(r'^(?:js_)?([0-9a-zA-Z_-]+?)(?:_[\d.]+)?\.json$')
+    _warmup_started = False
+    _warmup_lock = threading.Lock()
+    
+    @staticmethod
+    def path() -> str:
+        """Cache directory passed to yt-dlp as 'cachedir'"""
+        return str(PlayerCache.CACHE_DIR)
+    
+    @staticmethod
+    def prune(cache_dir: Optional[str] = None, max_bytes: int = MAX_BYTES,
+              keep_players: int = KEEP_PLAYERS) -> Dict:
+        """
+        Invalidate stale entries and enforce the size limit
+        - files written by another yt-dlp version are removed
+        - only the keep_players most recently used players are kept
+        - then the oldest files go until the directory fits in max_bytes
+        """
+        root = Path(cache_dir) if cache_dir else PlayerCache.CACHE_DIR
+        stats = {'removed': 0, 'freed_bytes': 0, 'kept_bytes': 0}
+        if not root.is_dir():
+            return stats
+        
+        try:
+            from yt_dlp.version import __version__ as ytdlp_version
+        except ImportError:
+            ytdlp_version = None
+        
+        files = []
+        players: Dict[str, float] = {}
+        for section in root.iterdir():
+            if not section.is_dir():
+                continue
+            for entry in os.scandir(section):
+                if not entry.is_file():
+                    continue
+                st = entry.stat()
+                player_id = None
+                if section.name in PlayerCache.PLAYER_SECTIONS:
+                    if match := PlayerCache._PLAYER_ID_RE.match(entry.name):
+                        player_id = match.group(1)
+                        players[player_id] = max(players.get(player_id, 0), st.st_mtime)
+                files.append((st.st_mtime, st.st_size, entry.path, player_id))
+        
+        current_players = set(sorted(players, key=players.get, reverse=True)[:keep_players])
+        
+        def remove(size: int, filepath: str):
+            try:
+                os.remove(filepath)
+                stats['removed'] += 1
+                stats['freed_bytes'] += size
+            except OSError as e:
+                print(f"Error pruning player cache: {e}")
+        
+        remaining = []
+        for mtime, size, filepath, player_id in files:
+            if player_id and player_id not in current_players:
+                remove(size, filepath)
+            elif ytdlp_version and PlayerCache._written_by(filepath) not in (None, ytdlp_version):
+                remove(size, filepath)
+            else:
+                remaining.append((mtime, size, filepath))
+        
+        total = sum(size for _, size, _ in remaining)
+        for mtime, size, filepath in sorted(remaining):
+            if total <= max_bytes:
+                break
+            remove(size, filepath)
+            total -= size
+        
+        stats['kept_bytes'] = total
+        return stats
+    
+    @staticmethod
+    def _written_by(filepath: str) -> Optional[str]:
+        """yt-dlp version recorded in a cache file"""
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                return json.load(f).get('yt-dlp_version')
+        except (OSError, ValueError, AttributeError):
+            return None
+    
+    @staticmethod
+    def warm_up(url: str = WARMUP_URL) -> bool:
+        """
+        Prune, then solve the current player once in a background thread
+        Only the first call per process does anything; returns whether it started
+        """
+        with PlayerCache._warmup_lock:
+            if PlayerCache._warmup_started:
+                return False
+            PlayerCache._warmup_started = True
+        
+        threading.Thread(target=PlayerCache._warm_up, args=(url,), name='player_cache_warmup', daemon=True).start()
+        return True
+    
+    @staticmethod
+    def _warm_up(url: str):
+        from .ydl_pool import YDL_POOL
+        
+        try:
+            PlayerCache.prune()
+            with YDL_POOL.acquire({'quiet': True, 'no_warnings': True, 'skip_download': True}) as ydl:
+                ydl.extract_info(url, download=False)
+        except Exception as e:
+            print(f"Player cache warm-up failed: {e}")
+        finally:
+            YDL_POOL.clear()
@@ -0,0 +1,100 @@
+"""Speculative metadata prefetch for search results"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from .downloader import VideoInfoExtractor, VideoDownloader
+from .governor import GOVERNOR
+from .metrics import PREFETCHES
+
+
+class MetadataPrefetcher:
+    """
+    Warm the extractor's metadata cache for the top search results
+    
+    Runs at most MAX_WORKERS extractions on its own small pool, in the
+    governor's background lane, so interactive extractions never queue behind
+    it. A new result page cancels everything
+    still queued for the previous one, and nothing new starts while more than
+    max_active_downloads downloads are running. When one prefetcher serves
+    several sessions, each owner's page is tracked separately, so a new query
+    in one session does not cancel another's prefetches.
+    """
+    
+    TOP_K = 3
+    MAX_WORKERS = 2
+    
+    def __init__(self, extractor: VideoInfoExtractor, top_k: int = TOP_K,
+                 max_active_downloads: int = 0):
+        self.extractor = extractor
+        self.top_k = top_k
+        self.max_active_downloads = max_active_downloads
+        self.executor = ThreadPoolExecutor(max_workers=self.MAX_WORKERS, thread_name_prefix='converso_prefetch')
+        # Per owner: {'generation', 'urls', 'futures'}
+        self._pages: Dict[Optional[str], Dict] = {}
+        self._lock = threading.Lock()
+    
+    def prefetch(self, results: List[Dict], owner: Optional[str] = None) -> int:
+        """
+        Queue the top results of owner's new page; returns how many were queued
+        Calling again with the same URLs keeps the current work
+        """
+        urls = [r['url'] for r in results[:self.top_k] if r.get('url')]
+        
+        with self._lock:
+            page = self._pages.setdefault(owner, {'generation': 0, 'urls': None, 'futures': []})
+            if urls == page['urls']:
+                return 0
+            self._cancel_locked(page)
+            page['urls'] = urls
+            generation = page['generation']
+            
+            queued = 0
+            for url in urls:
+                if self.extractor.cached_info(url, 'full'):
+                    continue
+                page['futures'].append(self.executor.submit(self._run, url, owner, generation))
+                queued += 1
+        return queued
+    
+    def cancel(self, owner: Optional[str] = None):
+        """Drop owner's queued prefetches (running ones finish and still fill the cache)"""
+        with self._lock:
+            page = self._pages.pop(owner, None)
+            if page:
+                self._cancel_locked(page)
+    
+    def shutdown(self):
+        """Cancel queued work and stop the worker pool"""
+        with self._lock:
+            for page in self._pages.values():
+                self._cancel_locked(page)
+            self._pages.clear()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+    
+    @staticmethod
+    def _cancel_locked(page: Dict):
+        page['generation'] += 1
+        for future in page['futures']:
+            if future.cancel():
+                PREFETCHES.inc(1, ('cancelled',))
+        page['futures'] = []
+    
+    def _run(self, url: str, owner: Optional[str], generation: int):
+        """Worker body - re-check relevance and budget right before extracting"""
+        page = self._pages.get(owner)
+        if page is None or generation != page['generation']:
+            PREFETCHES.inc(1, ('cancelled',))
+            return
+        if VideoDownloader.active_downloads() > self.max_active_downloads:
+            PREFETCHES.inc(1, ('skipped',))
+            return
+        
+        try:
+            with GOVERNOR.background():
+                info = self.extractor.extract_info_shared(url)
+            PREFETCHES.inc(1, ('fetched' if info else 'failed',))
+        except Exception as e:
+            PREFETCHES.inc(1, ('failed',))
+            print(f"Prefetch error: {e}")
@@ -0,0 +1,227 @@
+"""Retention and garbage collection for Converso Downloader"""
+
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from .downloader import VideoDownloader
+from .manifest import OUTPUTS, OutputManifest
+from .metrics import GC_RECLAIMED_BYTES
+
+
+class RetentionManager:
+    """
+    Low-priority cleanup honoring keep_history_days
+    
+    - finished jobs, missing library entries and trace files older than the
+      retention window are expired
+    - yt-dlp intermediates (.part, .part-FragN, .ytdl, .temp.*, un-merged
+      .fNNN streams) are orphans once nothing has written to them for the
+      grace period; they are removed in small batches
+    
+    Only intermediates of downloads this app started are candidates: the
+    file must sit next to a stem in the output manifest and be named after
+    it, so look-alike files of other programs in a shared Downloads folder
+    are never touched. Batches are skipped while any download in this
+    process is running, and each file is removed only while no download of
+    its stem is (OutputManifest.idle), so a job's files are never deleted
+    under it. The grace period protects files of other processes and
+    interrupted jobs that may still be resumed.
+    """
+    
+    INTERMEDIATE_RE = re.compile(
+        r'(?:\.part(?:-Frag\d+(?:\.part)?)?|\.ytdl|\.temp(?:\.[^.\\/]+)?|\.f\d+\.[^.\\/]+)$'
+    )
+    # What yt-dlp appends to an output stem: [.fNNN][.temp].ext[.part[-FragN[.part]] | .ytdl]
+    STEM_SUFFIX_RE = re.compile(
+        r'(?:\.f\d+)?(?:\.temp)?\.[^.\\/]+(?:\.part(?:-Frag\d+(?:\.part)?)?|\.ytdl)?'
+    )
+    
+    GRACE_SECONDS = 6 * 60 * 60
+    BATCH_SIZE = 100
+    BATCH_PAUSE = 0.5
+    RUN_INTERVAL = 6 * 60 * 60
+    TRACES_DIR = Path.home() / '.converso' / 'traces'
+    
+    def __init__(self, download_path: Optional[str] = None, keep_history_days: int = 30, job_manager=None,
+                 library=None, grace_seconds: int = GRACE_SECONDS, batch_size: int = BATCH_SIZE,
+                 manifest: OutputManifest = OUTPUTS):
+        self.download_path = download_path
+        self.manifest = manifest
+        self.keep_history_days = keep_history_days
+        self.job_manager = job_manager
+        self.library = library
+        self.grace_seconds = grace_seconds
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def find_orphans(self, now: Optional[float] = None) -> List[Tuple[str, int, str]]:
+        """(path, size, stem) of this app's intermediate files untouched for the grace period"""
+        now = time.time() if now is None else now
+        return self._orphans(self._intermediates(), now)
+    
+    def _orphans(self, found: List[Tuple[str, os.stat_result, str]], now: float) -> List[Tuple[str, int, str]]:
+        cutoff = now - self.grace_seconds
+        return [(path, st.st_size, stem) for path, st, stem in found if st.st_mtime < cutoff]
+    
+    def _intermediates(self) -> List[Tuple[str, os.stat_result, str]]:
+        """(path, stat, stem) of every intermediate file next to a manifest stem"""
+        found = []
+        # Only the folders downloads were written to (within download_path when
+        # one is given - otherwise scratch directories too), each scanned once
+        by_folder: Dict[str, Dict[str, str]] = {}
+        scope = os.path.join(os.path.abspath(self.download_path), '') if self.download_path else None
+        for stem in self.manifest.stems():
+            if scope and not stem.startswith(scope):
+                continue
+            by_folder.setdefault(os.path.dirname(stem), {})[os.path.basename(stem)] = stem
+        
+        for folder, names in by_folder.items():
+            try:
+                with os.scandir(folder) as entries:
+                    for entry in entries:
+                        if not self.INTERMEDIATE_RE.search(entry.name):
+                            continue
+                        stem = self._owning_stem(entry.name, names)
+                        if stem and entry.is_file(follow_symlinks=False):
+                            found.append((entry.path, entry.stat(follow_symlinks=False), stem))
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                print(f"Error scanning for orphaned files: {e}")
+        
+        return found
+    
+    @classmethod
+    def _owning_stem(cls, name: str, names: Dict[str, str]) -> Optional[str]:
+        """The manifest stem a file name is an intermediate of, if any"""
+        dot = name.find('.')
+        while dot > 0:
+            stem = names.get(name[:dot])
+            if stem and cls.STEM_SUFFIX_RE.fullmatch(name, dot):
+                return stem
+            dot = name.find('.', dot + 1)
+        return None
+    
+    def collect(self, dry_run: bool = False, now: Optional[float] = None) -> Dict:
+        """Run one GC pass; returns what was (or with dry_run, would be) reclaimed"""
+        now = time.time() if now is None else now
+        started = time.perf_counter()
+        history_cutoff = now - self.keep_history_days * 86400
+        stats = {
+            'orphans': 0, 'removed': 0, 'reclaimed_bytes': 0, 'deferred': 0,
+            'jobs_expired': 0, 'library_expired': 0, 'traces_removed': 0,
+        }
+        
+        if self.keep_history_days and self.keep_history_days > 0 and not dry_run:
+            if self.job_manager:
+                stats['jobs_expired'] = self.job_manager.prune_history(history_cutoff)
+            if self.library:
+                stats['library_expired'] = self.library.expire(history_cutoff)
+            stats['traces_removed'] = self._expire_traces(history_cutoff, stats)
+        
+        # One scan serves both the sweep and the manifest cleanup after it
+        found = self._intermediates()
+        orphans = self._orphans(found, now)
+        stats['orphans'] = len(orphans)
+        removed = set()
+        
+        if dry_run:
+            stats['reclaimed_bytes'] = sum(size for _, size, _ in orphans)
+        else:
+            for i in range(0, len(orphans), self.batch_size):
+                if self._stop.is_set():
+                    stats['deferred'] += len(orphans) - i
+                    break
+                
+                if VideoDownloader.active_downloads():
+                    # A job is running - leave the rest for the next pass
+                    stats['deferred'] += len(orphans) - i
+                    break
+                
+                for path, size, stem in orphans[i:i + self.batch_size]:
+                    with self.manifest.idle(stem) as stem_idle:
+                        if not stem_idle:
+                            continue
+                        # Written to since the scan (e.g. resumed by another process)
+                        try:
+                            if os.stat(path).st_mtime >= now - self.grace_seconds:
+                                continue
+                        except OSError:
+                            continue
+                        if self._remove(path, size, 'intermediate', stats):
+                            stats['removed'] += 1
+                            removed.add(path)
+                
+                self._stop.wait(self.BATCH_PAUSE)
+            
+            self._forget_cleaned(now, {stem for path, _, stem in found if path not in removed})
+        
+        stats['seconds'] = round(time.perf_counter() - started, 3)
+        return stats
+    
+    def _forget_cleaned(self, now: float, remaining: Set[str]):
+        """Drop manifest stems recorded before the grace period that have no intermediates left"""
+        cutoff = now - self.grace_seconds
+        self.manifest.forget(
+            stem for stem, recorded in self.manifest.stems().items()
+            if recorded < cutoff and stem not in remaining
+        )
+    
+    def start(self, interval: int = RUN_INTERVAL):
+        """Run collect() in a background thread every interval seconds"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name='converso_gc', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop the background thread after the current batch"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+    
+    def _run(self, interval: int):
+        # Let startup work (player warm-up, library reconcile) go first
+        if self._stop.wait(60):
+            return
+        while not self._stop.is_set():
+            try:
+                stats = self.collect()
+                if stats['removed'] or stats['traces_removed'] or stats['jobs_expired'] or stats['library_expired']:
+                    print(f"Retention GC: {stats}")
+            except Exception as e:
+                print(f"Retention GC error: {e}")
+            self._stop.wait(interval)
+    
+    def _expire_traces(self, cutoff: float, stats: Dict) -> int:
+        """Trace and profile files are history too"""
+        removed = 0
+        if not self.TRACES_DIR.is_dir():
+            return removed
+        for entry in os.scandir(self.TRACES_DIR):
+            try:
+                st = entry.stat()
+                if entry.is_file() and st.st_mtime < cutoff and self._remove(entry.path, st.st_size, 'trace', stats):
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+    
+    @staticmethod
+    def _remove(path: str, size: int, kind: str, stats: Dict) -> bool:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            print(f"Error removing {path}: {e}")
+            return False
+        stats['reclaimed_bytes'] += size
+        GC_RECLAIMED_BYTES.inc(size, (kind,))
+        return True
@@ -0,0 +1,91 @@
+"""Single-flight coalescing of identical concurrent work for Converso Downloader"""
+
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class Flight:
+    """One in-flight call: its shared result and the progress subscribers"""
+    
+    def __init__(self, key: Hashable, owner: Optional[str] = None):
+        self.key = key
+        self.owner = owner
+        self.future: Future = Future()
+        self.future.set_running_or_notify_cancel()
+        self.subscribers: List[Callable] = []
+        self.followers = 0
+        self.last_progress: Optional[Dict] = None
+        # Set when the leader gave up (e.g. cancelled); followers then retry
+        self.abandoned = False
+        self._lock = threading.Lock()
+    
+    def subscribe(self, callback: Optional[Callable]):
+        if callback is None:
+            return
+        with self._lock:
+            self.subscribers.append(callback)
+            last = self.last_progress
+        # Late joiners start from the current state instead of a blank bar
+        if last is not None:
+            callback(last)
+    
+    def unsubscribe(self, callback: Optional[Callable]):
+        with self._lock:
+            if callback in self.subscribers:
+                self.subscribers.remove(callback)
+    
+    def publish(self, progress: Dict):
+        """Fan one progress update out to every subscriber"""
+        with self._lock:
+            self.last_progress = progress
+            subscribers = list(self.subscribers)
+        for callback in subscribers:
+            try:
+                callback(progress)
+            except Exception as e:
+                print(f"Progress subscriber error: {e}")
+
+
+class SingleFlight:
+    """
+    Coalesce identical concurrent calls
+    
+    The first caller for a key becomes the leader and does the work; callers
+    arriving while it runs attach to the same Flight, receive its progress
+    updates and share its result. The key is forgotten as soon as the leader
+    finishes, so this never acts as a cache.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, Flight] = {}
+    
+    def join(self, key: Hashable, progress_callback: Optional[Callable] = None,
+             owner: Optional[str] = None) -> Tuple[Flight, bool]:
+        """Return (flight, is_leader); progress_callback is subscribed either way"""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Flight(key, owner)
+            else:
+                flight.followers += 1
+        flight.subscribe(progress_callback)
+        return flight, leader
+    
+    def finish(self, flight: Flight, result=None, error: Optional[BaseException] = None,
+               abandoned: bool = False):
+        """Leader only: release the key and wake the followers"""
+        with self._lock:
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+        flight.abandoned = abandoned
+        if error is not None:
+            flight.future.set_exception(error)
+        else:
+            flight.future.set_result(result)
+    
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
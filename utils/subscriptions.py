@@ -0,0 +1,253 @@
+"""Incremental channel and playlist subscriptions for Converso Downloader"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .metrics import ERRORS, PHASE_SECONDS, classify_error
+from .governor import GOVERNOR
+from .url_canon import URLCanonicalizer
+from .ydl_pool import YDL_POOL
+
+
+class SubscriptionManager:
+    """
+    Track channels and playlists and queue only their new uploads
+    
+    Each source keeps a high-water mark: the most recent video IDs seen and
+    the last sync time. Channel upload listings are newest-first, so a sync
+    pages through the listing lazily and stops at the first known ID - two
+    new uploads on a 5,000 video channel cost the first page only. Regular
+    playlists grow at the end, so they are listed flat in full and only the
+    unseen IDs are queued.
+    """
+    
+    STORE_PATH = Path.home() / '.converso' / 'subscriptions.json'
+    
+    # Recent IDs kept per newest-first source; several, in case the newest is deleted
+    KNOWN_IDS = 50
+    
+    # Safety stop if every known ID has disappeared from a newest-first listing
+    MAX_NEW_PER_SYNC = 200
+    
+    DEFAULT_INTERVAL = 60 * 60
+    CHECK_INTERVAL = 60
+    
+    def __init__(self, store_path: Optional[str] = None, on_new: Optional[Callable[[Dict, List[str]], None]] = None):
+        self.store_path = Path(store_path) if store_path else self.STORE_PATH
+        self.on_new = on_new
+        self.ydl_opts = {
+            'quiet': True,
+            'no_warnings': True,
+            'extract_flat': 'in_playlist',
+            'skip_download': True,
+        }
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.subscriptions: Dict[str, Dict] = self._load()
+    
+    def add(self, url: str, interval: Optional[int] = None, backfill: int = 0) -> Dict:
+        """
+        Subscribe to a channel or playlist URL
+        interval is in seconds; backfill is how many existing videos the first
+        sync queues (0 only records the current high-water mark)
+        """
+        result = URLCanonicalizer.canonicalize(url)
+        if result.kind == 'channel':
+            key = result.canonical_url
+            listing_url = f"{result.canonical_url}/videos"
+            order = 'newest'
+        elif result.playlist_id:
+            key = f"youtube:playlist:{result.playlist_id}"
+            listing_url = f"https://www.youtube.com/playlist?list={result.playlist_id}"
+            # UU... is a channel's uploads playlist, which is newest-first
+            order = 'newest' if result.playlist_id.startswith('UU') else 'append'
+        else:
+            return {'success': False, 'error': 'Only channel and playlist URLs can be subscribed'}
+        
+        with self._lock:
+            subscription = self.subscriptions.setdefault(key, {
+                'key': key,
+                'url': listing_url,
+                'order': order,
+                'title': None,
+                'known_ids': [],
+                'backfill': max(0, backfill),
+                'last_sync': None,
+                'last_new': 0,
+                'created_at': time.time(),
+            })
+            subscription['interval'] = interval or subscription.get('interval') or self.DEFAULT_INTERVAL
+            self._save()
+        
+        return {'success': True, **subscription}
+    
+    def remove(self, key: str) -> bool:
+        """Unsubscribe by key (see list_subscriptions)"""
+        with self._lock:
+            removed = self.subscriptions.pop(key, None) is not None
+            if removed:
+                self._save()
+        return removed
+    
+    def list_subscriptions(self) -> List[Dict]:
+        """All subscriptions, oldest first"""
+        with self._lock:
+            return [dict(sub) for sub in self.subscriptions.values()]
+    
+    def due(self, now: Optional[float] = None) -> List[str]:
+        """Keys of subscriptions whose interval has elapsed"""
+        now = time.time() if now is None else now
+        with self._lock:
+            return [
+                key for key, sub in self.subscriptions.items()
+                if not sub['last_sync'] or now - sub['last_sync'] >= sub['interval']
+            ]
+    
+    def sync(self, key: str) -> Dict:
+        """
+        Poll one source and return its new video URLs, oldest first
+        The high-water mark only moves once the listing was read successfully
+        """
+        with self._lock:
+            subscription = self.subscriptions.get(key)
+            if subscription is None:
+                return {'success': False, 'key': key, 'error': 'Unknown subscription'}
+            subscription = dict(subscription)
+        
+        known = set(subscription['known_ids'])
+        first_sync = subscription['last_sync'] is None
+        newest_first = subscription['order'] == 'newest'
+        new_ids, seen_ids = [], []
+        started = time.perf_counter()
+        
+        try:
+            with GOVERNOR.background(), YDL_POOL.acquire(self.ydl_opts) as ydl:
+                info = self._resolve_listing(ydl, subscription['url'])
+                title = info.get('title') or subscription['title']
+                
+                for entry in info.get('entries') or []:
+                    video_id = entry.get('id') if entry else None
+                    if not video_id:
+                        continue
+                    
+                    if first_sync:
+                        # Only record the current state; backfill is picked below
+                        seen_ids.append(video_id)
+                        if newest_first and len(seen_ids) >= max(self.KNOWN_IDS, subscription['backfill']):
+                            break
+                        continue
+                    
+                    if video_id in known:
+                        if newest_first:
+                            break
+                        continue
+                    
+                    new_ids.append(video_id)
+                    seen_ids.append(video_id)
+                    if newest_first and len(new_ids) >= self.MAX_NEW_PER_SYNC:
+                        print(f"Subscription {key}: no known video within {self.MAX_NEW_PER_SYNC} entries, stopping")
+                        break
+        
+        except Exception as e:
+            ERRORS.inc(1, ('subscription', classify_error(e)))
+            print(f"Error syncing subscription {key}: {e}")
+            return {'success': False, 'key': key, 'error': str(e)}
+        finally:
+            PHASE_SECONDS.observe(time.perf_counter() - started, ('subscription_sync',))
+        
+        if first_sync and subscription['backfill']:
+            # Playlists list their newest additions last
+            new_ids = seen_ids[:subscription['backfill']] if newest_first else seen_ids[-subscription['backfill']:]
+        
+        if newest_first:
+            known_ids = (seen_ids + subscription['known_ids'])[:self.KNOWN_IDS]
+        else:
+            # Playlists grow anywhere, so every ID seen so far is kept
+            known_ids = subscription['known_ids'] + seen_ids
+        
+        urls = [f"https://www.youtube.com/watch?v={video_id}" for video_id in
+                (reversed(new_ids) if newest_first else new_ids)]
+        
+        with self._lock:
+            if key in self.subscriptions:
+                self.subscriptions[key].update({
+                    'title': title,
+                    'known_ids': known_ids,
+                    'last_sync': time.time(),
+                    'last_new': len(urls),
+                })
+                self._save()
+        
+        result = {'success': True, 'key': key, 'title': title, 'new': urls}
+        if urls and self.on_new:
+            try:
+                self.on_new(result, urls)
+            except Exception as e:
+                print(f"Subscription callback error: {e}")
+        return result
+    
+    def sync_due(self) -> List[Dict]:
+        """Sync every subscription whose interval has elapsed"""
+        return [self.sync(key) for key in self.due()]
+    
+    def start(self, check_interval: int = CHECK_INTERVAL):
+        """Run sync_due in a background thread until stop()"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(check_interval,), name='converso_subscriptions', daemon=True
+        )
+        self._thread.start()
+    
+    def stop(self):
+        """Stop the background scheduler"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+    
+    def _run(self, check_interval: int):
+        while not self._stop.is_set():
+            try:
+                self.sync_due()
+            except Exception as e:
+                print(f"Subscription scheduler error: {e}")
+            self._stop.wait(check_interval)
+    
+    @staticmethod
+    def _resolve_listing(ydl, url: str, max_redirects: int = 3) -> Dict:
+        """
+        Extract without processing, so 'entries' stays a lazy generator that
+        requests continuation pages only as it is consumed
+        """
+        info = ydl.extract_info(url, download=False, process=False) or {}
+        for _ in range(max_redirects):
+            if info.get('_type') not in ('url', 'url_transparent'):
+                break
+            info = ydl.extract_info(info['url'], download=False, process=False) or {}
+        return info
+    
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            if self.store_path.exists():
+                with open(self.store_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"Error loading subscriptions: {e}")
+        return {}
+    
+    def _save(self):
+        """Write the store atomically; called with the lock held"""
+        try:
+            self.store_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.store_path.with_suffix('.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.subscriptions, f, indent=2)
+            os.replace(temp_path, self.store_path)
+        except Exception as e:
+            print(f"Error saving subscriptions: {e}")
@@ -0,0 +1,195 @@
+"""Per-job phase tracing and profiling hooks for Converso Downloader"""
+
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Optional
+
+
+class Tracer:
+    """
+    Collect phase spans for one job and export them as a Chrome trace
+    The JSON file opens in chrome://tracing or https://ui.perfetto.dev
+    """
+    
+    def __init__(self, name: str, output_dir: Optional[str] = None):
+        self.name = name
+        self.output_dir = Path(output_dir) if output_dir else Path.home() / '.converso' / 'traces'
+        self.events = []
+        self.pid = os.getpid()
+        self._origin = time.perf_counter()
+        self._open: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+    
+    def _now_us(self) -> float:
+        return (time.perf_counter() - self._origin) * 1_000_000
+    
+    def span(self, name: str, category: str = 'phase', **args):
+        """Context manager recording one complete span"""
+        return _Span(self, name, category, args)
+    
+    def begin(self, key: str, name: str, category: str = 'phase', **args):
+        """Open a span that is closed later by end(key) - for hook-driven phases"""
+        with self._lock:
+            self._open.setdefault(key, (name, category, self._now_us(), threading.get_ident(), args))
+    
+    def end(self, key: str, **args) -> Optional[float]:
+        """Close a span opened with begin(); returns its duration in seconds"""
+        with self._lock:
+            opened = self._open.pop(key, None)
+        if not opened:
+            return None
+        
+        name, category, start, tid, begin_args = opened
+        duration = self._now_us() - start
+        self._add(name, category, start, duration, tid, {**begin_args, **args})
+        return duration / 1_000_000
+    
+    def instant(self, name: str, **args):
+        """Record a point-in-time marker"""
+        with self._lock:
+            self.events.append({
+                'name': name, 'ph': 'i', 's': 't', 'ts': self._now_us(),
+                'pid': self.pid, 'tid': threading.get_ident(), 'args': args,
+            })
+    
+    def _add(self, name: str, category: str, start: float, duration: float, tid: int, args: Dict):
+        with self._lock:
+            self.events.append({
+                'name': name, 'cat': category, 'ph': 'X',
+                'ts': start, 'dur': duration,
+                'pid': self.pid, 'tid': tid, 'args': args,
+            })
+    
+    def save(self, suffix: str = '') -> str:
+        """Close open spans and write the Chrome trace JSON; returns the path"""
+        with self._lock:
+            open_keys = list(self._open)
+        for key in open_keys:
+            self.end(key, incomplete=True)
+        
+        with self._lock:
+            events = list(self.events)
+        
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        path = self.output_dir / f"{self.name}{suffix}.trace.json"
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'traceEvents': events,
+                'displayTimeUnit': 'ms',
+                'otherData': {'job': self.name},
+            }, f, default=str)
+        return str(path)
+
+
+class _Span:
+    """Tracer.span context manager"""
+    
+    def __init__(self, tracer: Tracer, name: str, category: str, args: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+    
+    def __enter__(self):
+        self.start = self.tracer._now_us()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type:
+            self.args['error'] = str(exc)
+        self.tracer._add(
+            self.name, self.category, self.start,
+            self.tracer._now_us() - self.start, threading.get_ident(), self.args
+        )
+        return False
+
+
+class JobProfiler:
+    """
+    Opt-in profiler for a single job
+    mode 'cprofile' writes a .prof file (open with snakeviz or pstats);
+    mode 'sample' samples the job thread's stack and writes a .folded file
+    for flamegraph tools, adding almost no overhead to the job itself.
+    
+    Only one cProfile profiler can be active per process (Python 3.12+
+    refuses a second enable()), so while one job is profiled other jobs
+    asking for 'cprofile' run unprofiled; 'sample' has no such limit.
+    """
+    
+    SAMPLE_INTERVAL = 0.005
+    
+    _cprofile_lock = threading.Lock()
+    
+    def __init__(self, name: str, mode: str = 'cprofile', output_dir: Optional[str] = None):
+        self.name = name
+        self.mode = mode
+        self.output_dir = Path(output_dir) if output_dir else Path.home() / '.converso' / 'traces'
+        self._profile: Optional[cProfile.Profile] = None
+        self._stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+    
+    def start(self):
+        """Begin profiling the calling thread"""
+        if self.mode == 'sample':
+            target = threading.get_ident()
+            self._sampler = threading.Thread(
+                target=self._sample, args=(target,), name=f'profiler-{self.name}', daemon=True
+            )
+            self._sampler.start()
+        else:
+            if not JobProfiler._cprofile_lock.acquire(blocking=False):
+                print(f"Another job is being profiled with cProfile, not profiling {self.name}")
+                return
+            try:
+                self._profile = cProfile.Profile()
+                self._profile.enable()
+            except ValueError as e:
+                # A profiler started outside of Converso
+                print(f"Error starting cProfile for {self.name}: {e}")
+                self._profile = None
+                JobProfiler._cprofile_lock.release()
+    
+    def stop(self) -> Optional[str]:
+        """Stop profiling and write the output file; returns the path"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        
+        if self._profile:
+            try:
+                self._profile.disable()
+            finally:
+                JobProfiler._cprofile_lock.release()
+            path = self.output_dir / f"{self.name}.prof"
+            self._profile.dump_stats(str(path))
+            return str(path)
+        
+        if self._sampler:
+            self._stop.set()
+            self._sampler.join()
+            path = self.output_dir / f"{self.name}.folded"
+            with open(path, 'w', encoding='utf-8') as f:
+                for stack, count in self._stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            return str(path)
+        
+        return None
+    
+    def _sample(self, thread_id: int):
+        """Record the target thread's stack every SAMPLE_INTERVAL seconds"""
+        while not self._stop.wait(self.SAMPLE_INTERVAL):
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                continue
+            
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self._stacks[';'.join(reversed(stack))] += 1
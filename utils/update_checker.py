@@ -9,6 +9,8 @@ from packaging import version
 from typing import Optional, Dict, Tuple
 import logging
 
+from .governor import GOVERNOR
+
 logger = logging.getLogger(__name__)
 
 
@@ -45,7 +47,12 @@ class UpdateChecker:
             Tuple of (update_available: bool, release_info: dict or None)
         """
         try:
-            response = requests.get(self.api_url, timeout=timeout)
+            with GOVERNOR.background():
+                if not GOVERNOR.acquire(self.api_url, timeout=timeout):
+                    logger.warning("Update check skipped: GitHub API is in a throttling cooldown")
+                    return False, None
+                response = requests.get(self.api_url, timeout=timeout)
+            GOVERNOR.observe(self.api_url, response.status_code, response.headers.get('Retry-After'))
             response.raise_for_status()
             
             release_data = response.json()
@@ -0,0 +1,177 @@
+"""YouTube URL canonicalization for Converso Downloader"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .validators import URLValidator
+
+
+class CanonicalURL(NamedTuple):
+    """
+    Structured result of canonicalizing one input
+    kind is one of: video, playlist, channel, page, search, unsupported, empty
+    (page is a YouTube URL we do not model, unsupported a non-YouTube link)
+    """
+    kind: str
+    video_id: Optional[str]
+    playlist_id: Optional[str]
+    timestamp: Optional[float]
+    canonical_url: str
+    
+    @property
+    def key(self) -> str:
+        """Stable identity for caches, archives and dedupe"""
+        if self.video_id:
+            return f"youtube:{self.video_id}"
+        if self.playlist_id:
+            return f"youtube:playlist:{self.playlist_id}"
+        return self.canonical_url
+    
+    @property
+    def is_youtube(self) -> bool:
+        return self.kind in ('video', 'playlist', 'channel', 'page')
+
+
+class URLCanonicalizer:
+    """
+    Parse YouTube URLs and IDs with precompiled patterns
+    
+    Handles youtube.com and its subdomains (www., m., music., gaming., ...),
+    youtube-nocookie.com and youtu.be hosts with /watch, /shorts/, /embed/,
+    /live/, /v/, /e/, /playlist, /channel/, /@handle, /c/ and /user/ paths.
+    Videos canonicalize to https://www.youtube.com/watch?v=ID - the timestamp
+    and any list= are kept as separate fields, so they never split a cache key.
+    
+    Bare text is only taken as a video ID when it has a digit, - or _, so an
+    11-letter word ("programming") stays a search. IDs made of letters alone
+    have to be given as a URL.
+    """
+    
+    _VIDEO_ID = r'[0-9A-Za-z_-]{11}'
+    
+    _URL_RE = re.compile(
+        r'^(?:https?://)?(?:[0-9A-Za-z-]+\.)*'
+        r'(?P<host>youtube\.com|youtube-nocookie\.com|youtu\.be)'
+        r'(?::\d+)?(?P<path>/[^?#]*)?(?:\?(?P<query>[^#]*))?(?:#(?P<fragment>.*))?$',
+        re.IGNORECASE
+    )
+    _ID_PATH_RE = re.compile(rf'^/(?:shorts|embed|live|v|e)/({_VIDEO_ID})(?:[/?]|$)')
+    _SHORT_PATH_RE = re.compile(rf'^/({_VIDEO_ID})/?$')
+    _CHANNEL_PATH_RE = re.compile(r'^/(channel/UC[0-9A-Za-z_-]{22}|@[\w.-]+|c/[^/]+|user/[^/]+)')
+    # Fast path for the common shapes; anything with more parameters takes the full parse
+    _FAST_VIDEO_RE = re.compile(
+        r'^(?:https?://)?(?:www\.|m\.|music\.)?(?i:youtube\.com/(?:watch\?v=|shorts/|embed/|live/)|youtu\.be/)'
+        rf'({_VIDEO_ID})(?:[?&#/]|$)'
+    )
+    _PARAM_RE = re.compile(r'(?:^|&)(v|list|t|start)=([^&]*)')
+    _BARE_ID_RE = re.compile(rf'^(?=[0-9A-Za-z]*[0-9_-]){_VIDEO_ID}$')
+    _PLAYLIST_ID_RE = re.compile(r'^[0-9A-Za-z_-]{2,}$')
+    _VIDEO_ID_RE = re.compile(rf'^{_VIDEO_ID}$')
+    
+    @staticmethod
+    @lru_cache(maxsize=65536)
+    def canonicalize(text: str) -> CanonicalURL:
+        """Canonicalize one URL, video ID or search text"""
+        text = (text or '').strip()
+        if not text:
+            return CanonicalURL('empty', None, None, None, '')
+        
+        if URLCanonicalizer._BARE_ID_RE.match(text):
+            return CanonicalURL('video', text, None, None, f"https://www.youtube.com/watch?v={text}")
+        
+        fast = URLCanonicalizer._FAST_VIDEO_RE.match(text)
+        if fast and fast.end() == len(text):
+            video_id = fast.group(1)
+            return CanonicalURL('video', video_id, None, None, f"https://www.youtube.com/watch?v={video_id}")
+        
+        match = URLCanonicalizer._URL_RE.match(text)
+        if not match:
+            if text.startswith(('http://', 'https://')):
+                return CanonicalURL('unsupported', None, None, None, text)
+            return CanonicalURL('search', None, None, None, text)
+        
+        host = match.group('host').lower()
+        path = match.group('path') or '/'
+        params = {}
+        for part in (match.group('query'), match.group('fragment')):
+            if part:
+                for name, value in URLCanonicalizer._PARAM_RE.findall(part):
+                    params.setdefault(name, value)
+        
+        video_id = None
+        if host == 'youtu.be':
+            if id_match := URLCanonicalizer._SHORT_PATH_RE.match(path):
+                video_id = id_match.group(1)
+        elif path.rstrip('/') == '/watch':
+            video_id = params.get('v')
+        elif id_match := URLCanonicalizer._ID_PATH_RE.match(path):
+            video_id = id_match.group(1)
+        
+        if video_id and not URLCanonicalizer._VIDEO_ID_RE.match(video_id):
+            video_id = None
+        
+        playlist_id = params.get('list')
+        if playlist_id and not URLCanonicalizer._PLAYLIST_ID_RE.match(playlist_id):
+            playlist_id = None
+        
+        timestamp = None
+        if raw_time := params.get('t') or params.get('start'):
+            timestamp = URLValidator.parse_timestamp(raw_time)
+        
+        if video_id:
+            return CanonicalURL('video', video_id, playlist_id, timestamp,
+                                f"https://www.youtube.com/watch?v={video_id}")
+        
+        if playlist_id:
+            return CanonicalURL('playlist', None, playlist_id, None,
+                                f"https://www.youtube.com/playlist?list={playlist_id}")
+        
+        if channel := URLCanonicalizer._CHANNEL_PATH_RE.match(path):
+            return CanonicalURL('channel', None, None, None, f"https://www.youtube.com/{channel.group(1)}")
+        
+        # A YouTube page we do not model (home, results, ...) - keep it as is
+        return CanonicalURL('page', None, None, None, text)
+    
+    @staticmethod
+    def canonicalize_many(lines: Iterable[str]) -> Iterator[CanonicalURL]:
+        """Canonicalize lines lazily, one result per input line"""
+        canonicalize = URLCanonicalizer.canonicalize
+        for line in lines:
+            yield canonicalize(line)
+    
+    @staticmethod
+    def dedupe(lines: Iterable[str], kinds: Tuple[str, ...] = ('video', 'playlist', 'channel')
+               ) -> Tuple[List[CanonicalURL], Dict[str, int]]:
+        """
+        Normalize pasted lines and drop duplicates by canonical key
+        Returns (unique results in input order, {'total', 'unique', 'duplicate', 'invalid'})
+        """
+        canonicalize = URLCanonicalizer.canonicalize
+        seen = set()
+        unique = []
+        total = invalid = 0
+        
+        for line in lines:
+            total += 1
+            result = canonicalize(line)
+            if result.kind not in kinds:
+                invalid += 1
+                continue
+            key = result.key
+            if key not in seen:
+                seen.add(key)
+                unique.append(result)
+        
+        stats = {
+            'total': total,
+            'unique': len(unique),
+            'duplicate': total - invalid - len(unique),
+            'invalid': invalid,
+        }
+        return unique, stats
+
+
+def canonicalize(text: str) -> CanonicalURL:
+    """Module-level shortcut for URLCanonicalizer.canonicalize"""
+    return URLCanonicalizer.canonicalize(text)
@@ -1,7 +1,8 @@
 """URL validation and input validators for Converso Pro Downloader"""
 
 import re
-from urllib.parse import urlparse
+from typing import Optional
+from urllib.parse import urlparse, parse_qs
 
 
 class URLValidator:
@@ -13,53 +14,132 @@ class URLValidator:
         Validate if the input is a valid YouTube URL, ID, or can be used as search
         Returns: (is_valid, error_message)
         """
-        if not url or not url.strip():
-            return False, "Input cannot be empty"
-        
-        url = url.strip()
+        from .url_canon import URLCanonicalizer
         
-        # If it's a URL, check if it's YouTube
-        if url.startswith('http://') or url.startswith('https://'):
-            youtube_domains = ['youtube.com', 'youtu.be', 'm.youtube.com', 'www.youtube.com']
-            if any(domain in url.lower() for domain in youtube_domains):
-                return True, ""
-            else:
-                return False, "Only YouTube URLs are supported"
+        result = URLCanonicalizer.canonicalize(url)
+        if result.kind == 'empty':
+            return False, "Input cannot be empty"
         
-        # If it's 11 characters, likely a video ID
-        if len(url) == 11 and url.isalnum():
-            return True, ""
+        # Non-YouTube links; search text and video IDs are always valid
+        if result.kind == 'unsupported':
+            return False, "Only YouTube URLs are supported"
         
-        # Otherwise treat as search query (always valid for non-URLs)
         return True, ""
     
     @staticmethod
     def extract_video_id(url: str, platform: str = 'youtube') -> str:
         """Extract video ID from URL"""
         if platform == 'youtube':
-            patterns = [
-                r'(?:v=|\/)([0-9A-Za-z_-]{11}).*',
-                r'(?:embed\/)([0-9A-Za-z_-]{11})',
-                r'(?:watch\?v=)([0-9A-Za-z_-]{11})'
-            ]
-            for pattern in patterns:
-                match = re.search(pattern, url)
-                if match:
-                    return match.group(1)
+            from .url_canon import URLCanonicalizer
+            return URLCanonicalizer.canonicalize(url).video_id or ""
         
         return ""
     
     @staticmethod
     def is_playlist_url(url: str) -> bool:
         """Check if URL is a playlist"""
+        from .url_canon import URLCanonicalizer
+        
+        result = URLCanonicalizer.canonicalize(url)
+        if result.is_youtube:
+            return result.playlist_id is not None
+        
         playlist_indicators = ['playlist', 'list=', '/sets/', '/album/']
         return any(indicator in url.lower() for indicator in playlist_indicators)
     
     @staticmethod
     def is_channel_url(url: str) -> bool:
         """Check if URL is a channel"""
+        from .url_canon import URLCanonicalizer
+        
+        result = URLCanonicalizer.canonicalize(url)
+        if result.is_youtube:
+            return result.kind == 'channel'
+        
         channel_indicators = ['/channel/', '/user/', '/c/', '/@']
         return any(indicator in url.lower() for indicator in channel_indicators)
+    
+    @staticmethod
+    def parse_timestamp(value) -> Optional[float]:
+        """
+        Parse a timestamp into seconds
+        Accepts 90, '90', '1:30', '1:02:03', '1h2m3s', '2m', '45.5s'
+        """
+        if value is None:
+            return None
+        
+        if isinstance(value, (int, float)):
+            return float(value) if value >= 0 else None
+        
+        value = str(value).strip().lower()
+        if not value:
+            return None
+        
+        if ':' in value:
+            try:
+                seconds = 0.0
+                for part in value.split(':'):
+                    seconds = seconds * 60 + float(part)
+                return seconds
+            except ValueError:
+                return None
+        
+        match = re.fullmatch(r'(?:(\d+)h)?(?:(\d+)m)?(?:(\d+(?:\.\d+)?)s?)?', value)
+        if not match or not any(match.groups()):
+            return None
+        
+        hours, minutes, secs = match.groups()
+        return int(hours or 0) * 3600 + int(minutes or 0) * 60 + float(secs or 0)
+    
+    @staticmethod
+    def extract_timestamp(url: str) -> Optional[float]:
+        """Extract the start time from a 't=' or 'start=' URL parameter"""
+        try:
+            parsed = urlparse(url)
+        except ValueError:
+            return None
+        
+        # youtu.be links and some shares put the timestamp in the fragment
+        for query in (parsed.query, parsed.fragment):
+            params = parse_qs(query)
+            for key in ('t', 'start'):
+                if params.get(key):
+                    return URLValidator.parse_timestamp(params[key][0])
+        
+        return None
+    
+    @staticmethod
+    def parse_time_range(text: str) -> tuple[Optional[float], Optional[float]]:
+        """
+        Parse a 'start-end' range such as '1:00-2:30' or '90-' into seconds
+        Returns (start, end); missing sides are None
+        """
+        if not text or '-' not in text:
+            return URLValidator.parse_timestamp(text), None
+        
+        start_text, _, end_text = text.strip().partition('-')
+        return URLValidator.parse_timestamp(start_text), URLValidator.parse_timestamp(end_text)
+    
+    @staticmethod
+    def parse_batch_line(line: str) -> dict:
+        """
+        Parse one batch input line of the form 'URL [start-end]'
+        Falls back to the URL's 't=' parameter for the start time
+        Returns: dict with url, start and end
+        """
+        parts = line.strip().split(None, 1)
+        if not parts:
+            return {'url': '', 'start': None, 'end': None}
+        
+        url = parts[0]
+        start, end = (None, None)
+        if len(parts) > 1:
+            start, end = URLValidator.parse_time_range(parts[1])
+        
+        if start is None:
+            start = URLValidator.extract_timestamp(url)
+        
+        return {'url': url, 'start': start, 'end': end}
 
 
 class FileValidator:
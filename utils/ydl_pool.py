@@ -0,0 +1,223 @@
+"""Reusable, thread-confined YoutubeDL instances for Converso Downloader"""
+
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+import yt_dlp
+from yt_dlp.postprocessor import get_postprocessor
+
+from .governor import GOVERNOR
+from .metrics import YDL_INSTANCES
+from .player_cache import PlayerCache
+
+
+class _PooledYDL:
+    """A YoutubeDL instance and its bookkeeping"""
+    
+    def __init__(self, ydl: yt_dlp.YoutubeDL):
+        self.ydl = ydl
+        self.uses = 0
+        self.in_use = False
+
+
+class YDLPool:
+    """
+    Long-lived YoutubeDL instances, one per thread and option profile
+    
+    Only the options yt-dlp bakes in at construction time (cookies, network,
+    headers, archive, output streams) form the profile. Everything else -
+    format, outtmpl, hooks, postprocessors and plain params - is applied to
+    the instance for one call and restored afterwards, so extractor instances,
+    the cookie jar, HTTP connections and the player cache carry over.
+    Unless a profile says otherwise, every instance uses the managed PlayerCache.
+    Every instance sends its requests through the RequestGovernor.
+    Instances are recycled after MAX_USES calls or when a call raises.
+    Threads come and go (Streamlit runs each script rerun on a new one), so
+    the instances of threads that have exited are closed whenever a new
+    thread first uses the pool.
+    """
+    
+    MAX_USES = 50
+    
+    # Read once by YoutubeDL.__init__ or its cached request director
+    PROFILE_KEYS = (
+        'quiet', 'logtostderr', 'no_color', 'color', 'restrictfilenames', 'compat_opts',
+        'cookiefile', 'cookiesfrombrowser', 'http_headers', 'proxy', 'socket_timeout',
+        'source_address', 'nocheckcertificate', 'client_certificate', 'client_certificate_key',
+        'client_certificate_password', 'legacyserverconnect', 'download_archive',
+        'allowed_extractors', 'cachedir',
+    )
+    
+    # Registered by YoutubeDL.__init__ from params; applied by hand per call
+    HOOK_KEYS = ('progress_hooks', 'postprocessor_hooks', 'post_hooks', 'postprocessors')
+    
+    def __init__(self, max_uses: int = MAX_USES):
+        self.max_uses = max_uses
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats = {'created': 0, 'reused': 0, 'recycled': 0, 'reaped': 0, 'construct_seconds': 0.0}
+        # (thread, its instances) for every thread that used the pool
+        self._threads: List[tuple] = []
+    
+    @contextmanager
+    def acquire(self, opts: Dict) -> Iterator[yt_dlp.YoutubeDL]:
+        """
+        Borrow an instance configured with opts for the duration of the block
+        Usage mirrors `with yt_dlp.YoutubeDL(opts) as ydl:`
+        """
+        profile = {key: opts[key] for key in self.PROFILE_KEYS if key in opts}
+        profile.setdefault('cachedir', PlayerCache.path())
+        key = repr(sorted(profile.items()))
+        
+        instances = self._instances()
+        pooled = instances.get(key)
+        temporary = False
+        
+        if pooled is None or pooled.in_use:
+            # Nested use on the same thread gets a throwaway instance
+            temporary = pooled is not None
+            pooled = self._create(profile)
+            if not temporary:
+                instances[key] = pooled
+        else:
+            self._count('reused')
+        
+        pooled.in_use = True
+        pooled.uses += 1
+        ydl = pooled.ydl
+        saved = self._apply(ydl, opts)
+        failed = False
+        
+        try:
+            yield ydl
+        except GeneratorExit:
+            # A streaming caller stopped early - the instance itself is fine
+            raise
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self._restore(ydl, saved)
+            pooled.in_use = False
+            
+            if temporary:
+                ydl.close()
+            elif failed or pooled.uses >= self.max_uses:
+                instances.pop(key, None)
+                ydl.close()
+                self._count('recycled')
+    
+    def stats(self) -> Dict:
+        """Construction and reuse counters, for before/after measurements"""
+        self.reap()
+        with self._lock:
+            return dict(self._stats)
+    
+    def clear(self):
+        """Close the calling thread's instances"""
+        instances = self._instances()
+        for pooled in instances.values():
+            if not pooled.in_use:
+                pooled.ydl.close()
+        instances.clear()
+    
+    def reap(self) -> int:
+        """Close the instances of threads that have exited; returns how many"""
+        with self._lock:
+            alive, dead = [], []
+            for entry in self._threads:
+                thread = entry[0]()
+                (alive if thread is not None and thread.is_alive() else dead).append(entry)
+            self._threads = alive
+        
+        closed = 0
+        for _, instances in dead:
+            for pooled in instances.values():
+                pooled.ydl.close()
+                closed += 1
+            instances.clear()
+        if closed:
+            with self._lock:
+                self._stats['reaped'] += closed
+            YDL_INSTANCES.inc(closed, ('reaped',))
+        return closed
+    
+    def _instances(self) -> Dict[str, _PooledYDL]:
+        try:
+            return self._local.instances
+        except AttributeError:
+            pass
+        # First use on this thread: register it, and clean up after exited ones
+        instances = self._local.instances = {}
+        with self._lock:
+            self._threads.append((weakref.ref(threading.current_thread()), instances))
+        self.reap()
+        return instances
+    
+    def _create(self, profile: Dict) -> _PooledYDL:
+        started = time.perf_counter()
+        ydl = GOVERNOR.install(yt_dlp.YoutubeDL(dict(profile)))
+        with self._lock:
+            self._stats['construct_seconds'] += time.perf_counter() - started
+        self._count('created')
+        return _PooledYDL(ydl)
+    
+    def _count(self, result: str):
+        with self._lock:
+            self._stats[result] += 1
+        YDL_INSTANCES.inc(1, (result,))
+    
+    def _apply(self, ydl: yt_dlp.YoutubeDL, opts: Dict) -> Dict:
+        """Overlay per-call options; returns what is needed to undo them"""
+        saved = {
+            'params': dict(ydl.params),
+            'format_selector': ydl.format_selector,
+            'progress_hooks': list(ydl._progress_hooks),
+            'postprocessor_hooks': list(ydl._postprocessor_hooks),
+            'post_hooks': list(ydl._post_hooks),
+            'pps': {when: list(pps) for when, pps in ydl._pps.items()},
+        }
+        
+        ydl.params.update({k: v for k, v in opts.items() if k not in self.HOOK_KEYS})
+        ydl._download_retcode = 0
+        ydl._num_downloads = 0
+        
+        if 'outtmpl' in opts:
+            ydl.params['outtmpl'] = opts['outtmpl']
+            ydl._parse_outtmpl()
+        if 'format' in opts:
+            fmt = opts['format']
+            ydl.format_selector = fmt if fmt in (None, '-') or callable(fmt) else ydl.build_format_selector(fmt)
+        
+        # Hooks first, so postprocessors added below pick up the postprocessor hooks
+        for ph in opts.get('progress_hooks', []):
+            ydl.add_progress_hook(ph)
+        for ph in opts.get('postprocessor_hooks', []):
+            ydl.add_postprocessor_hook(ph)
+        for ph in opts.get('post_hooks', []):
+            ydl.add_post_hook(ph)
+        for pp_def_raw in opts.get('postprocessors', []):
+            pp_def = dict(pp_def_raw)
+            when = pp_def.pop('when', 'post_process')
+            ydl.add_post_processor(get_postprocessor(pp_def.pop('key'))(ydl, **pp_def), when=when)
+        
+        return saved
+    
+    @staticmethod
+    def _restore(ydl: yt_dlp.YoutubeDL, saved: Dict):
+        """Undo _apply"""
+        ydl.params.clear()
+        ydl.params.update(saved['params'])
+        ydl.format_selector = saved['format_selector']
+        ydl._progress_hooks[:] = saved['progress_hooks']
+        ydl._postprocessor_hooks[:] = saved['postprocessor_hooks']
+        ydl._post_hooks[:] = saved['post_hooks']
+        for when, pps in saved['pps'].items():
+            ydl._pps[when][:] = pps
+
+
+# Process-wide pool shared by the extractor, downloader, playlist and search code
+YDL_POOL = YDLPool()
@@ -1,13 +1,22 @@
 """YouTube search and video lookup functionality"""
 
-import yt_dlp
-from typing import List, Dict, Optional
+import time
+from typing import Iterator, List, Dict, Optional
+
+from .metrics import CACHE_REQUESTS, ERRORS, PHASE_SECONDS, classify_error
+from .url_canon import URLCanonicalizer
+from .ydl_pool import YDL_POOL
 
 
 class YouTubeSearcher:
     """Search YouTube videos and extract information"""
     
+    # Search results go stale quickly, so keep them briefly and only a bounded number
+    CACHE_TTL = 300
+    CACHE_MAX_ENTRIES = 128
+    
     def __init__(self):
+        self.cache: Dict[tuple, tuple] = {}
         self.ydl_opts = {
             'quiet': True,
             'no_warnings': True,
@@ -20,61 +29,96 @@ class YouTubeSearcher:
         Search YouTube for videos
         Returns list of video information
         """
+        return list(self.iter_search(query, max_results))
+    
+    def iter_search(self, query: str, max_results: int = 10) -> Iterator[Dict]:
+        """
+        Search YouTube, yielding each video as soon as yt-dlp has parsed it
+        The first rows can be shown before the rest of the page is processed
+        """
         if not query or not query.strip():
-            return []
+            return
         
         query = query.strip()
         
         # If it's already a URL, return it
         if query.startswith('http://') or query.startswith('https://'):
-            return [{'url': query, 'type': 'direct_url'}]
+            yield {'url': query, 'type': 'direct_url'}
+            return
         
         # If it's a video ID (11 characters), convert to URL
         if len(query) == 11 and query.replace('-', '').replace('_', '').isalnum():
-            return [{'url': f'https://www.youtube.com/watch?v={query}', 'type': 'video_id'}]
+            yield {'url': f'https://www.youtube.com/watch?v={query}', 'type': 'video_id'}
+            return
         
         # Otherwise, search YouTube
+        cache_key = (query.lower(), max_results)
+        if cached := self.cache.get(cache_key):
+            cached_at, videos = cached
+            if time.time() - cached_at < self.CACHE_TTL:
+                CACHE_REQUESTS.inc(1, ('search', 'hit'))
+                yield from videos
+                return
+        
+        CACHE_REQUESTS.inc(1, ('search', 'miss'))
         search_query = f"ytsearch{max_results}:{query}"
+        started = time.perf_counter()
+        videos = []
         
         try:
-            with yt_dlp.YoutubeDL(self.ydl_opts) as ydl:
-                result = ydl.extract_info(search_query, download=False)
+            with YDL_POOL.acquire(self.ydl_opts) as ydl:
+                # process=False keeps 'entries' a lazy generator over the result pages
+                result = ydl.extract_info(search_query, download=False, process=False)
                 
                 if not result or 'entries' not in result:
-                    return []
+                    return
                 
-                videos = []
                 for entry in result['entries']:
-                    if entry:
-                        # Get thumbnail - handle both string and list formats
-                        thumbnail = entry.get('thumbnail', '')
-                        if not thumbnail and entry.get('thumbnails'):
-                            thumbnails = entry.get('thumbnails', [])
-                            if isinstance(thumbnails, list) and thumbnails:
-                                # Get the highest quality thumbnail
-                                thumbnail = thumbnails[-1].get('url', '') if thumbnails else ''
-                        
-                        # If still no thumbnail, construct from video ID
-                        if not thumbnail and entry.get('id'):
-                            thumbnail = f"https://i.ytimg.com/vi/{entry.get('id')}/hqdefault.jpg"
-                        
-                        video = {
-                            'id': entry.get('id', ''),
-                            'title': entry.get('title', 'Unknown Title'),
-                            'url': entry.get('url', '') or f"https://www.youtube.com/watch?v={entry.get('id', '')}",
-                            'duration': entry.get('duration', 0),
-                            'uploader': entry.get('uploader', 'Unknown'),
-                            'view_count': entry.get('view_count', 0),
-                            'thumbnail': thumbnail,
-                            'type': 'search_result'
-                        }
-                        videos.append(video)
-                
-                return videos
-                
+                    if not entry:
+                        continue
+                    
+                    video = self._entry_to_video(entry)
+                    if not videos:
+                        PHASE_SECONDS.observe(time.perf_counter() - started, ('search_first_result',))
+                    videos.append(video)
+                    yield video
+            
+            PHASE_SECONDS.observe(time.perf_counter() - started, ('search',))
+            
+            if len(self.cache) >= self.CACHE_MAX_ENTRIES:
+                # Dicts keep insertion order - drop the oldest entry (another session may beat us to it)
+                self.cache.pop(next(iter(self.cache), None), None)
+            self.cache[cache_key] = (time.time(), videos)
+        
         except Exception as e:
+            ERRORS.inc(1, ('search', classify_error(e)))
             print(f"Search error: {e}")
-            return []
+    
+    @staticmethod
+    def _entry_to_video(entry: Dict) -> Dict:
+        """Convert a flat yt-dlp search entry into a result row"""
+        # Get thumbnail - handle both string and list formats
+        thumbnail = entry.get('thumbnail', '')
+        if not thumbnail and entry.get('thumbnails'):
+            thumbnails = entry.get('thumbnails', [])
+            if isinstance(thumbnails, list) and thumbnails:
+                # Get the highest quality thumbnail
+                thumbnail = thumbnails[-1].get('url', '') if thumbnails else ''
+        
+        # If still no thumbnail, construct from video ID
+        if not thumbnail and entry.get('id'):
+            thumbnail = f"https://i.ytimg.com/vi/{entry.get('id')}/hqdefault.jpg"
+        
+        return {
+            'id': entry.get('id', ''),
+            'title': entry.get('title', 'Unknown Title'),
+            'url': entry.get('url', '') or f"https://www.youtube.com/watch?v={entry.get('id', '')}",
+            'duration': entry.get('duration', 0),
+            'uploader': entry.get('uploader') or entry.get('channel', 'Unknown'),
+            'view_count': entry.get('view_count') or 0,
+            'thumbnail': thumbnail,
+            'type': 'search_result'
+        }
     
     def get_video_suggestions(self, query: str) -> List[str]:
         """
@@ -89,29 +133,26 @@ class YouTubeSearcher:
         Parse user input and determine what type it is
         Returns: dict with type and processed value
         """
-        if not user_input or not user_input.strip():
-            return {'type': 'empty', 'value': ''}
+        result = URLCanonicalizer.canonicalize(user_input)
         
-        user_input = user_input.strip()
+        if result.kind == 'empty':
+            return {'type': 'empty', 'value': ''}
         
-        # Check if it's a URL
-        if user_input.startswith('http://') or user_input.startswith('https://'):
-            youtube_domains = ['youtube.com', 'youtu.be', 'm.youtube.com']
-            if any(domain in user_input.lower() for domain in youtube_domains):
-                return {'type': 'url', 'value': user_input}
-            else:
-                return {'type': 'invalid_url', 'value': user_input}
+        if result.kind == 'unsupported':
+            return {'type': 'invalid_url', 'value': result.canonical_url}
         
-        # Check if it's a video ID (11 characters)
-        if len(user_input) == 11 and user_input.replace('-', '').replace('_', '').isalnum():
+        # A bare video ID
+        if result.kind == 'video' and result.video_id == user_input.strip():
             return {
                 'type': 'video_id', 
-                'value': user_input,
-                'url': f'https://www.youtube.com/watch?v={user_input}'
+                'value': result.video_id,
+                'url': result.canonical_url
             }
         
-        # Otherwise it's a search query
-        return {'type': 'search_query', 'value': user_input}
+        if result.kind == 'search':
+            return {'type': 'search_query', 'value': result.canonical_url}
+        
+        return {'type': 'url', 'value': user_input.strip()}
     
     def quick_lookup(self, user_input: str) -> Optional[str]:
         """